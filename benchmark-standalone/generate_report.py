@@ -5,6 +5,7 @@ Report Generator Script - генерация отчетов из существ
 Usage:
     python generate_report.py --latest
     python generate_report.py --experiment-id <uuid>
+    python generate_report.py --rebuild-rollups
 """
 import argparse
 import asyncio
@@ -21,6 +22,7 @@ from src import (
     get_db,
     init_database,
     init_db,
+    rebuild_rollups,
 )
 
 logging.basicConfig(
@@ -57,10 +59,16 @@ async def main():
         help="Output file path (default: reports/report_<timestamp>.md)"
     )
     
+    parser.add_argument(
+        "--rebuild-rollups",
+        action="store_true",
+        help="Recompute pre-aggregated rollups from raw metrics (for older databases)"
+    )
+    
     args = parser.parse_args()
     
-    if not args.experiment_id and not args.latest:
-        parser.error("Must specify either --experiment-id or --latest")
+    if not args.experiment_id and not args.latest and not args.rebuild_rollups:
+        parser.error("Must specify either --experiment-id, --latest or --rebuild-rollups")
     
     # Load configuration
     if not args.config.exists():
@@ -73,12 +81,26 @@ async def main():
     # Initialize database
     db_url = config['database']['url']
     logger.info(f"Initializing database: {db_url}")
-    init_database(db_url, echo=config['database'].get('echo', False))
+    init_database(
+        db_url,
+        echo=config['database'].get('echo', False),
+        sqlite_pragmas=config['database'].get('sqlite_pragmas'),
+        pool_size=config['database'].get('pool_size', 5),
+        max_overflow=config['database'].get('max_overflow', 10)
+    )
     await init_db()
     logger.info("✓ Database initialized")
     
     try:
         async for db in get_db():
+            if args.rebuild_rollups:
+                rebuilt = await rebuild_rollups(
+                    db, UUID(args.experiment_id) if args.experiment_id else None
+                )
+                logger.info(f"✓ Rollups rebuilt for {rebuilt} experiments")
+                if not args.experiment_id and not args.latest:
+                    continue
+            
             reporter = ReportGenerator(db)
             
             # Generate report
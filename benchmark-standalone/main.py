@@ -9,29 +9,48 @@ Usage:
     python main.py --task-range 1-5
     python main.py --category simple
     python main.py --mode multi-agent --limit 10
+    python main.py --mock-gateway --limit 10
 """
 import argparse
 import asyncio
 import logging
 import sys
 import time
+from contextlib import asynccontextmanager
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from uuid import UUID
 
 import yaml
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src import (
+    FAKE_ANALYZER_COMMAND,
+    AnalysisServers,
     AuthManager,
+    CodeIndex,
+    CommandRunner,
     GatewayClient,
     MetricsCollector,
+    MetricsWriter,
+    MockGateway,
     MockToolExecutor,
     ReportGenerator,
+    TaskScheduler,
     TaskValidator,
+    TimeoutPolicy,
+    TreeSnapshot,
+    ValidationCache,
+    Workspace,
+    WorkspaceManager,
     close_db,
+    create_http_client,
+    get_codec,
     get_db,
     init_database,
     init_db,
+    load_scenarios,
 )
 
 # Configure logging
@@ -57,8 +76,11 @@ class BenchmarkRunner:
         self.config = config
         self.tasks: List[Dict[str, Any]] = []
         
+        # Shared HTTP connection pool for Gateway and auth requests
+        self.http_client = create_http_client(config['gateway'].get('http'))
+        
         # Initialize auth manager
-        auth_manager = AuthManager(config['gateway'])
+        auth_manager = AuthManager(config['gateway'], http_client=self.http_client)
         
         # Initialize components
         self.client = GatewayClient(
@@ -67,18 +89,154 @@ class BenchmarkRunner:
             auth_manager=auth_manager,
             timeout=config['gateway']['timeout'],
             reconnect_attempts=config['gateway']['reconnect_attempts'],
-            reconnect_delay=config['gateway']['reconnect_delay']
+            reconnect_delay=config['gateway']['reconnect_delay'],
+            http_client=self.http_client,
+            codec=get_codec(config['gateway'].get('json_codec'))
+        )
+        
+        # Per-task deadlines learned from previous runs
+        timeouts = config['benchmark'].get('timeouts', {})
+        self.timeout_policy = TimeoutPolicy.from_config(timeouts, config['gateway']['timeout'])
+        self.adaptive_timeouts = timeouts.get('adaptive', False)
+        
+        # One runner for all tasks: limits concurrent dart/flutter processes
+        commands = config['benchmark'].get('commands', {})
+        self.command_runner = CommandRunner(
+            max_concurrent=commands.get('max_concurrent'),
+            timeout=commands.get('timeout', 30),
+            max_output_bytes=commands.get('max_output_bytes', 1024 * 1024)
         )
         
+        # Warm analysis server per workspace for syntax checks
+        analysis = config['benchmark'].get('analysis', {})
+        self.analysis_servers = None
+        backend = analysis.get('backend', 'cli')
+        if backend != 'cli':
+            self.analysis_servers = AnalysisServers(
+                command=FAKE_ANALYZER_COMMAND if backend == 'fake' else analysis.get('command'),
+                max_servers=analysis.get(
+                    'max_servers', config['benchmark'].get('max_concurrent_tasks', 1)
+                ),
+                startup_timeout=analysis.get('startup_timeout', 60),
+                request_timeout=analysis.get('request_timeout', 120)
+            )
+        
+        # Check results by file contents, kept between runs
+        validation_cache = config['benchmark'].get('validation_cache', {})
+        self.validation_cache = None
+        if validation_cache.get('enabled', False):
+            cache_path = validation_cache.get('path')
+            self.validation_cache = ValidationCache(
+                Path(cache_path) if cache_path else None,
+                max_entries=validation_cache.get('max_entries', 10000)
+            )
+        
+        # Tree snapshots per workspace, shared by executor and validator
+        self.tree_watch = config['benchmark'].get('tree_snapshot', {}).get('watch', False)
+        self.trees: Dict[Path, TreeSnapshot] = {}
+        
         project_path = Path(config['benchmark']['test_project'])
-        self.executor = MockToolExecutor(project_path)
+        self.executor = MockToolExecutor(
+            project_path, command_runner=self.command_runner, tree=self._tree(project_path)
+        )
         
         self.validator = None
         if config['benchmark']['enable_validation']:
             if project_path.exists():
-                self.validator = TaskValidator(project_path)
+                self.validator = self._create_validator(project_path)
             else:
                 logger.warning(f"Test project not found: {project_path}, validation disabled")
+        
+        self.scheduler = TaskScheduler(
+            max_concurrent_tasks=config['benchmark'].get('max_concurrent_tasks', 1),
+            category_limits=config['benchmark'].get('category_concurrency')
+        )
+        
+        # Per-task isolated copies of test_project
+        self.workspaces = None
+        self.code_indexes: Dict[Path, CodeIndex] = {}
+        if config['benchmark'].get('isolate_workspaces', False):
+            workspace_root = config['benchmark'].get('workspace_root')
+            self.workspaces = WorkspaceManager(
+                project_path,
+                root=Path(workspace_root) if workspace_root else None,
+                pool_size=config['benchmark'].get(
+                    'workspace_pool_size', self.scheduler.max_concurrent_tasks
+                )
+            )
+        elif self.scheduler.max_concurrent_tasks > 1:
+            logger.warning(
+                "Tasks run concurrently in one shared test_project, "
+                "enable benchmark.isolate_workspaces to avoid interference"
+            )
+    
+    async def close(self) -> None:
+        """Release runner resources."""
+        await self.http_client.aclose()
+        if self.analysis_servers:
+            await self.analysis_servers.close()
+        if self.validation_cache:
+            logger.info(f"Validation cache: {self.validation_cache.get_stats()}")
+            await asyncio.to_thread(self.validation_cache.save)
+        for tree in self.trees.values():
+            tree.close()
+        if self.workspaces:
+            await self.workspaces.close()
+    
+    def _tree(self, path: Path) -> TreeSnapshot:
+        """Tree snapshot of a workspace, kept between tasks."""
+        tree = self.trees.get(path)
+        if tree is None:
+            tree = self.trees[path] = TreeSnapshot(path, watch=self.tree_watch)
+        return tree
+    
+    def _create_validator(
+        self,
+        project_path: Path,
+        workspace: Optional[Workspace] = None
+    ) -> TaskValidator:
+        """Create validator sharing runner-wide command and analysis resources."""
+        return TaskValidator(
+            project_path,
+            command_runner=self.command_runner,
+            analysis_servers=self.analysis_servers,
+            cache=self.validation_cache,
+            tree=self._tree(project_path),
+            workspace=workspace
+        )
+    
+    @asynccontextmanager
+    async def _task_environment(
+        self
+    ) -> AsyncIterator[Tuple[MockToolExecutor, Optional[TaskValidator]]]:
+        """
+        Provide tool executor and validator for a single task.
+        
+        With isolated workspaces both point at a workspace leased for the task,
+        otherwise the shared ones bound to test_project are used.
+        """
+        if self.workspaces is None:
+            yield self.executor, self.validator
+            return
+        
+        async with self.workspaces.lease() as workspace:
+            # Search index survives workspace recycling: only files changed by the reset are reread
+            code_index = self.code_indexes.get(workspace.path)
+            if code_index is None:
+                code_index = self.code_indexes[workspace.path] = CodeIndex(
+                    workspace.path, tree=self._tree(workspace.path)
+                )
+            executor = MockToolExecutor(
+                workspace.path,
+                workspace=workspace,
+                command_runner=self.command_runner,
+                code_index=code_index,
+                tree=self._tree(workspace.path)
+            )
+            validator = (
+                self._create_validator(workspace.path, workspace) if self.validator else None
+            )
+            yield executor, validator
     
     def load_tasks(self, tasks_file: Path) -> None:
         """Load tasks from YAML file."""
@@ -171,7 +329,7 @@ class BenchmarkRunner:
         
         Args:
             mode: Execution mode ('single-agent' or 'multi-agent')
-            
+        
         Returns:
             Experiment UUID
         """
@@ -195,78 +353,206 @@ class BenchmarkRunner:
                 "tasks_file": self.config['benchmark']['tasks_file'],
                 "total_tasks": len(self.tasks),
                 "gateway_url": self.config['gateway']['ws_url'],
+                "max_concurrent_tasks": self.scheduler.max_concurrent_tasks,
                 "started_at": time.time()
             }
             
             experiment_id = await collector.start_experiment(mode=mode, config=config)
             logger.info(f"Started experiment: {experiment_id}")
             
-            # Run each task
-            successful_tasks = 0
-            failed_tasks = 0
+            if self.adaptive_timeouts:
+                await self.timeout_policy.load(db, mode=mode)
+        
+        if self.workspaces:
+            await self.workspaces.warm_up(min(self.scheduler.max_concurrent_tasks, len(self.tasks)))
+        
+        # Create sessions (and connect their WebSockets) ahead of the tasks that need them
+        session_pool = self.config['gateway'].get('session_pool', {})
+        if session_pool.get('enabled', False):
+            self.client.start_session_pool(
+                len(self.tasks),
+                ahead=session_pool.get('ahead', self.scheduler.max_concurrent_tasks),
+                preconnect=session_pool.get('preconnect', True)
+            )
+        
+        # Run tasks concurrently, results come back in task order
+        async for db in get_db():
+            writer = None
+            if self.config['database'].get('write_buffer', {}).get('background', False):
+                # Metrics are persisted off the WebSocket receive loop
+                writer = MetricsWriter(
+                    self._create_collector(db),
+                    queue_size=self.config['database']['write_buffer'].get('queue_size', 10000)
+                )
+                writer.start()
             
-            for i, task in enumerate(self.tasks, 1):
-                logger.info(f"\n{'='*60}")
-                logger.info(f"📊 Progress: [{i}/{len(self.tasks)}] ({i/len(self.tasks)*100:.0f}%)")
-                logger.info(f"📝 Task: {task['id']} - {task['title']}")
-                logger.info(f"🏷️  Category: {task['category']}, Type: {task['type']}")
-                logger.info(f"{'='*60}\n")
+            try:
+                results = await self.scheduler.run(
+                    self.tasks,
+                    partial(self._run_task, experiment_id=experiment_id, mode=mode, writer=writer)
+                )
+            finally:
+                await self.client.stop_session_pool()
+                if writer:
+                    await writer.close()
+        successful_tasks = sum(1 for success in results if success)
+        failed_tasks = len(results) - successful_tasks
+        
+        async for db in get_db():
+            collector = MetricsCollector(db)
+            
+            # Complete experiment
+            await collector.complete_experiment(experiment_id)
+        
+        success_rate = successful_tasks/len(self.tasks) if self.tasks else 0
+        rate_icon = "🎉" if success_rate >= 0.8 else "✅" if success_rate >= 0.5 else "⚠️"
+        
+        logger.info(f"\n{'='*60}")
+        logger.info(f"🏁 Experiment {mode} completed")
+        logger.info(f"{'='*60}")
+        logger.info(f"📊 Total tasks: {len(self.tasks)}")
+        logger.info(f"✅ Successful: {successful_tasks}")
+        logger.info(f"❌ Failed: {failed_tasks}")
+        logger.info(f"{rate_icon} Success rate: {success_rate:.2%}")
+        logger.info(f"{'='*60}\n")
+        
+        return experiment_id
+    
+    def _create_collector(self, db: AsyncSession) -> MetricsCollector:
+        """
+        Create metrics collector configured from database.write_buffer.
+        
+        Buffered rows are journaled to write_buffer.journal_dir before they are
+        acknowledged and replayed by main() after a crash.
+        """
+        write_buffer = self.config['database'].get('write_buffer', {})
+        return MetricsCollector(
+            db,
+            buffered=write_buffer.get('enabled', False),
+            flush_size=write_buffer.get('flush_size', 100),
+            flush_interval=write_buffer.get('flush_interval', 1.0),
+            journal_dir=metrics_journal_dir(self.config)
+        )
+    
+    async def _run_task(
+        self,
+        index: int,
+        task: Dict[str, Any],
+        experiment_id: UUID,
+        mode: str,
+        writer: Optional[MetricsWriter] = None
+    ) -> bool:
+        """
+        Run single task with its own metrics session.
+        
+        Args:
+            index: 1-based task position in the experiment
+            task: Task definition from YAML
+            experiment_id: Parent experiment UUID
+            mode: Execution mode
+            writer: Optional background writer for task events
+        
+        Returns:
+            True if task succeeded
+        """
+        logger.info(f"\n{'='*60}")
+        logger.info(f"📊 Progress: [{index}/{len(self.tasks)}] ({index/len(self.tasks)*100:.0f}%)")
+        logger.info(f"📝 Task: {task['id']} - {task['title']}")
+        logger.info(f"🏷️  Category: {task['category']}, Type: {task['type']}")
+        logger.info(f"{'='*60}\n")
+        
+        success = False
+        
+        async for db in get_db():
+            collector = self._create_collector(db)
+            
+            try:
+                # Start task
+                task_execution_id = await collector.start_task(
+                    experiment_id=experiment_id,
+                    task_id=task['id'],
+                    task_category=task['category'],
+                    task_type=task['type'],
+                    mode=mode
+                )
                 
-                try:
-                    # Start task
-                    task_execution_id = await collector.start_task(
-                        experiment_id=experiment_id,
-                        task_id=task['id'],
-                        task_category=task['category'],
-                        task_type=task['type'],
-                        mode=mode
-                    )
-                    
-                    # Execute task via Gateway
+                # Execute task via Gateway
+                async with self._task_environment() as (executor, validator):
                     start_time = time.time()
+                    task_stats: Dict[str, Any] = {}
                     success = await self.client.execute_task(
                         task=task,
-                        tool_executor=self.executor,
-                        validator=self.validator,
-                        collector=collector,
-                        task_execution_id=task_execution_id
-                    )
-                    duration = time.time() - start_time
-                    
-                    # Complete task
-                    await collector.complete_task(
+                        tool_executor=executor,
+                        validator=validator,
+                        collector=writer or collector,
                         task_execution_id=task_execution_id,
-                        success=success,
-                        metrics={"duration_seconds": duration}
+                        timeout=self.timeout_policy.for_task(task),
+                        stats=task_stats
                     )
-                    
-                    if success:
-                        successful_tasks += 1
-                        logger.info(f"\n✅ Task {task['id']} УСПЕШНО завершена ({duration:.2f}s)")
-                    else:
-                        failed_tasks += 1
-                        logger.warning(f"\n❌ Task {task['id']} ПРОВАЛЕНА ({duration:.2f}s)")
+                    duration = time.time() - start_time
                 
-                except Exception as e:
-                    failed_tasks += 1
-                    logger.error(f"\n❌ Task {task['id']} ОШИБКА: {e}")
-            
-            # Complete experiment
-            await collector.complete_experiment(experiment_id)
-            
-            success_rate = successful_tasks/len(self.tasks) if self.tasks else 0
-            rate_icon = "🎉" if success_rate >= 0.8 else "✅" if success_rate >= 0.5 else "⚠️"
+                if writer:
+                    await writer.flush()
+                
+                # Complete task
+                await collector.complete_task(
+                    task_execution_id=task_execution_id,
+                    success=success,
+                    metrics={"duration_seconds": duration, **task_stats}
+                )
+                
+                if success:
+                    logger.info(f"\n✅ Task {task['id']} УСПЕШНО завершена ({duration:.2f}s)")
+                else:
+                    logger.warning(f"\n❌ Task {task['id']} ПРОВАЛЕНА ({duration:.2f}s)")
             
-            logger.info(f"\n{'='*60}")
-            logger.info(f"🏁 Experiment {mode} completed")
-            logger.info(f"{'='*60}")
-            logger.info(f"📊 Total tasks: {len(self.tasks)}")
-            logger.info(f"✅ Successful: {successful_tasks}")
-            logger.info(f"❌ Failed: {failed_tasks}")
-            logger.info(f"{rate_icon} Success rate: {success_rate:.2%}")
-            logger.info(f"{'='*60}\n")
+            except Exception as e:
+                success = False
+                logger.error(f"\n❌ Task {task['id']} ОШИБКА: {e}")
             
-            return experiment_id
+            finally:
+                # Persist metrics still buffered after a failed task
+                try:
+                    await collector.flush()
+                except Exception as e:
+                    logger.error(f"Failed to flush metrics for task {task['id']}: {e}")
+        
+        return success
+
+
+def metrics_journal_dir(config: Dict[str, Any]) -> Path:
+    """Journal directory of buffered metrics collectors (database.write_buffer.journal_dir)."""
+    write_buffer = config['database'].get('write_buffer', {})
+    return Path(write_buffer.get('journal_dir', 'data/metrics_journal'))
+
+
+def create_mock_gateway(mock_config: Dict[str, Any], args: argparse.Namespace) -> MockGateway:
+    """
+    Create local mock Gateway from `gateway.mock` config section.
+    
+    Args:
+        mock_config: Mock Gateway configuration
+        args: Command line arguments (--mock-profile)
+    
+    Returns:
+        Mock Gateway (not started)
+    """
+    scenarios, profiles = [], {}
+    scenarios_file = mock_config.get('scenarios_file')
+    if scenarios_file:
+        if Path(scenarios_file).exists():
+            scenarios, profiles = load_scenarios(Path(scenarios_file))
+        else:
+            logger.warning(
+                f"Mock scenarios file not found: {scenarios_file}, using default scenario"
+            )
+    
+    return MockGateway(
+        scenarios=scenarios,
+        profile=args.mock_profile or mock_config.get('profile', 'instant'),
+        profiles=profiles,
+        seed=mock_config.get('seed', 0)
+    )
 
 
 async def main():
@@ -316,6 +602,21 @@ async def main():
         type=int,
         help="Limit number of tasks to run"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Max tasks running at once (overrides benchmark.max_concurrent_tasks)"
+    )
+    parser.add_argument(
+        "--mock-gateway",
+        action="store_true",
+        help="Run against a local mock Gateway instead of the real one (gateway.mock)"
+    )
+    parser.add_argument(
+        "--mock-profile",
+        type=str,
+        help="Mock Gateway latency profile (overrides gateway.mock.profile)"
+    )
     parser.add_argument(
         "--generate-report",
         action="store_true",
@@ -332,14 +633,38 @@ async def main():
     with open(args.config, 'r', encoding='utf-8') as f:
         config = yaml.safe_load(f)
     
+    if args.concurrency:
+        config['benchmark']['max_concurrent_tasks'] = args.concurrency
+    
     # Initialize database
     db_url = config['database']['url']
     logger.info(f"Initializing database: {db_url}")
-    init_database(db_url, echo=config['database'].get('echo', False))
+    init_database(
+        db_url,
+        echo=config['database'].get('echo', False),
+        sqlite_pragmas=config['database'].get('sqlite_pragmas'),
+        pool_size=config['database'].get('pool_size', 5),
+        max_overflow=config['database'].get('max_overflow', 10)
+    )
     await init_db()
     logger.info("✓ Database initialized")
     
+    # Metrics acknowledged by buffered collectors of a crashed run
+    async for db in get_db():
+        recovered = await MetricsCollector.recover(db, metrics_journal_dir(config))
+        if recovered:
+            logger.warning(f"Recovered {recovered} metric rows from the journal")
+    
+    runner = None
+    mock_gateway = None
+    
     try:
+        # Start local mock Gateway and point the runner at it
+        if args.mock_gateway:
+            mock_gateway = create_mock_gateway(config['gateway'].get('mock', {}), args)
+            await mock_gateway.start()
+            config['gateway'] = mock_gateway.gateway_config(config['gateway'])
+        
         # Initialize runner
         runner = BenchmarkRunner(config)
         
@@ -389,6 +714,10 @@ async def main():
         sys.exit(1)
     
     finally:
+        if runner:
+            await runner.close()
+        if mock_gateway:
+            await mock_gateway.stop()
         await close_db()
         logger.info("Database connections closed")
 
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Mock Gateway - запуск локальной замены Gateway для офлайн прогонов.
+
+Usage:
+    python mock_gateway.py
+    python mock_gateway.py --port 8000 --ws-port 8001 --profile realistic
+    python mock_gateway.py --scenarios mock_scenarios.yaml --seed 42
+"""
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+
+from src.mock_gateway import PROFILES, MockGateway, load_scenarios
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("mock_gateway")
+
+
+async def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Mock Gateway - локальная замена Gateway для benchmark прогонов"
+    )
+    parser.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="Interface to bind (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8000,
+        help="HTTP port (default: 8000)"
+    )
+    parser.add_argument(
+        "--ws-port",
+        type=int,
+        default=8001,
+        help="WebSocket port (default: 8001)"
+    )
+    parser.add_argument(
+        "--scenarios",
+        type=Path,
+        help="Scenarios YAML file (default: built-in scenario only)"
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default="instant",
+        help=f"Latency profile: {', '.join(PROFILES)} or one from --scenarios (default: instant)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Random seed for latency jitter (default: 0)"
+    )
+    
+    args = parser.parse_args()
+    
+    scenarios, profiles = [], {}
+    if args.scenarios:
+        scenarios, profiles = load_scenarios(args.scenarios)
+    
+    gateway = MockGateway(
+        host=args.host,
+        port=args.port,
+        ws_port=args.ws_port,
+        scenarios=scenarios,
+        profile=args.profile,
+        profiles=profiles,
+        seed=args.seed
+    )
+    
+    async with gateway:
+        logger.info(f"Set gateway.base_url: {gateway.base_url}")
+        logger.info(f"Set gateway.ws_url: {gateway.ws_url}")
+        logger.info("Press Ctrl+C to stop")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,633 @@
+#!/usr/bin/env python3
+"""
+Self Benchmark - замеры производительности самого harness.
+
+Покрывает горячие пути: обработку WebSocket сообщений в execute_task
+(против локального mock Gateway), JSON кодек кадров, MockToolExecutor.execute_tool по типам
+tools, пропускную способность MetricsCollector, ReportGenerator на 10/1k/100k
+задач и load_tasks/filter_tasks на больших файлах задач.
+
+Результаты сравниваются с JSON baseline; при регрессии p50/p95 сверх порога
+скрипт завершается с кодом 1.
+
+Usage:
+    python self_benchmark.py
+    python self_benchmark.py --quick
+    python self_benchmark.py --only executor --save-baseline
+    python self_benchmark.py --baseline baselines/ci.json --output results.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+from sqlalchemy import insert
+
+from main import BenchmarkRunner
+from src import (
+    AuthManager,
+    GatewayClient,
+    MetricsCollector,
+    MockGateway,
+    MockToolExecutor,
+    ReportGenerator,
+    StreamAccumulator,
+    close_db,
+    create_http_client,
+    get_codec,
+    get_db,
+    init_database,
+    init_db,
+    rebuild_rollups,
+)
+from src.codec import JsonCodec, StdlibJsonCodec, available_codecs
+from src.models import Experiment, LLMCall, TaskExecution, ToolCall
+from src.selfbench import (
+    DEFAULT_MIN_DELTA_MS,
+    DEFAULT_THRESHOLDS,
+    BenchmarkResult,
+    compare_to_baseline,
+    format_comparison,
+    load_baseline,
+    measure,
+    save_baseline,
+)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("self_benchmark")
+
+CATEGORIES = ["simple", "medium", "complex", "specialized"]
+TYPES = ["coding", "architecture", "debug", "question", "mixed"]
+
+
+class NullCollector:
+    """Collector stand-in that only counts events, keeping the database out of WS timings."""
+    
+    def __init__(self):
+        self.events = 0
+    
+    async def _record(self, **kwargs: Any) -> None:
+        self.events += 1
+    
+    record_llm_call = _record
+    record_tool_call = _record
+    record_agent_switch = _record
+    record_quality_evaluation = _record
+    record_hallucination = _record
+
+
+def seed_project(path: Path, files: int = 200) -> None:
+    """Create Dart project tree used by the tool executor cases."""
+    for i in range(files):
+        file_path = path / "lib" / f"module_{i % 10}" / f"widget_{i}.dart"
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        body = "\n".join(
+            f"  // line {line}: build helper for Widget{i}" for line in range(50)
+        )
+        file_path.write_text(
+            f"import 'package:flutter/material.dart';\n\n"
+            f"class Widget{i} extends StatelessWidget {{\n{body}\n}}\n",
+            encoding='utf-8'
+        )
+    (path / "pubspec.yaml").write_text("name: selfbench\n", encoding='utf-8')
+
+
+async def bench_websocket(workdir: Path, iterations: int) -> List[BenchmarkResult]:
+    """execute_task message loop against the in-process mock Gateway."""
+    tokens, tool_calls = 500, 5
+    steps: List[Dict[str, Any]] = [
+        {"agent_switched": {"from_agent": "orchestrator", "to_agent": "coder", "reason": "bench"}}
+    ]
+    for i in range(tool_calls):
+        steps.append({"assistant_message": " ".join(["token"] * (tokens // (tool_calls + 1)))})
+        steps.append({"tool_call": {
+            "tool_name": "read_file",
+            "arguments": {"path": f"lib/module_{i}/widget_{i}.dart"},
+        }})
+    steps.append({"assistant_message": " ".join(["token"] * (tokens // (tool_calls + 1)))})
+    
+    scenario = {"name": "selfbench", "match": "__selfbench__", "steps": steps}
+    task = {
+        "id": "selfbench_001",
+        "title": "Self benchmark",
+        "description": "__selfbench__ message handling",
+        "category": "simple",
+    }
+    executor = MockToolExecutor(workdir)
+    collector = NullCollector()
+    
+    async with MockGateway(scenarios=[scenario]) as gateway:
+        gateway_config = gateway.gateway_config({})
+        http_client = create_http_client()
+        client = GatewayClient(
+            base_url=gateway.base_url,
+            ws_url=gateway.ws_url,
+            auth_manager=AuthManager(gateway_config, http_client=http_client),
+            http_client=http_client
+        )
+        
+        async def run_task() -> None:
+            success = await client.execute_task(task, executor, None, collector, uuid.uuid4())
+            if not success:
+                raise RuntimeError("execute_task failed against mock Gateway")
+        
+        try:
+            messages_before = gateway.stats["messages_sent"]
+            bytes_before = gateway.stats["bytes_sent"]
+            result = await measure(
+                f"ws.execute_task[tokens={tokens},tools={tool_calls}]",
+                run_task,
+                iterations,
+                warmup=0
+            )
+            
+            # Task startup: session creation + WebSocket connect, direct vs prepared
+            opened: List[Any] = []
+            
+            async def open_direct() -> None:
+                opened.append(await client.open_session())
+            
+            async def acquire_prepared() -> None:
+                opened.append(await client.acquire_session())
+            
+            async def task_work() -> None:
+                await asyncio.sleep(0.005)
+            
+            startup = [await measure("ws.task_startup[direct]", open_direct, iterations)]
+            client.start_session_pool(iterations + 1, ahead=1)
+            startup.append(await measure(
+                "ws.task_startup[pooled]", acquire_prepared, iterations, setup=task_work
+            ))
+            for session in opened:
+                await session.close()
+        finally:
+            await client.close()
+            await http_client.aclose()
+    
+    total_seconds = sum(result.samples)
+    frames = client.get_frame_stats()
+    result.extra = {
+        "codec": frames["codec"],
+        "messages_per_second": round(
+            (gateway.stats["messages_sent"] - messages_before) / total_seconds, 1
+        ),
+        "bytes_per_second": round((gateway.stats["bytes_sent"] - bytes_before) / total_seconds, 1),
+        "client_frames_per_second": round(
+            (frames["frames_sent"] + frames["frames_received"]) / total_seconds, 1
+        ),
+        "client_bytes_encoded_per_second": round(frames["bytes_sent"] / total_seconds, 1),
+    }
+    return [result, *startup]
+
+
+async def bench_codec(iterations: int, batch: int = 1000) -> List[BenchmarkResult]:
+    """Frame encode/decode for every installed JSON codec."""
+    content = "\n".join(f"  final label{i} = Text('Строка {i}');" for i in range(2000))
+    tool_result = {
+        "type": "tool_result",
+        "call_id": "call_selfbench",
+        "result": {"success": True, "content": content, "path": "lib/main.dart"},
+    }
+    token_frame = StdlibJsonCodec().encode(
+        {"type": "assistant_message", "token": "token ", "is_final": False}
+    ).encode('utf-8')
+    
+    results = []
+    for name in available_codecs():
+        codec = get_codec(name)
+        encoded_size = len(codec.encode(tool_result))
+        
+        async def encode(codec: JsonCodec = codec) -> None:
+            for _ in range(batch // 100):
+                codec.encode(tool_result)
+        
+        async def decode(codec: JsonCodec = codec) -> None:
+            for _ in range(batch):
+                codec.decode(token_frame)
+        
+        encode_result = await measure(
+            f"codec.encode_tool_result[{name},chars={len(content)}]", encode, iterations
+        )
+        p50 = encode_result.to_dict()["p50_ms"] / 1000
+        encode_result.extra = {
+            "frames_per_second": round(batch // 100 / p50, 1) if p50 else 0.0,
+            "bytes_per_second": round(batch // 100 * encoded_size / p50, 1) if p50 else 0.0,
+        }
+        
+        decode_result = await measure(
+            f"codec.decode_frame[{name},batch={batch}]", decode, iterations
+        )
+        p50 = decode_result.to_dict()["p50_ms"] / 1000
+        decode_result.extra = {
+            "frames_per_second": round(batch / p50, 1) if p50 else 0.0,
+            "bytes_per_second": round(batch * len(token_frame) / p50, 1) if p50 else 0.0,
+        }
+        results += [encode_result, decode_result]
+    
+    return results
+
+
+async def bench_stream(iterations: int, tokens: int = 100000) -> List[BenchmarkResult]:
+    """StreamAccumulator on a long streamed response."""
+    async def accumulate() -> None:
+        response = StreamAccumulator()
+        response.start()
+        for _ in range(tokens):
+            response.add("token ")
+            response.progress_due()
+        response.text()
+    
+    result = await measure(f"ws.stream_accumulate[tokens={tokens}]", accumulate, iterations)
+    p50 = result.to_dict()["p50_ms"]
+    result.extra = {"tokens_per_second": round(tokens / (p50 / 1000), 1) if p50 else 0.0}
+    return [result]
+
+
+async def bench_executor(workdir: Path, iterations: int) -> List[BenchmarkResult]:
+    """MockToolExecutor.execute_tool for each tool type."""
+    executor = MockToolExecutor(workdir)
+    content = "\n".join(f"// generated line {i}" for i in range(200))
+    
+    cases = {
+        "write_file": {"path": "lib/generated/output.dart", "content": content},
+        "read_file": {"path": "lib/module_1/widget_1.dart"},
+        "list_files": {"path": ".", "recursive": True},
+        "search_in_code": {"query": "class Widget42 ", "path": "lib"},
+        "create_directory": {"path": "lib/generated/nested"},
+        "apply_diff": {
+            "path": "lib/generated/output.dart",
+            "diff": "--- a/lib/generated/output.dart\n+++ b/lib/generated/output.dart\n"
+                    "@@ -1,1 +1,1 @@\n-// generated line 0\n+// generated line 0\n",
+        },
+    }
+    if shutil.which("dart"):
+        cases["execute_command"] = {"command": "dart --version"}
+    
+    results = []
+    for tool_name, arguments in cases.items():
+        async def run_tool(
+            tool_name: str = tool_name,
+            arguments: Dict[str, Any] = arguments
+        ) -> None:
+            result = await executor.execute_tool(tool_name, arguments)
+            if not result.get("success"):
+                raise RuntimeError(f"{tool_name} failed: {result.get('error')}")
+        
+        count = iterations if tool_name != "execute_command" else max(iterations // 20, 3)
+        results.append(await measure(f"executor.{tool_name}", run_tool, count))
+    
+    return results
+
+
+async def bench_collector(iterations: int, batch_size: int = 500) -> List[BenchmarkResult]:
+    """MetricsCollector insert throughput, direct and buffered."""
+    results = []
+    
+    for buffered in (False, True):
+        async for db in get_db():
+            collector = MetricsCollector(db, buffered=buffered, flush_size=100)
+            experiment_id = await collector.start_experiment("multi-agent")
+            task_execution_id = await collector.start_task(
+                experiment_id, "selfbench_001", "simple", "coding", "multi-agent"
+            )
+            
+            async def insert_batch(
+                collector: MetricsCollector = collector,
+                task_execution_id: uuid.UUID = task_execution_id
+            ) -> None:
+                for _ in range(batch_size):
+                    await collector.record_tool_call(task_execution_id, "read_file", True, 0.01)
+                await collector.flush()
+            
+            mode = "buffered" if buffered else "direct"
+            result = await measure(
+                f"collector.record_tool_call[{mode},batch={batch_size}]",
+                insert_batch,
+                iterations
+            )
+            p50 = result.to_dict()["p50_ms"]
+            result.extra = {"rows_per_second": round(batch_size / (p50 / 1000), 1) if p50 else 0.0}
+            results.append(result)
+    
+    return results
+
+
+async def seed_experiment(task_count: int) -> str:
+    """Insert experiment with task_count finished tasks and their metric rows."""
+    experiment_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
+    
+    async for db in get_db():
+        db.add(Experiment(id=experiment_id, mode="multi-agent", started_at=now, completed_at=now))
+        await db.flush()
+        
+        chunk = 10000
+        for offset in range(0, task_count, chunk):
+            tasks, llm_calls, tool_calls = [], [], []
+            for i in range(offset, min(offset + chunk, task_count)):
+                task_execution_id = str(uuid.uuid4())
+                tasks.append({
+                    "id": task_execution_id,
+                    "experiment_id": experiment_id,
+                    "task_id": f"task_{i:06d}",
+                    "task_category": CATEGORIES[i % len(CATEGORIES)],
+                    "task_type": TYPES[i % len(TYPES)],
+                    "mode": "multi-agent",
+                    "started_at": now,
+                    "completed_at": now,
+                    "success": i % 3 != 0,
+                    "metrics": {"duration_seconds": 1.0 + i % 7},
+                })
+                llm_calls.append({
+                    "id": str(uuid.uuid4()),
+                    "task_execution_id": task_execution_id,
+                    "agent_type": "coder",
+                    "input_tokens": 500,
+                    "output_tokens": 200,
+                    "model": "mock-model",
+                    "duration_seconds": 1.5,
+                    "started_at": now,
+                    "completed_at": now,
+                })
+                for tool_name in ("read_file", "write_file"):
+                    tool_calls.append({
+                        "id": str(uuid.uuid4()),
+                        "task_execution_id": task_execution_id,
+                        "tool_name": tool_name,
+                        "success": True,
+                        "duration_seconds": 0.01,
+                        "started_at": now,
+                    "completed_at": now,
+                    })
+            await db.execute(insert(TaskExecution), tasks)
+            await db.execute(insert(LLMCall), llm_calls)
+            await db.execute(insert(ToolCall), tool_calls)
+        
+        await db.commit()
+        await rebuild_rollups(db, uuid.UUID(experiment_id))
+    
+    return experiment_id
+
+
+async def bench_reporter(sizes: List[int], iterations: int) -> List[BenchmarkResult]:
+    """ReportGenerator.generate_report for experiments of different sizes."""
+    results = []
+    
+    for size in sizes:
+        start_time = time.perf_counter()
+        experiment_id = await seed_experiment(size)
+        elapsed = time.perf_counter() - start_time
+        logger.info(f"Seeded experiment with {size} tasks ({elapsed:.1f}s)")
+        
+        async for db in get_db():
+            generator = ReportGenerator(db)
+            
+            async def generate(
+                generator: ReportGenerator = generator,
+                experiment_id: str = experiment_id
+            ) -> None:
+                await generator.generate_report(experiment_id=uuid.UUID(experiment_id))
+            
+            count = iterations if size < 100000 else max(iterations // 4, 3)
+            results.append(
+                await measure(f"reporter.generate_report[tasks={size}]", generate, count)
+            )
+    
+    return results
+
+
+def write_tasks_file(path: Path, task_count: int) -> None:
+    """Write tasks YAML with task_count tasks shaped like tasks.yaml."""
+    tasks = [
+        {
+            "id": f"task_{i:05d}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "type": TYPES[i % len(TYPES)],
+            "title": f"Task {i}",
+            "description": f"Создать файл lib/widgets/widget_{i}.dart с виджетом Widget{i}",
+            "expected_agent": "Coder",
+            "expected_files": [f"lib/widgets/widget_{i}.dart"],
+            "success_criteria": ["Файл создан", "Код компилируется"],
+            "auto_check": [
+                {"type": "file_exists", "params": {"path": f"lib/widgets/widget_{i}.dart"}},
+                {"type": "syntax_valid", "params": {"path": f"lib/widgets/widget_{i}.dart"}},
+            ],
+            "complexity_score": i % 5 + 1,
+        }
+        for i in range(1, task_count + 1)
+    ]
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump({"tasks": tasks}, f, allow_unicode=True, sort_keys=False)
+
+
+async def bench_tasks(workdir: Path, sizes: List[int], iterations: int) -> List[BenchmarkResult]:
+    """BenchmarkRunner.load_tasks and filter_tasks on large task files."""
+    runner = BenchmarkRunner({
+        "gateway": {
+            "base_url": "http://127.0.0.1",
+            "ws_url": "ws://127.0.0.1/ws",
+            "auth_type": "internal",
+            "api_key": "selfbench",
+            "timeout": 60,
+            "reconnect_attempts": 0,
+            "reconnect_delay": 0,
+        },
+        "benchmark": {"test_project": str(workdir), "enable_validation": False},
+    })
+    results = []
+    
+    try:
+        for size in sizes:
+            tasks_file = workdir / f"tasks_{size}.yaml"
+            write_tasks_file(tasks_file, size)
+            
+            async def load(tasks_file: Path = tasks_file) -> None:
+                runner.load_tasks(tasks_file)
+            
+            count = iterations if size < 10000 else max(iterations // 4, 3)
+            results.append(await measure(f"tasks.load_tasks[tasks={size}]", load, count))
+            
+            loaded = list(runner.tasks)
+            filters = {
+                "task_range": f"{size // 4}-{size // 2}",
+                "task_ids": ",".join(f"task_{i:05d}" for i in range(1, size + 1, 10)),
+                "category": "complex",
+            }
+            for name, value in filters.items():
+                args = argparse.Namespace(
+                    task_id=None, task_ids=None, task_range=None,
+                    category=None, type=None, limit=None
+                )
+                setattr(args, name, value)
+                
+                async def reset(loaded: List[Dict[str, Any]] = loaded) -> None:
+                    runner.tasks = list(loaded)
+                
+                async def filter_tasks(args: argparse.Namespace = args) -> None:
+                    runner.filter_tasks(args)
+                
+                results.append(await measure(
+                    f"tasks.filter_tasks[{name},tasks={size}]",
+                    filter_tasks,
+                    iterations,
+                    setup=reset
+                ))
+    finally:
+        await runner.close()
+    
+    return results
+
+
+async def run_suite(args: argparse.Namespace, settings: Dict[str, Any]) -> List[BenchmarkResult]:
+    """Run selected benchmark groups."""
+    iterations = settings.get('iterations', 50)
+    report_sizes = settings.get('report_sizes', [10, 1000, 100000])
+    task_file_sizes = settings.get('task_file_sizes', [1000, 10000])
+    if args.quick:
+        iterations = max(iterations // 5, 5)
+        report_sizes = [size for size in report_sizes if size <= 1000]
+        task_file_sizes = [size for size in task_file_sizes if size <= 1000]
+    
+    workdir = Path(tempfile.mkdtemp(prefix="selfbench_"))
+    results: List[BenchmarkResult] = []
+    
+    def selected(group: str) -> bool:
+        return not args.only or any(group.startswith(prefix) for prefix in args.only)
+    
+    try:
+        project = workdir / "project"
+        seed_project(project)
+        
+        init_database(f"sqlite:///{workdir / 'metrics.db'}")
+        await init_db()
+        
+        if selected("ws"):
+            results += await bench_websocket(project, max(iterations // 5, 5))
+            results += await bench_stream(max(iterations // 5, 5))
+        if selected("codec"):
+            results += await bench_codec(iterations)
+        if selected("executor"):
+            results += await bench_executor(project, iterations)
+        if selected("collector"):
+            results += await bench_collector(max(iterations // 5, 5))
+        if selected("reporter"):
+            results += await bench_reporter(report_sizes, max(iterations // 5, 5))
+        if selected("tasks"):
+            results += await bench_tasks(workdir, task_file_sizes, max(iterations // 5, 5))
+    finally:
+        await close_db()
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    return results
+
+
+async def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(
+        description="Self Benchmark - замеры производительности harness"
+    )
+    parser.add_argument(
+        "--config",
+        type=Path,
+        default=Path("config.yaml"),
+        help="Path to config file (default: config.yaml)"
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        help="Baseline JSON file (overrides self_benchmark.baseline_file)"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store results as the new baseline instead of comparing"
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=["ws", "codec", "executor", "collector", "reporter", "tasks"],
+        help="Run only selected benchmark groups"
+    )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="Fewer iterations, skip the largest reporter and task file sizes"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="Also write results (and comparison) to a JSON file"
+    )
+    
+    args = parser.parse_args()
+    
+    settings: Dict[str, Any] = {}
+    if args.config.exists():
+        with open(args.config, 'r', encoding='utf-8') as f:
+            settings = (yaml.safe_load(f) or {}).get('self_benchmark', {})
+    
+    baseline_file = args.baseline or Path(
+        settings.get('baseline_file', 'baselines/self_benchmark.json')
+    )
+    thresholds = {**DEFAULT_THRESHOLDS, **settings.get('thresholds', {})}
+    min_delta_ms = settings.get('min_delta_ms', DEFAULT_MIN_DELTA_MS)
+    
+    # Keep per-operation logging of the measured components out of the timings
+    logging.getLogger("benchmark").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("websockets").setLevel(logging.WARNING)
+    
+    results = await run_suite(args, settings)
+    
+    comparisons: Optional[List[Dict[str, Any]]] = None
+    baseline = None if args.save_baseline else load_baseline(baseline_file)
+    if baseline:
+        comparisons = compare_to_baseline(results, baseline, thresholds, min_delta_ms)
+    
+    print("\n" + format_comparison(results, comparisons))
+    
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                "results": {result.name: result.to_dict() for result in results},
+                "comparisons": comparisons,
+            }, f, indent=2, ensure_ascii=False)
+        logger.info(f"✓ Results saved: {args.output}")
+    
+    if args.save_baseline:
+        save_baseline(baseline_file, results)
+        return
+    
+    if baseline is None:
+        logger.warning(
+            f"No baseline found at {baseline_file}, run with --save-baseline to create one"
+        )
+        return
+    
+    regressions = [c for c in comparisons or [] if c["status"] == "regression"]
+    if regressions:
+        logger.error(
+            f"✗ {len(regressions)} regression(s) beyond thresholds "
+            f"p50={thresholds['p50']:.0%}, p95={thresholds['p95']:.0%}: "
+            f"{', '.join(c['name'] for c in regressions)}"
+        )
+        sys.exit(1)
+    
+    logger.info("✓ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,23 +3,40 @@ Benchmark Standalone - независимое приложение для тес
 
 Общается с backend через Gateway WebSocket API.
 """
+from .analysis import FAKE_ANALYZER_COMMAND, AnalysisServers, DartAnalysisServer
 from .auth import AuthManager
 from .client import GatewayClient
+from .code_index import CodeIndex
+from .codec import JsonCodec, get_codec
 from .collector import MetricsCollector
 from .database import close_db, get_db, init_database, init_db
 from .executor import MockToolExecutor
+from .http_client import create_http_client
+from .metrics_journal import MetricsJournal
+from .metrics_writer import MetricsWriter
+from .mock_gateway import MockGateway, load_scenarios
 from .models import (
     AgentSwitch,
     Base,
     Experiment,
+    ExperimentRollup,
     Hallucination,
     LLMCall,
     QualityEvaluation,
     TaskExecution,
+    TaskRollup,
     ToolCall,
 )
+from .process import CommandResult, CommandRunner
 from .reporter import ReportGenerator
+from .rollup import rebuild_rollups
+from .scheduler import TaskScheduler
+from .stream import StreamAccumulator
+from .timeouts import TaskTimeout, TimeoutPolicy
+from .tree_snapshot import TreeSnapshot
+from .validation_cache import ValidationCache
 from .validator import TaskValidator
+from .workspace import Workspace, WorkspaceManager
 
 __version__ = "1.0.0"
 
@@ -27,13 +44,35 @@ __all__ = [
     "AuthManager",
     "GatewayClient",
     "MetricsCollector",
+    "MetricsWriter",
+    "MetricsJournal",
+    "MockGateway",
+    "load_scenarios",
     "MockToolExecutor",
+    "CodeIndex",
+    "TreeSnapshot",
+    "CommandRunner",
+    "CommandResult",
     "TaskValidator",
+    "ValidationCache",
+    "AnalysisServers",
+    "DartAnalysisServer",
+    "FAKE_ANALYZER_COMMAND",
     "ReportGenerator",
+    "TaskScheduler",
+    "StreamAccumulator",
+    "TaskTimeout",
+    "TimeoutPolicy",
+    "Workspace",
+    "WorkspaceManager",
     "init_database",
     "init_db",
     "get_db",
     "close_db",
+    "rebuild_rollups",
+    "create_http_client",
+    "JsonCodec",
+    "get_codec",
     "Base",
     "Experiment",
     "TaskExecution",
@@ -42,4 +81,6 @@ __all__ = [
     "AgentSwitch",
     "QualityEvaluation",
     "Hallucination",
+    "ExperimentRollup",
+    "TaskRollup",
 ]
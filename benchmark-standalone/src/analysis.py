@@ -0,0 +1,357 @@
+"""
+Analysis Server - постоянный Dart analysis server для проверок синтаксиса.
+
+Вместо запуска `dart analyze <file>` на каждую проверку (старт анализатора
+и разрешение пакетов каждый раз) для каждого workspace держится запущенный
+`dart language-server --protocol=analyzer`. Общение идет по stdio: один JSON
+на строку, запросы с id, ответы с тем же id и уведомления (event).
+После первого анализа запрос ошибок файла занимает миллисекунды.
+
+Для тестов без Dart SDK можно запустить src/fake_analyzer.py
+(FAKE_ANALYZER_COMMAND), который говорит на том же протоколе.
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger("benchmark.analysis")
+
+DART_ANALYSIS_SERVER_COMMAND = ["dart", "language-server", "--protocol=analyzer"]
+FAKE_ANALYZER_COMMAND = [sys.executable, str(Path(__file__).with_name("fake_analyzer.py"))]
+
+# Responses with many diagnostics are single long lines
+STDOUT_LIMIT = 16 * 1024 * 1024
+
+
+class AnalysisServerError(Exception):
+    """Analysis server could not start or failed a request."""
+
+
+class DartAnalysisServer:
+    """
+    Client of one analysis server process rooted at a project.
+    
+    Usage:
+        server = DartAnalysisServer(project_path)
+        await server.start()
+        errors = await server.get_errors(project_path / "lib/main.dart")
+        await server.close()
+    """
+    
+    def __init__(
+        self,
+        root: Path,
+        command: Optional[Sequence[str]] = None,
+        startup_timeout: float = 60.0,
+        request_timeout: float = 120.0
+    ):
+        """
+        Initialize analysis server client.
+        
+        Args:
+            root: Project directory used as analysis root
+            command: Server command (default: dart language-server --protocol=analyzer)
+            startup_timeout: Seconds to wait for server.connected
+            request_timeout: Seconds to wait for a response (first one includes warm-up)
+        """
+        self.root = root.resolve()
+        self.command = list(command or DART_ANALYSIS_SERVER_COMMAND)
+        self.startup_timeout = startup_timeout
+        self.request_timeout = request_timeout
+        self.version: Optional[str] = None
+        
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._stderr_reader: Optional[asyncio.Task] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._connected: Optional[asyncio.Future] = None
+        self._next_id = 0
+        self.requests = 0
+    
+    @property
+    def running(self) -> bool:
+        """Whether the server process is alive."""
+        return self._process is not None and self._process.returncode is None
+    
+    async def start(self) -> None:
+        """
+        Start server process and set the analysis root.
+        
+        Raises:
+            AnalysisServerError: If the server cannot be started
+        """
+        loop = asyncio.get_running_loop()
+        self._connected = loop.create_future()
+        
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                *self.command,
+                cwd=str(self.root),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=STDOUT_LIMIT,
+                start_new_session=(os.name == "posix")
+            )
+        except OSError as e:
+            raise AnalysisServerError(f"Cannot start analysis server {self.command[0]}: {e}") from e
+        
+        self._reader = asyncio.create_task(self._read_loop())
+        self._stderr_reader = asyncio.create_task(self._drain_stderr())
+        
+        try:
+            await asyncio.wait_for(asyncio.shield(self._connected), timeout=self.startup_timeout)
+            self.version = (await self._request("server.getVersion")).get("version")
+            await self._request("analysis.setAnalysisRoots", {
+                "included": [str(self.root)],
+                "excluded": []
+            })
+        except (asyncio.TimeoutError, AnalysisServerError) as e:
+            await self.close()
+            raise AnalysisServerError(f"Analysis server did not start: {e!r}") from e
+        
+        logger.info(f"🔬 Analysis server started for {self.root} (version {self.version})")
+    
+    async def get_errors(self, path: Path) -> List[Dict[str, Any]]:
+        """
+        Diagnostics of a file as it is on disk now.
+        
+        The current file content is sent as an overlay, so the answer does
+        not depend on when the server's file watcher notices the change. The
+        overlay is removed afterwards: servers outlive tasks in a recycled
+        workspace, and a left-over overlay would shadow later changes and
+        deletions of the file on disk.
+        
+        Args:
+            path: File inside the analysis root
+        
+        Returns:
+            AnalysisError objects (severity, type, location, message, code)
+        
+        Raises:
+            AnalysisServerError: If the request fails
+        """
+        file_path = str(path.resolve())
+        content = await asyncio.to_thread(path.read_text, encoding='utf-8')
+        
+        await self._request("analysis.updateContent", {
+            "files": {file_path: {"type": "add", "content": content}}
+        })
+        try:
+            result = await self._request("analysis.getErrors", {"file": file_path})
+        finally:
+            if self.running:
+                await self._request("analysis.updateContent", {
+                    "files": {file_path: {"type": "remove"}}
+                })
+        return result.get("errors", [])
+    
+    async def close(self) -> None:
+        """Shut down server process."""
+        process = self._process
+        if process is None:
+            return
+        
+        if process.returncode is None:
+            try:
+                await self._request("server.shutdown", timeout=5.0)
+            except AnalysisServerError:
+                pass
+            
+            try:
+                await asyncio.wait_for(process.wait(), timeout=5.0)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        
+        self._process = None
+        for task in (self._reader, self._stderr_reader):
+            if task:
+                task.cancel()
+        self._fail_pending(AnalysisServerError("Analysis server closed"))
+        logger.debug(f"Analysis server for {self.root} closed after {self.requests} requests")
+    
+    async def _request(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Send request and wait for its result."""
+        if not self.running:
+            raise AnalysisServerError("Analysis server is not running")
+        
+        self._next_id += 1
+        request_id = str(self._next_id)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        
+        message = {"id": request_id, "method": method}
+        if params is not None:
+            message["params"] = params
+        
+        try:
+            self._process.stdin.write(json.dumps(message).encode("utf-8") + b"\n")
+            await self._process.stdin.drain()
+            self.requests += 1
+            return await asyncio.wait_for(future, timeout=timeout or self.request_timeout)
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            raise AnalysisServerError(f"{method} failed: {e!r}") from e
+        finally:
+            self._pending.pop(request_id, None)
+    
+    async def _read_loop(self) -> None:
+        """Dispatch responses and events until the server exits."""
+        try:
+            while True:
+                line = await self._process.stdout.readline()
+                if not line:
+                    break
+                
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.debug(f"Analysis server: {line[:200]!r}")
+                    continue
+                
+                if "id" in message:
+                    future = self._pending.get(message["id"])
+                    if future is None or future.done():
+                        continue
+                    if "error" in message:
+                        error = message["error"]
+                        future.set_exception(AnalysisServerError(
+                            f"{error.get('code')}: {error.get('message')}"
+                        ))
+                    else:
+                        future.set_result(message.get("result") or {})
+                elif message.get("event") == "server.connected":
+                    if not self._connected.done():
+                        self._connected.set_result(message.get("params", {}))
+                elif message.get("event") == "server.error":
+                    params = message.get('params', {})
+                    logger.warning(f"Analysis server error: {params.get('message')}")
+        finally:
+            error = AnalysisServerError("Analysis server exited")
+            if not self._connected.done():
+                self._connected.set_exception(error)
+            self._fail_pending(error)
+    
+    async def _drain_stderr(self) -> None:
+        """Log server stderr (also keeps the pipe from filling up)."""
+        while True:
+            line = await self._process.stderr.readline()
+            if not line:
+                return
+            text = line.decode('utf-8', errors='replace').rstrip()
+            logger.debug(f"Analysis server stderr: {text}")
+    
+    def _fail_pending(self, error: Exception) -> None:
+        """Fail all requests waiting for a response."""
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+    
+    def __repr__(self) -> str:
+        return f"<DartAnalysisServer(root='{self.root}', running={self.running})>"
+
+
+class AnalysisServers:
+    """
+    Warm analysis servers, one per workspace, started on first use.
+    
+    Workspaces are recycled between tasks, so a server started for a
+    workspace keeps answering for the following tasks in it. At most
+    `max_servers` run at once; the least recently used one is closed first.
+    If the server cannot be started (e.g. no Dart SDK), get() returns None
+    from then on and callers fall back to `dart analyze`.
+    
+    Usage:
+        servers = AnalysisServers(max_servers=4)
+        server = await servers.get(workspace.path)
+        if server:
+            errors = await server.get_errors(file_path)
+        await servers.close()
+    """
+    
+    def __init__(
+        self,
+        command: Optional[Sequence[str]] = None,
+        max_servers: int = 4,
+        startup_timeout: float = 60.0,
+        request_timeout: float = 120.0
+    ):
+        """
+        Initialize server registry.
+        
+        Args:
+            command: Server command (default: dart language-server --protocol=analyzer)
+            max_servers: Maximum number of running servers
+            startup_timeout: Seconds to wait for a server to start
+            request_timeout: Seconds to wait for a response
+        """
+        self.command = list(command or DART_ANALYSIS_SERVER_COMMAND)
+        self.max_servers = max_servers
+        self.startup_timeout = startup_timeout
+        self.request_timeout = request_timeout
+        self.available = True
+        
+        self._servers: "OrderedDict[Path, DartAnalysisServer]" = OrderedDict()
+        self._lock = asyncio.Lock()
+    
+    @property
+    def backend(self) -> str:
+        """Server command without directories, e.g. 'dart language-server --protocol=analyzer'."""
+        return " ".join(Path(part).name for part in self.command)
+    
+    async def get(self, root: Path) -> Optional[DartAnalysisServer]:
+        """
+        Running server for a project, started if needed.
+        
+        Args:
+            root: Project directory
+        
+        Returns:
+            Server or None if analysis servers are unavailable
+        """
+        if not self.available:
+            return None
+        
+        root = root.resolve()
+        async with self._lock:
+            server = self._servers.get(root)
+            if server is not None and server.running:
+                self._servers.move_to_end(root)
+                return server
+            
+            while len(self._servers) >= self.max_servers:
+                _, evicted = self._servers.popitem(last=False)
+                await evicted.close()
+            
+            server = DartAnalysisServer(
+                root,
+                command=self.command,
+                startup_timeout=self.startup_timeout,
+                request_timeout=self.request_timeout
+            )
+            try:
+                await server.start()
+            except AnalysisServerError as e:
+                logger.warning(f"⚠️ Analysis server unavailable, using dart analyze: {e}")
+                self.available = False
+                return None
+            
+            self._servers[root] = server
+            return server
+    
+    async def close(self) -> None:
+        """Shut down all servers."""
+        servers = list(self._servers.values())
+        self._servers.clear()
+        await asyncio.gather(*(server.close() for server in servers))
@@ -21,14 +21,17 @@ class AuthManager:
     2. JWT Token (Authorization: Bearer header)
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], http_client: Optional[httpx.AsyncClient] = None):
         """
         Initialize auth manager.
         
         Args:
             config: Gateway configuration from config.yaml
+            http_client: Optional shared HTTP client (connection pool)
         """
         self.config = config
+        self._http_client = http_client
+        self._owns_http_client = http_client is None
         self.auth_type = config.get('auth_type', 'internal')
         self.api_key = config.get('api_key')
         self.jwt_config = config.get('jwt', {})
@@ -39,6 +42,19 @@ class AuthManager:
         
         logger.info(f"AuthManager initialized: auth_type={self.auth_type}")
     
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """HTTP client used for OAuth requests, created lazily if not shared."""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient()
+        return self._http_client
+    
+    async def close(self) -> None:
+        """Close HTTP client if it is owned by this manager."""
+        if self._owns_http_client and self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+    
     async def get_headers(self) -> Dict[str, str]:
         """
         Get authentication headers for HTTP requests.
@@ -85,25 +101,24 @@ class AuthManager:
         if client_secret:
             data["client_secret"] = client_secret
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                auth_url,
-                data=data,
-                headers={"Content-Type": "application/x-www-form-urlencoded"}
-            )
-            response.raise_for_status()
-            
-            token_data = response.json()
-            self.access_token = token_data['access_token']
-            self.refresh_token = token_data.get('refresh_token')
-            
-            logger.info(f"✅ JWT token obtained successfully")
-            logger.debug(f"Token type: {token_data.get('token_type')}")
-            logger.debug(f"Expires in: {token_data.get('expires_in')}s")
-            if self.refresh_token:
-                logger.debug(f"Refresh token available")
-            
-            return self.access_token
+        response = await self.http_client.post(
+            auth_url,
+            data=data,
+            headers={"Content-Type": "application/x-www-form-urlencoded"}
+        )
+        response.raise_for_status()
+        
+        token_data = response.json()
+        self.access_token = token_data['access_token']
+        self.refresh_token = token_data.get('refresh_token')
+        
+        logger.info(f"✅ JWT token obtained successfully")
+        logger.debug(f"Token type: {token_data.get('token_type')}")
+        logger.debug(f"Expires in: {token_data.get('expires_in')}s")
+        if self.refresh_token:
+            logger.debug(f"Refresh token available")
+        
+        return self.access_token
     
     async def refresh_access_token(self) -> str:
         """
@@ -163,25 +178,24 @@ class AuthManager:
                     data["client_secret"] = client_secret
                 
                 try:
-                    async with httpx.AsyncClient() as client:
-                        response = await client.post(
-                            auth_url,
-                            data=data,
-                            headers={"Content-Type": "application/x-www-form-urlencoded"}
-                        )
-                        response.raise_for_status()
-                        
-                        token_data = response.json()
-                        self.access_token = token_data['access_token']
-                        # Update refresh_token if a new one is provided
-                        if 'refresh_token' in token_data:
-                            self.refresh_token = token_data['refresh_token']
-                        
-                        logger.info(f"✅ Access token refreshed successfully")
-                        logger.debug(f"Expires in: {token_data.get('expires_in')}s")
-                        
-                        return self.access_token
-                        
+                    response = await self.http_client.post(
+                        auth_url,
+                        data=data,
+                        headers={"Content-Type": "application/x-www-form-urlencoded"}
+                    )
+                    response.raise_for_status()
+                    
+                    token_data = response.json()
+                    self.access_token = token_data['access_token']
+                    # Update refresh_token if a new one is provided
+                    if 'refresh_token' in token_data:
+                        self.refresh_token = token_data['refresh_token']
+                    
+                    logger.info(f"✅ Access token refreshed successfully")
+                    logger.debug(f"Expires in: {token_data.get('expires_in')}s")
+                    
+                    return self.access_token
+                    
                 except httpx.HTTPStatusError as e:
                     logger.warning(f"Failed to refresh token (status {e.response.status_code}), re-authenticating...")
                     # If refresh fails, try full re-authentication
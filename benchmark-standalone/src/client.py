@@ -6,22 +6,34 @@ Gateway WebSocket Client - общение с Gateway через WebSocket.
 затем подключается к WebSocket /ws/{session_id}
 """
 import asyncio
-import json
 import logging
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar, Union
 from uuid import UUID
 
 import httpx
 import websockets
 
 from .auth import AuthManager
+from .codec import JsonCodec, get_codec
 from .collector import MetricsCollector
 from .executor import MockToolExecutor
+from .http_client import create_http_client
+from .metrics_writer import MetricsWriter
+from .session_pool import GatewaySession, SessionPool
+from .stream import StreamAccumulator
+from .timeouts import TaskTimeout
 from .validator import TaskValidator
 
 logger = logging.getLogger("benchmark.client")
 
+T = TypeVar("T")
+
+MAX_RECONNECT_DELAY = 60.0
+
+# Dropped connections resumed within one task before giving up
+MAX_RESUMES_PER_TASK = 10
+
 
 class GatewayClient:
     """
@@ -38,7 +50,9 @@ class GatewayClient:
         auth_manager: AuthManager,
         timeout: int = 60,
         reconnect_attempts: int = 3,
-        reconnect_delay: int = 5
+        reconnect_delay: int = 5,
+        http_client: Optional[httpx.AsyncClient] = None,
+        codec: Optional[JsonCodec] = None
     ):
         """
         Initialize Gateway client.
@@ -48,8 +62,10 @@ class GatewayClient:
             ws_url: Gateway WebSocket URL base (e.g., ws://localhost:8000/ws)
             auth_manager: Authentication manager
             timeout: Message timeout in seconds
-            reconnect_attempts: Number of reconnection attempts
-            reconnect_delay: Delay between reconnection attempts
+            reconnect_attempts: Number of retries for session creation and WebSocket connect
+            reconnect_delay: Initial delay between retries, doubled on every attempt
+            http_client: Optional shared HTTP client (default: own pooled client)
+            codec: JSON codec for WebSocket frames (default: fastest installed)
         """
         self.base_url = base_url
         self.ws_url = ws_url
@@ -57,8 +73,178 @@ class GatewayClient:
         self.timeout = timeout
         self.reconnect_attempts = reconnect_attempts
         self.reconnect_delay = reconnect_delay
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or create_http_client()
+        self.codec = codec or get_codec()
+        self._session_pool: Optional[SessionPool] = None
+        self._spare_session: Optional[GatewaySession] = None
+        
+        # WebSocket frame counters (all tasks)
+        self.frames_sent = 0
+        self.frames_received = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        
+        logger.info(f"GatewayClient initialized: {base_url} (json codec: {self.codec.name})")
+    
+    async def close(self) -> None:
+        """Close prepared sessions and the HTTP pool if it is owned by this client."""
+        await self.stop_session_pool()
+        if self._spare_session:
+            await self._spare_session.close()
+            self._spare_session = None
+        if self._owns_http_client:
+            await self.http_client.aclose()
+    
+    def start_session_pool(self, total: int, ahead: int = 2, preconnect: bool = True) -> None:
+        """
+        Prepare sessions for upcoming tasks in the background.
+        
+        Args:
+            total: Number of tasks that will acquire a session
+            ahead: Maximum number of sessions prepared in advance
+            preconnect: Also open WebSocket connections of prepared sessions
+        """
+        spare, self._spare_session = self._spare_session, None
+        self._session_pool = SessionPool(
+            self, total, ahead=ahead, preconnect=preconnect, spare=spare
+        )
+        self._session_pool.start()
+    
+    async def stop_session_pool(self) -> None:
+        """Close sessions prepared but not used."""
+        if self._session_pool:
+            await self._session_pool.close()
+            self._session_pool = None
+    
+    async def acquire_session(self) -> GatewaySession:
+        """
+        Get session with an open WebSocket for a task.
+        
+        Returns:
+            Prepared session from the pool, the session left by test_connection,
+            or a newly opened one
+        """
+        if self._session_pool:
+            return await self._session_pool.acquire()
+        
+        if self._spare_session:
+            session, self._spare_session = self._spare_session, None
+            if not session.connected:
+                session.websocket = await self.connect_websocket(session.session_id)
+            return session
+        
+        return await self.open_session()
+    
+    async def open_session(self, connect: bool = True) -> GatewaySession:
+        """
+        Create session and connect its WebSocket.
+        
+        Args:
+            connect: Open WebSocket connection right away
+        
+        Returns:
+            Gateway session
+        """
+        session_id = await self.create_session()
+        websocket = await self.connect_websocket(session_id) if connect else None
+        return GatewaySession(session_id, websocket)
+    
+    async def resume_session(self, session: GatewaySession) -> Any:
+        """
+        Reattach to a session after its WebSocket connection was lost.
+        
+        Args:
+            session: Session whose connection dropped
+        
+        Returns:
+            New WebSocket connection to the same session_id
+        """
+        await session.close()
+        session.websocket = await self.connect_websocket(session.session_id)
+        return session.websocket
+    
+    async def connect_websocket(self, session_id: str) -> Any:
+        """
+        Connect to session WebSocket, retrying with backoff.
+        
+        Args:
+            session_id: Session ID
+        
+        Returns:
+            Open WebSocket connection
+        """
+        ws_endpoint = f"{self.ws_url}/{session_id}"
+        websocket = await self._retry(
+            lambda: websockets.connect(ws_endpoint),
+            f"WebSocket connect to {ws_endpoint}"
+        )
+        logger.debug(f"🔌 Connected to {ws_endpoint}")
+        return websocket
+    
+    async def _retry(self, operation: Callable[[], Awaitable[T]], description: str) -> T:
+        """
+        Run operation, retrying transient failures `reconnect_attempts` times.
+        
+        Delay starts at `reconnect_delay` and doubles on every attempt
+        (up to MAX_RECONNECT_DELAY).
+        """
+        for attempt in range(self.reconnect_attempts + 1):
+            try:
+                return await operation()
+            except Exception as e:
+                if attempt >= self.reconnect_attempts or not self._is_retryable(e):
+                    raise
+                
+                delay = min(self.reconnect_delay * 2 ** attempt, MAX_RECONNECT_DELAY)
+                logger.warning(
+                    f"⚠️ {description} failed ({e}), retrying in {delay:.1f}s "
+                    f"({attempt + 1}/{self.reconnect_attempts})"
+                )
+                await asyncio.sleep(delay)
         
-        logger.info(f"GatewayClient initialized: {base_url}")
+        raise RuntimeError("unreachable")
+    
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Whether error is transient (network failure or server-side error)."""
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code >= 500
+        if isinstance(error, websockets.exceptions.InvalidStatus):
+            return error.response.status_code >= 500
+        return isinstance(error, (
+            httpx.TransportError,
+            websockets.exceptions.WebSocketException,
+            OSError,
+            asyncio.TimeoutError,
+        ))
+    
+    async def _send(self, websocket: Any, message: Dict[str, Any]) -> None:
+        """Encode message with the codec and send it as a text frame."""
+        data = self.codec.encode(message)
+        await websocket.send(data, text=True)
+        self.frames_sent += 1
+        self.bytes_sent += len(data)
+    
+    async def _recv(self, websocket: Any, timeout: float) -> Dict[str, Any]:
+        """Receive and decode one frame (raw bytes if the codec accepts them)."""
+        data = await asyncio.wait_for(
+            websocket.recv(decode=not self.codec.binary),
+            timeout=timeout
+        )
+        self.frames_received += 1
+        self.bytes_received += len(data)
+        return self.codec.decode(data)
+    
+    def get_frame_stats(self) -> Dict[str, Any]:
+        """WebSocket frame counters (sizes are characters for str frames)."""
+        return {
+            "codec": self.codec.name,
+            "frames_sent": self.frames_sent,
+            "frames_received": self.frames_received,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+        }
     
     async def _make_http_request(
         self,
@@ -75,10 +261,10 @@ class GatewayClient:
             url: Request URL
             retry_on_401: Whether to retry with refreshed token on 401
             **kwargs: Additional arguments for httpx request
-            
+        
         Returns:
             HTTP response
-            
+        
         Raises:
             httpx.HTTPStatusError: If request fails after retry
         """
@@ -88,25 +274,24 @@ class GatewayClient:
         else:
             kwargs['headers'] = headers
         
-        async with httpx.AsyncClient() as client:
-            response = await client.request(method, url, **kwargs)
+        response = await self.http_client.request(method, url, **kwargs)
+        
+        # Handle 401 Unauthorized
+        if response.status_code == 401 and retry_on_401:
+            logger.warning(f"⚠️ Received 401 from {url}, refreshing token and retrying...")
+            await self.auth_manager.handle_unauthorized()
             
-            # Handle 401 Unauthorized
-            if response.status_code == 401 and retry_on_401:
-                logger.warning(f"⚠️ Received 401 from {url}, refreshing token and retrying...")
-                await self.auth_manager.handle_unauthorized()
-                
-                # Retry with new token
-                headers = await self.auth_manager.get_headers()
-                if 'headers' in kwargs:
-                    kwargs['headers'].update(headers)
-                else:
-                    kwargs['headers'] = headers
-                
-                response = await client.request(method, url, **kwargs)
+            # Retry with new token
+            headers = await self.auth_manager.get_headers()
+            if 'headers' in kwargs:
+                kwargs['headers'].update(headers)
+            else:
+                kwargs['headers'] = headers
             
-            response.raise_for_status()
-            return response
+            response = await self.http_client.request(method, url, **kwargs)
+        
+        response.raise_for_status()
+        return response
     
     async def create_session(self) -> str:
         """
@@ -115,9 +300,9 @@ class GatewayClient:
         Returns:
             Session ID
         """
-        response = await self._make_http_request(
-            "POST",
-            f"{self.base_url}/api/v1/sessions"
+        response = await self._retry(
+            lambda: self._make_http_request("POST", f"{self.base_url}/api/v1/sessions"),
+            "Session creation"
         )
         data = response.json()
         session_id = data['id']
@@ -130,7 +315,7 @@ class GatewayClient:
         
         Args:
             session_id: Session ID
-            
+        
         Returns:
             Session metrics dictionary or None if not found
         """
@@ -140,7 +325,7 @@ class GatewayClient:
                 f"{self.base_url}/api/v1/events/metrics/session/{session_id}"
             )
             return response.json()
-                    
+        
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
                 logger.debug(f"No metrics found for session {session_id}")
@@ -160,8 +345,10 @@ class GatewayClient:
         task: Dict[str, Any],
         tool_executor: MockToolExecutor,
         validator: Optional[TaskValidator],
-        collector: MetricsCollector,
-        task_execution_id: UUID
+        collector: Union[MetricsCollector, MetricsWriter],
+        task_execution_id: UUID,
+        timeout: Optional[TaskTimeout] = None,
+        stats: Optional[Dict[str, Any]] = None
     ) -> bool:
         """
         Execute task via Gateway WebSocket with full tool execution loop.
@@ -170,75 +357,135 @@ class GatewayClient:
             task: Task definition from YAML
             tool_executor: Tool executor for local tool execution
             validator: Optional task validator
-            collector: Metrics collector
+            collector: Metrics collector or background metrics writer
             task_execution_id: Task execution ID for metrics
-            
+            timeout: Idle/total deadlines of this task (default: client timeout, no total limit)
+            stats: Optional dict receiving "max_idle_seconds", the longest wait for a
+                Gateway message (history for learned idle deadlines)
+        
         Returns:
             True if task succeeded
         """
         task_description = task.get('description', '')
         task_id = task.get('id', 'unknown')
         task_title = task.get('title', '')
-        task_category = task.get('category', 'simple')
         
         logger.info(f"🚀 Executing task {task_id}: {task_title}")
         logger.info(f"📋 Description: {task_description[:100]}...")
         
-        # Adjust timeout based on task complexity
-        original_timeout = self.timeout
-        if task_category in ['complex', 'mixed']:
-            self.timeout = 300  # 5 minutes for complex tasks
-            logger.info(f"⏱️  Increased timeout to {self.timeout}s for {task_category} task")
+        # Deadlines are passed per call: tasks may run concurrently
+        timeout = timeout or TaskTimeout(idle=self.timeout)
+        deadline = time.monotonic() + timeout.total if timeout.total else None
+        total_text = f"{timeout.total:.0f}s" if timeout.total else "none"
+        logger.info(f"⏱️  Timeout: idle={timeout.idle:.0f}s, total={total_text} ({timeout.source})")
         
-        # Create session first
-        session_id = await self.create_session()
+        # Prepared session (created and connected ahead of time when the pool is running)
+        session = await self.acquire_session()
+        session_id = session.session_id
         
         # Track metrics
-        response_text = ""
+        response = StreamAccumulator()
         has_error = False
         tool_calls_count = 0
         agent_switches_count = 0
-        last_write_file_time = None
         MAX_TOOL_CALLS = 100  # Prevent infinite loops
         
+        # Results by call_id: tool calls replayed after a reconnect are not executed again
+        tool_results: Dict[str, Dict[str, Any]] = {}
+        # Results sent since the last generated message: may have been lost with the connection
+        unacknowledged: List[str] = []
+        resend_results = False
+        resumes = 0
+        stats = stats if stats is not None else {}
+        stats["max_idle_seconds"] = 0.0
+        
         try:
-            # Connect to WebSocket with session_id
-            ws_endpoint = f"{self.ws_url}/{session_id}"
-            async with websockets.connect(ws_endpoint) as websocket:
-                logger.info(f"🔌 Connected to Gateway WebSocket")
-                
-                # Send initial message
-                await websocket.send(json.dumps({
-                    "type": "user_message",
-                    "content": task_description,
-                    "role": "user"
-                }))
-                
-                logger.info("📤 Sent task description to agent")
+            websocket = session.websocket
+            try:
+                logger.info(f"🔌 Connected to Gateway WebSocket (session {session_id})")
+                task_sent = False
                 
                 # Process responses
                 while True:
                     try:
-                        data = await asyncio.wait_for(
-                            websocket.recv(),
-                            timeout=self.timeout
+                        # Initial message is sent here so that a drop while sending is resumed
+                        if not task_sent:
+                            await self._send(websocket, {
+                                "type": "user_message",
+                                "content": task_description,
+                                "role": "user"
+                            })
+                            task_sent = True
+                            logger.info("📤 Sent task description to agent")
+                            response.start()
+                        
+                        # After a resume, results the Gateway may have lost are sent again
+                        # (it deduplicates tool_result by call_id)
+                        if resend_results:
+                            for call_id in unacknowledged:
+                                await self._send(websocket, {
+                                    "type": "tool_result",
+                                    "call_id": call_id,
+                                    "result": tool_results[call_id]
+                                })
+                            resend_results = False
+                            if unacknowledged:
+                                logger.info(
+                                    f"♻️ Resent {len(unacknowledged)} unacknowledged tool results"
+                                )
+                        
+                        wait = timeout.idle
+                        if deadline is not None:
+                            wait = min(wait, deadline - time.monotonic())
+                        wait_started = time.monotonic()
+                        msg = await self._recv(websocket, wait)
+                        stats["max_idle_seconds"] = max(
+                            stats["max_idle_seconds"], time.monotonic() - wait_started
                         )
-                        msg = json.loads(data)
                         msg_type = msg.get("type")
                         
+                        # Generation went on, so the Gateway has every result sent before
+                        if msg_type in ("assistant_message", "agent_switched"):
+                            unacknowledged.clear()
+                        
                         if msg_type == "assistant_message":
-                            token = msg.get("token", "")
-                            response_text += token
+                            response.add(msg.get("token", ""))
                             
                             # Show progress for long responses
-                            if len(response_text) % 100 == 0:
-                                logger.debug(f"📝 Received {len(response_text)} characters...")
+                            if response.progress_due():
+                                logger.debug(f"📝 Received {response.length} characters...")
                             
                             if msg.get("is_final"):
-                                logger.info(f"✅ Received final message ({len(response_text)} chars)")
+                                stream_stats = response.get_stats()
+                                ttft = stream_stats['time_to_first_token']
+                                gap = stream_stats['p95_gap']
+                                ttft_text = f"{ttft:.3f}s" if ttft is not None else "n/a"
+                                gap_text = f"{gap * 1000:.1f}ms" if gap is not None else "n/a"
+                                logger.info(
+                                    f"✅ Received final message ({response.length} chars, "
+                                    f"{response.token_count} tokens, "
+                                    f"ttft={ttft_text}, p95_gap={gap_text})"
+                                )
                                 break
                         
                         elif msg_type == "tool_call":
+                            response.pause()
+                            
+                            call_id = msg.get("call_id")
+                            if call_id in tool_results:
+                                logger.info(
+                                    f"♻️ Replayed tool call {msg.get('tool_name')} "
+                                    f"(call_id={call_id[:8]}...), resending stored result"
+                                )
+                                if call_id not in unacknowledged:
+                                    unacknowledged.append(call_id)
+                                await self._send(websocket, {
+                                    "type": "tool_result",
+                                    "call_id": call_id,
+                                    "result": tool_results[call_id]
+                                })
+                                continue
+                            
                             tool_calls_count += 1
                             
                             # Check tool call limit
@@ -247,7 +494,6 @@ class GatewayClient:
                                 has_error = True
                                 break
                             
-                            call_id = msg.get("call_id")
                             tool_name = msg.get("tool_name")
                             arguments = msg.get("arguments", {})
                             
@@ -278,11 +524,8 @@ class GatewayClient:
                                 tool_name, arguments
                             )
                             duration = time.time() - start_time
-                            
-                            # Track last write_file operation
-                            if tool_name in ["write_file", "write_to_file"]:
-                                last_write_file_time = time.time()
-                                logger.debug(f"Tracked write_file at {last_write_file_time}")
+                            tool_results[call_id] = tool_result
+                            unacknowledged.append(call_id)
                             
                             success_icon = "✅" if tool_result.get('success') else "❌"
                             logger.info(
@@ -290,23 +533,25 @@ class GatewayClient:
                                 f"duration={duration:.2f}s"
                             )
                             
-                            # Record tool call metric
-                            await collector.record_tool_call(
-                                task_execution_id=task_execution_id,
-                                tool_name=tool_name,
-                                success=tool_result.get('success', False),
-                                duration_seconds=duration,
-                                error=tool_result.get('error')
-                            )
-                            
                             # Send tool result back to Gateway
-                            await websocket.send(json.dumps({
-                                "type": "tool_result",
-                                "call_id": call_id,
-                                "result": tool_result
-                            }))
-                            
-                            logger.debug(f"Sent tool result for {tool_name}")
+                            try:
+                                await self._send(websocket, {
+                                    "type": "tool_result",
+                                    "call_id": call_id,
+                                    "result": tool_result
+                                })
+                                logger.debug(f"Sent tool result for {tool_name}")
+                            finally:
+                                # Recorded after replying to keep it off the round trip, and
+                                # also when the connection drops while sending (the replayed
+                                # call only resends the stored result)
+                                await collector.record_tool_call(
+                                    task_execution_id=task_execution_id,
+                                    tool_name=tool_name,
+                                    success=tool_result.get('success', False),
+                                    duration_seconds=duration,
+                                    error=tool_result.get('error')
+                                )
                         
                         elif msg_type == "agent_switched":
                             agent_switches_count += 1
@@ -336,27 +581,46 @@ class GatewayClient:
                             break
                     
                     except asyncio.TimeoutError:
-                        logger.warning(f"Timeout waiting for response ({self.timeout}s)")
+                        if deadline is not None and time.monotonic() >= deadline:
+                            logger.warning(
+                                f"Task exceeded its total deadline ({timeout.total:.0f}s)"
+                            )
+                        else:
+                            logger.warning(f"Timeout waiting for response ({timeout.idle:.0f}s)")
                         has_error = True
                         break
-                    except websockets.ConnectionClosed:
-                        logger.info("WebSocket connection closed")
-                        break
+                    except websockets.ConnectionClosed as e:
+                        # Normal closure ends the task, anything else is resumed
+                        if e.rcvd is not None and e.rcvd.code == 1000:
+                            logger.info("WebSocket connection closed")
+                            break
+                        
+                        if resumes >= MAX_RESUMES_PER_TASK:
+                            logger.error(f"WebSocket connection lost {resumes} times, giving up")
+                            has_error = True
+                            break
+                        
+                        resumes += 1
+                        logger.warning(
+                            f"⚠️ WebSocket connection lost ({e}), resuming session "
+                            f"{session_id} ({resumes}/{MAX_RESUMES_PER_TASK})"
+                        )
+                        try:
+                            websocket = await self.resume_session(session)
+                        except Exception as resume_error:
+                            logger.error(f"Failed to resume session {session_id}: {resume_error}")
+                            has_error = True
+                            break
+                        resend_results = True
+                        logger.info(f"🔌 Reattached to session {session_id}")
+            finally:
+                await session.close()
             
             # Validate if enabled
-            success = not has_error and len(response_text) > 0
+            success = not has_error and response.length > 0
             
             if validator and success:
-                # Wait for file operations to complete if there were any write_file calls
-                if last_write_file_time:
-                    time_since_last_write = time.time() - last_write_file_time
-                    if time_since_last_write < 2.0:
-                        wait_time = 2.0 - time_since_last_write
-                        logger.info(f"⏳ Waiting {wait_time:.1f}s for file operations to complete...")
-                        await asyncio.sleep(wait_time)
-                    else:
-                        logger.debug(f"File operations completed {time_since_last_write:.1f}s ago")
-                
+                # Checks wait for the files they read to settle (TaskValidator._wait_until_stable)
                 logger.info("🔍 Running validation checks...")
                 validation = await validator.validate_task(task)
                 
@@ -413,20 +677,18 @@ class GatewayClient:
                 f"success={success}, "
                 f"tool_calls={tool_calls_count}, "
                 f"agent_switches={agent_switches_count}, "
-                f"response_length={len(response_text)}"
+                f"resumes={resumes}, "
+                f"response_length={response.length}"
             )
             
             return success
-            
+        
         except websockets.exceptions.WebSocketException as e:
             logger.error(f"WebSocket error: {e}")
             return False
         except Exception as e:
             logger.error(f"Task execution error: {e}", exc_info=True)
             return False
-        finally:
-            # Restore original timeout
-            self.timeout = original_timeout
     
     async def test_connection(self) -> bool:
         """
@@ -437,27 +699,28 @@ class GatewayClient:
         """
         try:
             # Test HTTP endpoint (health check doesn't require auth usually)
-            async with httpx.AsyncClient() as client:
-                # Try /api/v1/health first (nginx), fallback to /health (direct)
-                try:
-                    response = await client.get(f"{self.base_url}/api/v1/health")
-                    response.raise_for_status()
-                    logger.info(f"✓ Gateway HTTP accessible: {self.base_url}/api/v1/health")
-                except httpx.HTTPError:
-                    response = await client.get(f"{self.base_url}/health")
-                    response.raise_for_status()
-                    logger.info(f"✓ Gateway HTTP accessible: {self.base_url}/health")
+            # Try /api/v1/health first (nginx), fallback to /health (direct)
+            try:
+                response = await self.http_client.get(f"{self.base_url}/api/v1/health")
+                response.raise_for_status()
+                logger.info(f"✓ Gateway HTTP accessible: {self.base_url}/api/v1/health")
+            except httpx.HTTPError:
+                response = await self.http_client.get(f"{self.base_url}/health")
+                response.raise_for_status()
+                logger.info(f"✓ Gateway HTTP accessible: {self.base_url}/health")
             
-            # Test WebSocket by creating session and connecting (uses auth with retry)
-            session_id = await self.create_session()
-            ws_endpoint = f"{self.ws_url}/{session_id}"
+            # Test WebSocket by creating session and connecting (uses auth with retry).
+            # The session is kept open and handed to the first task.
+            session = await self.open_session()
+            if self._spare_session:
+                await self._spare_session.close()
+            self._spare_session = session
             
-            async with websockets.connect(ws_endpoint):
-                logger.info(
-                    f"✓ Successfully connected to Gateway WebSocket: {ws_endpoint}"
-                )
-                return True
-                
+            logger.info(
+                f"✓ Successfully connected to Gateway WebSocket: {self.ws_url}/{session.session_id}"
+            )
+            return True
+        
         except Exception as e:
             logger.error(f"✗ Failed to connect to Gateway: {e}")
             return False
@@ -0,0 +1,737 @@
+"""
+Code Index - индекс содержимого workspace для search_in_code.
+
+Вместо обхода дерева и чтения всех файлов на каждый поиск содержимое
+текстовых файлов держится в памяти вместе с инвертированным индексом
+токенов (идентификатор -> файлы) и индексом триграмм словаря токенов
+(триграмма -> токены) для частичных слов на краях запроса. Поиск подстроки
+или regex сначала сужает набор файлов по словам обязательных литералов
+запроса, затем проверяет только кандидатов и возвращает совпадающие строки
+с номерами, колонками и контекстом.
+
+Содержимое файлов в памяти не хранится: подстрока ищется в кандидатах
+через mmap, regex выполняется над декодированным текстом кандидата (чтобы
+точка, классы символов, границы слов и (?i) работали с не-ASCII
+символами), поэтому память ограничена словарем токенов и одним
+просматриваемым файлом. Файлы читаются в отдельном потоке и не блокируют
+event loop. Файлы больше max_file_bytes не индексируются и просматриваются
+целиком, больше max_scan_bytes и бинарные - пропускаются.
+Число результатов и их суммарный размер ограничены.
+
+Индекс строится лениво при первом поиске и обновляется инкрементально:
+MockToolExecutor сообщает о своих изменениях (write_file, apply_diff,
+create_directory), а изменения извне берутся из журнала TreeSnapshot
+(inotify: создание, удаление, перемещение и запись файлов) - перед поиском
+перечитываются только пути из журнала. Все дерево сверяется по mtime/size
+(os.scandir без чтения неизмененных файлов) только при первом поиске, после
+перестроения снимка и после mark_stale(): без inotify executor вызывает его
+после внешних команд и сброса workspace. Кандидаты поиска дополнительно
+сверяются по mtime/size на каждом поиске.
+"""
+import asyncio
+import fnmatch
+import logging
+import mmap
+import os
+import re
+import time
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterator, List, Optional, Pattern, Set, Tuple, Union
+
+from .tree_snapshot import IGNORED_DIRS, ChangeCursor, TreeSnapshot, ignored, normalize
+
+logger = logging.getLogger("benchmark.code_index")
+
+# Larger files (generated code, assets) are not indexed, only scanned
+MAX_INDEXED_FILE_BYTES = 2 * 1024 * 1024
+
+# Larger files are not searched at all
+MAX_SCAN_FILE_BYTES = 64 * 1024 * 1024
+
+DEFAULT_MAX_RESULTS = 100
+DEFAULT_MAX_RESULT_BYTES = 64 * 1024
+
+# Longer lines (minified or generated code) are cut in results
+MAX_LINE_CHARS = 500
+
+# Leading bytes checked for NUL to detect binary files
+BINARY_SNIFF_BYTES = 8192
+
+NEWLINE_COUNT_CHUNK = 1024 * 1024
+
+TRIGRAM = 3
+
+_WORD = re.compile(r"\w+")
+_INLINE_FLAGS = re.compile(r"\(\?[aiLmsux-]*i")
+# Escapes followed by an operand: code points, named characters
+_OPERAND_ESCAPES = ("x", "u", "U", "N")
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Distinct trigrams of text."""
+    return {text[i:i + TRIGRAM] for i in range(len(text) - TRIGRAM + 1)}
+
+
+def _find_all(buffer: mmap.mmap, needle: bytes) -> Iterator[int]:
+    """Offsets of all occurrences of a byte string."""
+    offset = buffer.find(needle)
+    while offset != -1:
+        yield offset
+        offset = buffer.find(needle, offset + 1)
+
+
+def _count_newlines(buffer: Union[mmap.mmap, str], start: int, end: int) -> int:
+    """Line breaks in buffer[start:end], counted in bounded chunks."""
+    newline = "\n" if isinstance(buffer, str) else b"\n"
+    count = 0
+    for chunk_start in range(start, end, NEWLINE_COUNT_CHUNK):
+        count += buffer[chunk_start:min(chunk_start + NEWLINE_COUNT_CHUNK, end)].count(newline)
+    return count
+
+
+def _decode_line(raw: Union[bytes, str]) -> str:
+    """Line text for results, cut to MAX_LINE_CHARS."""
+    text = raw if isinstance(raw, str) else raw.decode("utf-8", errors="replace")
+    text = text.rstrip("\r")
+    if len(text) > MAX_LINE_CHARS:
+        text = text[:MAX_LINE_CHARS] + "..."
+    return text
+
+
+def _skip_class(pattern: str, i: int) -> int:
+    """Index after the character class starting at pattern[i] == '['."""
+    i += 1
+    if i < len(pattern) and pattern[i] == "^":
+        i += 1
+    if i < len(pattern) and pattern[i] == "]":
+        i += 1
+    while i < len(pattern) and pattern[i] != "]":
+        i += 2 if pattern[i] == "\\" else 1
+    return i + 1
+
+
+def _skip_group(pattern: str, i: int) -> int:
+    """Index after the group starting at pattern[i] == '('."""
+    depth = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "[":
+            i = _skip_class(pattern, i)
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def required_literals(pattern: str) -> List[str]:
+    """
+    Literal substrings every match of a regex must contain.
+    
+    Conservative: top-level alternation, case-insensitive flags and escapes
+    with operands (\\x41, \\u0041, \\N{...}, octal and backreferences) give no
+    literals, groups and character classes only split literal runs.
+    
+    Args:
+        pattern: Regular expression
+    
+    Returns:
+        Literal strings (possibly empty list)
+    """
+    if _INLINE_FLAGS.search(pattern):
+        return []
+    
+    literals: List[str] = []
+    current: List[str] = []
+    
+    def flush() -> None:
+        if current:
+            literals.append("".join(current))
+            current.clear()
+    
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            escaped = pattern[i + 1:i + 2]
+            if escaped in _OPERAND_ESCAPES or escaped.isdigit():
+                # Operand characters would be mistaken for literals
+                return []
+            if escaped and not escaped.isalnum():
+                current.append(escaped)
+            else:
+                flush()
+            i += 2
+        elif char in "*?{":
+            # Quantified element may be absent
+            if current:
+                current.pop()
+            flush()
+            i = pattern.find("}", i) + 1 if char == "{" else i + 1
+            if i == 0:
+                return []
+        elif char == "+":
+            flush()
+            i += 1
+        elif char == "[":
+            flush()
+            i = _skip_class(pattern, i)
+        elif char == "(":
+            flush()
+            i = _skip_group(pattern, i)
+        elif char == "|":
+            return []
+        elif char in ".^$":
+            flush()
+            i += 1
+        else:
+            current.append(char)
+            i += 1
+    flush()
+    
+    return literals
+
+
+class IndexedFile:
+    """Tokens of one indexed file."""
+    
+    __slots__ = ("signature", "tokens")
+    
+    def __init__(self, signature: Tuple[int, int], content: str):
+        """
+        Initialize indexed file.
+        
+        Args:
+            signature: (mtime_ns, size) the content was read at
+            content: File text (not kept)
+        """
+        self.signature = signature
+        self.tokens = frozenset(_WORD.findall(content))
+
+
+class SearchBudget:
+    """Limits on the number and total text size of search results."""
+    
+    def __init__(self, max_results: int, max_bytes: int):
+        """
+        Initialize search budget.
+        
+        Args:
+            max_results: Maximum number of matching lines
+            max_bytes: Maximum total size of result text (lines and context)
+        """
+        self.max_results = max_results
+        self.max_bytes = max_bytes
+        self.results = 0
+        self.bytes = 0
+        self.exhausted = False
+    
+    def take(self, size: int) -> bool:
+        """Account for one result of `size` bytes, False if it does not fit."""
+        over_bytes = self.results > 0 and self.bytes + size > self.max_bytes
+        if self.results >= self.max_results or over_bytes:
+            self.exhausted = True
+            return False
+        self.results += 1
+        self.bytes += size
+        return True
+
+
+class CodeIndex:
+    """
+    In-memory token index of a workspace.
+    
+    Usage:
+        index = CodeIndex(workspace_path, tree=tree)
+        matches = await index.search("class Widget", path="lib")
+        await index.update("lib/main.dart")  # after the executor changes it
+        index.mark_stale()                   # after an external tool ran (without watcher)
+    """
+    
+    def __init__(
+        self,
+        root: Path,
+        tree: Optional[TreeSnapshot] = None,
+        max_file_bytes: int = MAX_INDEXED_FILE_BYTES,
+        max_scan_bytes: int = MAX_SCAN_FILE_BYTES
+    ):
+        """
+        Initialize code index.
+        
+        Args:
+            root: Workspace directory
+            tree: Tree snapshot of root whose change log reports external changes
+                (without it, or without inotify, they are seen after mark_stale())
+            max_file_bytes: Files larger than this are not indexed, only scanned
+            max_scan_bytes: Files larger than this are not searched
+        """
+        self.root = root
+        self.tree = tree
+        self.max_file_bytes = max_file_bytes
+        self.max_scan_bytes = max(max_scan_bytes, max_file_bytes)
+        
+        self._files: Dict[str, IndexedFile] = {}
+        # Files kept out of the token index: path -> (signature, "large" | "binary")
+        self._unindexed: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._token_trigrams: Dict[str, Set[str]] = {}
+        self._built = False
+        self._stale = True
+        self._tree_cursor: Optional[ChangeCursor] = None
+        self._lock = asyncio.Lock()
+    
+    @property
+    def file_count(self) -> int:
+        """Number of indexed files."""
+        return len(self._files)
+    
+    def mark_stale(self) -> None:
+        """Check the whole tree before the next search unless inotify reports the changes."""
+        if self.tree is None or not self.tree.watching:
+            self._stale = True
+    
+    async def update(self, rel_path: str) -> None:
+        """
+        Reindex a path changed by the executor.
+        
+        Args:
+            rel_path: File or directory relative to root (removed paths are dropped)
+        """
+        async with self._lock:
+            if not self._built:
+                return
+            
+            rel_path = normalize(rel_path)
+            if rel_path.startswith("..") or ignored(rel_path):
+                return
+            
+            full_path = self.root / rel_path
+            if full_path.is_dir():
+                seen = await asyncio.to_thread(self._scan, rel_path)
+                for indexed in set(self._under(rel_path)) - seen:
+                    self._remove(indexed)
+            elif full_path.is_file():
+                await asyncio.to_thread(self._index_file, rel_path)
+            else:
+                for indexed in self._under(rel_path):
+                    self._remove(indexed)
+    
+    async def search(
+        self,
+        pattern: str,
+        is_regex: bool = False,
+        path: str = ".",
+        file_pattern: str = "*",
+        context_lines: int = 0,
+        max_results: int = DEFAULT_MAX_RESULTS,
+        max_bytes: int = DEFAULT_MAX_RESULT_BYTES
+    ) -> Dict[str, Any]:
+        """
+        Find lines matching a substring or regex.
+        
+        Args:
+            pattern: Substring or regular expression (matched per line for ^ and $)
+            is_regex: Treat pattern as regular expression
+            path: Directory (relative to root) to search in
+            file_pattern: Glob for file names, or for paths relative to `path` if it has '/'
+            context_lines: Lines of context before and after each match
+            max_results: Maximum number of matching lines
+            max_bytes: Maximum total size of result text
+        
+        Returns:
+            Dict with "matches" ({"path", "line", "column", "text"} plus "before"
+            and "after" with context, ordered by path and line), "truncated"
+            (a limit was reached) and "skipped" (files too large to search)
+        
+        Raises:
+            re.error: If the regular expression is invalid
+        """
+        if is_regex:
+            regex: Optional[Pattern[str]] = re.compile(pattern, re.MULTILINE)
+            needle = None
+            literals = required_literals(pattern)
+        else:
+            regex = None
+            needle = pattern.encode("utf-8")
+            literals = [pattern]
+        
+        async with self._lock:
+            changed = None
+            if self.tree is not None:
+                self._tree_cursor, changed = self.tree.changes_since(self._tree_cursor)
+            
+            if not self._built or self._stale or (self.tree is not None and changed is None):
+                await asyncio.to_thread(self._refresh)
+            elif changed:
+                await asyncio.to_thread(self._apply_changes, changed)
+            
+            candidates = self._candidates(literals)
+            candidates.update(p for p in self._unindexed if self._is_large(p))
+            
+            budget = SearchBudget(max_results, max_bytes)
+            matches, skipped = await asyncio.to_thread(
+                self._search_candidates,
+                sorted(candidates),
+                normalize(path),
+                file_pattern,
+                needle,
+                regex,
+                context_lines,
+                budget
+            )
+        
+        return {"matches": matches, "truncated": budget.exhausted, "skipped": skipped}
+    
+    def _search_candidates(
+        self,
+        candidates: List[str],
+        scope: str,
+        file_pattern: str,
+        needle: Optional[bytes],
+        regex: Optional[Pattern[str]],
+        context_lines: int,
+        budget: SearchBudget
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Scan candidate files in order until the budget is exhausted (runs in a thread)."""
+        matches: List[Dict[str, Any]] = []
+        skipped: List[str] = []
+        for rel_path in candidates:
+            if budget.exhausted:
+                break
+            if not self._in_scope(rel_path, scope, file_pattern):
+                continue
+            
+            # Changed since indexed: reclassify (the scan below reads current content)
+            signature = self._signature(rel_path)
+            if signature is None or signature != self._known_signature(rel_path):
+                self._index_file(rel_path)
+            
+            if rel_path not in self._files and not self._is_large(rel_path):
+                continue
+            if signature[1] > self.max_scan_bytes:
+                skipped.append(rel_path)
+                continue
+            matches.extend(self._scan_file(rel_path, needle, regex, context_lines, budget))
+        return matches, skipped
+    
+    def _candidates(self, literals: List[str]) -> Set[str]:
+        """
+        Files that may contain every literal.
+        
+        Words inside a literal must be whole tokens of the file; words at
+        its edges may be parts of longer tokens and are looked up through
+        the trigrams of the token vocabulary.
+        """
+        candidates: Optional[Set[str]] = None
+        for literal in literals:
+            for word in _WORD.finditer(literal):
+                files = self._files_with_word(
+                    word.group(),
+                    open_start=word.start() == 0,
+                    open_end=word.end() == len(literal)
+                )
+                if files is None:
+                    continue
+                candidates = set(files) if candidates is None else candidates & files
+                if not candidates:
+                    return set()
+        
+        return set(self._files) if candidates is None else candidates
+    
+    def _files_with_word(self, word: str, open_start: bool, open_end: bool) -> Optional[Set[str]]:
+        """Files with a token matching word (None if the word is too short to narrow)."""
+        if not open_start and not open_end:
+            return self._postings.get(word, set())
+        
+        trigrams = _trigrams(word)
+        if not trigrams:
+            return None
+        
+        tokens: Optional[Set[str]] = None
+        for trigram in sorted(trigrams, key=lambda t: len(self._token_trigrams.get(t, ()))):
+            found = self._token_trigrams.get(trigram, set())
+            tokens = set(found) if tokens is None else tokens & found
+            if not tokens:
+                return set()
+        
+        files: Set[str] = set()
+        for token in tokens:
+            if open_start and open_end:
+                matches = word in token
+            elif open_start:
+                matches = token.endswith(word)
+            else:
+                matches = token.startswith(word)
+            if matches:
+                files |= self._postings[token]
+        return files
+    
+    @staticmethod
+    def _in_scope(rel_path: str, scope: str, file_pattern: str) -> bool:
+        """Whether file is under scope and matches the glob."""
+        if scope:
+            if not rel_path.startswith(scope + "/"):
+                return False
+            rel_path = rel_path[len(scope) + 1:]
+        if "/" in file_pattern:
+            return PurePosixPath(rel_path).match(file_pattern)
+        return fnmatch.fnmatchcase(rel_path.rsplit("/", 1)[-1], file_pattern)
+    
+    def _scan_file(
+        self,
+        rel_path: str,
+        needle: Optional[bytes],
+        regex: Optional[Pattern[str]],
+        context_lines: int,
+        budget: SearchBudget
+    ) -> List[Dict[str, Any]]:
+        """
+        Matching lines of one file (each line once).
+        
+        Substrings are found in the mmap bytes; a regex runs on the decoded
+        text so that character classes and flags see whole characters.
+        """
+        try:
+            with open(os.path.join(self.root, rel_path), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return []
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    if b"\x00" in buffer[:BINARY_SNIFF_BYTES]:
+                        return []
+                    if regex is None:
+                        return self._match_buffer(
+                            rel_path, buffer, _find_all(buffer, needle), context_lines, budget
+                        )
+                    text = buffer[:].decode("utf-8", errors="replace")
+            offsets = (m.start() for m in regex.finditer(text))
+            return self._match_buffer(rel_path, text, offsets, context_lines, budget)
+        except (OSError, ValueError):
+            return []
+    
+    @staticmethod
+    def _match_buffer(
+        rel_path: str,
+        buffer: Union[mmap.mmap, str],
+        offsets: Iterator[int],
+        context_lines: int,
+        budget: SearchBudget
+    ) -> List[Dict[str, Any]]:
+        """
+        Collect matches at offsets into file bytes (mmap) or decoded text.
+        
+        Returns plain data so the mmap can be closed.
+        """
+        is_text = isinstance(buffer, str)
+        newline = "\n" if is_text else b"\n"
+        size = len(buffer)
+        matches = []
+        line_number = 1
+        counted_to = 0
+        last_line_start = -1
+        
+        for offset in offsets:
+            line_start = buffer.rfind(newline, 0, offset) + 1
+            if line_start == last_line_start:
+                continue
+            last_line_start = line_start
+            
+            line_number += _count_newlines(buffer, counted_to, line_start)
+            counted_to = line_start
+            line_end = buffer.find(newline, offset)
+            line_end = size if line_end == -1 else line_end
+            
+            if is_text:
+                column = offset - line_start + 1
+            else:
+                column = len(buffer[line_start:offset].decode("utf-8", errors="replace")) + 1
+            match = {
+                "path": rel_path,
+                "line": line_number,
+                "column": column,
+                "text": _decode_line(buffer[line_start:line_end]),
+            }
+            result_size = len(match["text"])
+            
+            if context_lines > 0:
+                before = []
+                start = line_start
+                while len(before) < context_lines and start > 0:
+                    previous = buffer.rfind(newline, 0, start - 1) + 1
+                    before.insert(0, _decode_line(buffer[previous:start - 1]))
+                    start = previous
+                
+                after = []
+                end = line_end
+                while len(after) < context_lines and end + 1 < size:
+                    following = buffer.find(newline, end + 1)
+                    following = size if following == -1 else following
+                    after.append(_decode_line(buffer[end + 1:following]))
+                    end = following
+                
+                match["before"] = before
+                match["after"] = after
+                result_size += sum(len(line) for line in before + after)
+            
+            if not budget.take(result_size):
+                break
+            matches.append(match)
+        
+        return matches
+    
+    def _refresh(self) -> None:
+        """Bring the index in line with the tree (only changed files are read)."""
+        start_time = time.perf_counter()
+        seen = self._scan("")
+        for rel_path in (self._files.keys() | self._unindexed.keys()) - seen:
+            self._remove(rel_path)
+        
+        if not self._built:
+            logger.info(
+                f"🗂️  Indexed {len(self._files)} files in {self.root} "
+                f"({time.perf_counter() - start_time:.2f}s)"
+            )
+        self._built = True
+        self._stale = False
+    
+    def _apply_changes(self, changed: List[str]) -> None:
+        """Reindex paths from the tree change log whose mtime/size changed."""
+        for rel_path in dict.fromkeys(changed):
+            if ignored(rel_path):
+                continue
+            
+            full_path = os.path.join(self.root, rel_path)
+            if os.path.isdir(full_path) and not os.path.islink(full_path):
+                seen = self._scan(rel_path)
+                for indexed in set(self._under(rel_path)) - seen:
+                    self._remove(indexed)
+            elif os.path.isfile(full_path):
+                if self._signature(rel_path) != self._known_signature(rel_path):
+                    self._index_file(rel_path)
+            else:
+                for indexed in self._under(rel_path):
+                    self._remove(indexed)
+    
+    def _scan(self, rel_dir: str) -> Set[str]:
+        """Index changed files under a directory, returning all files seen."""
+        root = str(self.root)
+        seen = set()
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            try:
+                entries = list(os.scandir(os.path.join(root, current)))
+            except OSError:
+                continue
+            
+            for entry in entries:
+                rel_path = f"{current}/{entry.name}" if current else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in IGNORED_DIRS:
+                            stack.append(rel_path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                
+                seen.add(rel_path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if self._known_signature(rel_path) != signature:
+                    self._index_file(rel_path, stat)
+        return seen
+    
+    def _index_file(
+        self,
+        rel_path: str,
+        stat: Optional[os.stat_result] = None
+    ) -> Optional[IndexedFile]:
+        """(Re)read one file into the index; large and binary files are only recorded."""
+        self._remove(rel_path)
+        
+        full_path = os.path.join(self.root, rel_path)
+        try:
+            stat = stat or os.stat(full_path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if stat.st_size > self.max_file_bytes:
+                self._unindexed[rel_path] = (signature, "large")
+                return None
+            with open(full_path, "rb") as f:
+                content = f.read().decode("utf-8")
+        except OSError:
+            return None
+        except UnicodeDecodeError:
+            self._unindexed[rel_path] = (signature, "binary")
+            return None
+        if "\x00" in content:
+            self._unindexed[rel_path] = (signature, "binary")
+            return None
+        
+        indexed = IndexedFile(signature, content)
+        self._files[rel_path] = indexed
+        for token in indexed.tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = set()
+                for trigram in _trigrams(token):
+                    self._token_trigrams.setdefault(trigram, set()).add(token)
+            posting.add(rel_path)
+        return indexed
+    
+    def _remove(self, rel_path: str) -> None:
+        """Drop file from the index."""
+        self._unindexed.pop(rel_path, None)
+        indexed = self._files.pop(rel_path, None)
+        if indexed is None:
+            return
+        for token in indexed.tokens:
+            posting = self._postings[token]
+            posting.discard(rel_path)
+            if not posting:
+                del self._postings[token]
+                for trigram in _trigrams(token):
+                    tokens = self._token_trigrams[trigram]
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._token_trigrams[trigram]
+    
+    def _under(self, rel_path: str) -> List[str]:
+        """Known files at or below a path."""
+        prefix = rel_path + "/"
+        return [
+            p for p in (*self._files, *self._unindexed)
+            if p == rel_path or p.startswith(prefix) or not rel_path
+        ]
+    
+    def _known_signature(self, rel_path: str) -> Optional[Tuple[int, int]]:
+        """Signature a file was last classified at, None if unknown."""
+        indexed = self._files.get(rel_path)
+        if indexed is not None:
+            return indexed.signature
+        unindexed = self._unindexed.get(rel_path)
+        return unindexed[0] if unindexed else None
+    
+    def _is_large(self, rel_path: str) -> bool:
+        """Whether file is too large for the token index (scanned on every search)."""
+        unindexed = self._unindexed.get(rel_path)
+        return unindexed is not None and unindexed[1] == "large"
+    
+    def _signature(self, rel_path: str) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of a file, None if it is gone."""
+        try:
+            stat = os.stat(self.root / rel_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def __repr__(self) -> str:
+        return f"<CodeIndex(root='{self.root}', files={len(self._files)})>"
+
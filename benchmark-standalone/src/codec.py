@@ -0,0 +1,107 @@
+"""
+JSON Codec - сериализация WebSocket кадров Gateway.
+
+По умолчанию используется orjson (если установлен), иначе стандартный json.
+orjson кодирует сразу в UTF-8 bytes без промежуточной str, что важно для
+tool_result с полным содержимым файлов.
+"""
+import importlib.util
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Optional, Union
+
+logger = logging.getLogger("benchmark.codec")
+
+
+class JsonCodec(ABC):
+    """
+    Codec interface used by GatewayClient for WebSocket frames.
+    
+    `encode` may return str or UTF-8 bytes; both are sent as text frames.
+    When `binary` is True, `decode` accepts raw frame bytes, so frames are
+    received without decoding them to str first.
+    """
+    
+    name = "base"
+    binary = False
+    
+    @abstractmethod
+    def encode(self, obj: Any) -> Union[str, bytes]:
+        """Serialize message to JSON."""
+    
+    @abstractmethod
+    def decode(self, data: Union[str, bytes]) -> Any:
+        """Parse JSON frame."""
+    
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}(name='{self.name}')>"
+
+
+class StdlibJsonCodec(JsonCodec):
+    """Standard library json."""
+    
+    name = "json"
+    
+    def encode(self, obj: Any) -> str:
+        # Non-ASCII text is kept as is instead of being escaped as \uXXXX
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    
+    def decode(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """orjson: encodes straight to UTF-8 bytes."""
+    
+    name = "orjson"
+    binary = True
+    
+    def __init__(self):
+        import orjson
+        
+        self._orjson = orjson
+    
+    def encode(self, obj: Any) -> bytes:
+        return self._orjson.dumps(obj)
+    
+    def decode(self, data: Union[str, bytes]) -> Any:
+        return self._orjson.loads(data)
+
+
+CODECS = {
+    StdlibJsonCodec.name: StdlibJsonCodec,
+    OrjsonCodec.name: OrjsonCodec,
+}
+
+
+def available_codecs() -> list:
+    """Names of codecs whose dependencies are installed."""
+    return [
+        name for name in CODECS
+        if name == StdlibJsonCodec.name or importlib.util.find_spec(name) is not None
+    ]
+
+
+def get_codec(name: Optional[str] = None) -> JsonCodec:
+    """
+    Create JSON codec.
+    
+    Args:
+        name: "auto" (default: fastest installed), "orjson" or "json"
+    
+    Returns:
+        Codec instance
+    """
+    name = name or "auto"
+    
+    if name == "auto":
+        name = OrjsonCodec.name if OrjsonCodec.name in available_codecs() else StdlibJsonCodec.name
+    elif name not in CODECS:
+        raise ValueError(f"Unknown JSON codec: {name} (available: {', '.join(CODECS)})")
+    elif name not in available_codecs():
+        logger.warning(f"JSON codec '{name}' is not installed, using stdlib json")
+        name = StdlibJsonCodec.name
+    
+    logger.debug(f"Using JSON codec: {name}")
+    return CODECS[name]()
@@ -3,24 +3,30 @@ Metrics Collector - сбор и хранение метрик benchmark эксп
 
 Адаптировано из codelab-ai-service/agent-runtime/app/services/metrics_collector.py
 """
+import asyncio
 import logging
+import time
+import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
+from .metrics_journal import MetricsJournal
 from .models import (
     AgentSwitch,
     Experiment,
+    ExperimentRollup,
     Hallucination,
     LLMCall,
     QualityEvaluation,
     TaskExecution,
     ToolCall,
 )
+from .rollup import apply_row_deltas, apply_task_status, init_task_rollup, rebuild_rollups
 
 logger = logging.getLogger("benchmark.collector")
 
@@ -36,17 +42,181 @@ class MetricsCollector:
         await collector.record_llm_call(task_id, "coder", 500, 200, "gpt-4", 2.5)
         await collector.complete_task(task_id, success=True)
         await collector.complete_experiment(exp_id)
+    
+    In buffered mode `record_*` rows are queued in memory and inserted in bulk
+    when `flush_size` rows are pending, when a row arrives `flush_interval`
+    seconds after the last flush, on `complete_task`/`complete_experiment` and
+    on `flush()`. IDs are generated on the client so they are known before the
+    row is written.
+    
+    Durability: with `journal_dir` a buffered row is appended to the
+    collector's journal before its ID is returned, and `recover()` replays
+    journals of a crashed run into the database on the next start. Without a
+    journal, rows not flushed yet are lost if the process dies.
     """
     
-    def __init__(self, db_session: AsyncSession):
+    def __init__(
+        self,
+        db_session: AsyncSession,
+        buffered: bool = False,
+        flush_size: int = 100,
+        flush_interval: float = 1.0,
+        journal_dir: Optional[Path] = None
+    ):
         """
         Initialize metrics collector.
         
         Args:
             db_session: Async database session
+            buffered: Queue record_* rows and insert them in bulk (see durability above)
+            flush_size: Pending rows that trigger a flush (buffered mode)
+            flush_interval: Seconds since last flush after which the next row triggers
+                a flush (buffered mode; MetricsWriter also flushes after this idle time)
+            journal_dir: Directory for journals of unflushed rows (buffered mode)
         """
         self.db = db_session
-        logger.debug("MetricsCollector initialized")
+        self.buffered = buffered
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[Type[Any], Dict[str, Any]]] = []
+        self._last_flush = time.monotonic()
+        self._flush_lock = asyncio.Lock()
+        self._task_experiments: Dict[str, str] = {}
+        self.journal = MetricsJournal(journal_dir) if buffered and journal_dir else None
+        logger.debug(f"MetricsCollector initialized (buffered={buffered})")
+    
+    @property
+    def pending_count(self) -> int:
+        """Number of rows waiting to be flushed."""
+        return len(self._pending)
+    
+    async def _insert(self, model: Type[Any], values: Dict[str, Any]) -> UUID:
+        """
+        Insert row or queue it in buffered mode.
+        
+        Args:
+            model: ORM model class
+            values: Column values without ID
+        
+        Returns:
+            Client-generated row UUID
+        """
+        row_id = uuid.uuid4()
+        values["id"] = str(row_id)
+        
+        if not self.buffered:
+            await self._write_rows([(model, values)])
+            await self.db.commit()
+            return row_id
+        
+        if self.journal:
+            # Row is acknowledged (ID returned) only once it is journaled
+            self.journal.append(model, values)
+        self._pending.append((model, values))
+        if (
+            len(self._pending) >= self.flush_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            await self.flush()
+        
+        return row_id
+    
+    async def flush(self) -> int:
+        """
+        Write all pending rows in one transaction.
+        
+        Rows are kept pending if the write fails, so the next flush retries them.
+        
+        Returns:
+            Number of rows written
+        """
+        async with self._flush_lock:
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                if self.journal:
+                    self.journal.discard()
+                return 0
+            
+            pending, self._pending = self._pending, []
+            
+            try:
+                await self._write_rows(pending)
+                await self.db.commit()
+            except Exception:
+                await self.db.rollback()
+                self._pending = pending + self._pending
+                raise
+            
+            # Rows recorded during the write are still journaled only
+            if self.journal and not self._pending:
+                self.journal.discard()
+            
+            logger.debug(f"Flushed {len(pending)} metric rows")
+            return len(pending)
+    
+    @staticmethod
+    async def recover(db_session: AsyncSession, journal_dir: Path) -> int:
+        """
+        Replay journals left by buffered collectors of a crashed run.
+        
+        Rows that reached the database before the crash are skipped by ID,
+        so replaying a journal twice is harmless.
+        
+        Args:
+            db_session: Async database session
+            journal_dir: Journal directory used by the collectors
+        
+        Returns:
+            Number of rows written
+        """
+        models = {
+            model.__tablename__: model
+            for model in (LLMCall, ToolCall, AgentSwitch, QualityEvaluation, Hallucination)
+        }
+        recovered = 0
+        
+        for path in MetricsJournal.pending(journal_dir):
+            rows = list(MetricsJournal.read(path, models))
+            
+            stored = set()
+            for model in {model for model, _ in rows}:
+                ids = [values["id"] for row_model, values in rows if row_model is model]
+                result = await db_session.execute(select(model.id).where(model.id.in_(ids)))
+                stored.update(result.scalars().all())
+            missing = [(model, values) for model, values in rows if values["id"] not in stored]
+            
+            if missing:
+                collector = MetricsCollector(db_session)
+                await collector._write_rows(missing)
+                await db_session.commit()
+                recovered += len(missing)
+            
+            path.unlink()
+            logger.info(f"Replayed metrics journal {path.name}: {len(missing)} of {len(rows)} rows")
+        
+        return recovered
+    
+    async def _write_rows(self, rows: List[Tuple[Type[Any], Dict[str, Any]]]) -> None:
+        """Insert rows in bulk and add them to rollups (caller commits)."""
+        rows_by_model: Dict[Type[Any], List[Dict[str, Any]]] = {}
+        for model, values in rows:
+            rows_by_model.setdefault(model, []).append(values)
+        
+        for model, model_rows in rows_by_model.items():
+            await self.db.execute(insert(model), model_rows)
+        
+        # Resolve experiments of tasks started by other collectors
+        unknown = {
+            values["task_execution_id"] for _, values in rows
+        } - self._task_experiments.keys()
+        if unknown:
+            result = await self.db.execute(
+                select(TaskExecution.id, TaskExecution.experiment_id)
+                .where(TaskExecution.id.in_(unknown))
+            )
+            self._task_experiments.update(dict(result.all()))
+        
+        await apply_row_deltas(self.db, rows, self._task_experiments)
     
     async def start_experiment(
         self,
@@ -59,7 +229,7 @@ class MetricsCollector:
         Args:
             mode: Experiment mode ('single-agent' or 'multi-agent')
             config: Optional experiment configuration
-            
+        
         Returns:
             Experiment UUID
         """
@@ -67,14 +237,15 @@ class MetricsCollector:
             raise ValueError(f"Invalid mode: {mode}")
         
         experiment = Experiment(
+            id=str(uuid.uuid4()),
             mode=mode,
             started_at=datetime.now(timezone.utc),
             config=config or {}
         )
         
         self.db.add(experiment)
+        await apply_task_status(self.db, experiment.id, total_tasks=0)
         await self.db.commit()
-        await self.db.refresh(experiment)
         
         logger.info(f"Started experiment: id={experiment.id}, mode={mode}")
         
@@ -95,6 +266,8 @@ class MetricsCollector:
         if not experiment:
             raise ValueError(f"Experiment not found: {experiment_id}")
         
+        await self.flush()
+        
         experiment.completed_at = datetime.now(timezone.utc)
         await self.db.commit()
         
@@ -117,7 +290,7 @@ class MetricsCollector:
             task_category: Task category
             task_type: Task type
             mode: Execution mode
-            
+        
         Returns:
             Task execution UUID
         """
@@ -129,6 +302,7 @@ class MetricsCollector:
             raise ValueError(f"Experiment not found: {experiment_id}")
         
         task_execution = TaskExecution(
+            id=str(uuid.uuid4()),
             experiment_id=str(experiment_id),
             task_id=task_id,
             task_category=task_category,
@@ -138,8 +312,10 @@ class MetricsCollector:
         )
         
         self.db.add(task_execution)
+        await apply_task_status(self.db, str(experiment_id), total_tasks=1)
+        await init_task_rollup(self.db, task_execution.id, str(experiment_id))
         await self.db.commit()
-        await self.db.refresh(task_execution)
+        self._task_experiments[task_execution.id] = str(experiment_id)
         
         logger.info(f"Started task: id={task_execution.id}, task_id={task_id}")
         
@@ -161,6 +337,8 @@ class MetricsCollector:
             failure_reason: Optional reason for failure
             metrics: Optional additional metrics
         """
+        await self.flush()
+        
         result = await self.db.execute(
             select(TaskExecution).where(TaskExecution.id == str(task_execution_id))
         )
@@ -169,6 +347,7 @@ class MetricsCollector:
         if not task_execution:
             raise ValueError(f"Task execution not found: {task_execution_id}")
         
+        first_completion = task_execution.completed_at is None
         task_execution.completed_at = datetime.now(timezone.utc)
         task_execution.success = success
         task_execution.failure_reason = failure_reason
@@ -188,6 +367,15 @@ class MetricsCollector:
             if "duration_seconds" not in task_execution.metrics:
                 task_execution.metrics["duration_seconds"] = duration
         
+        if first_completion:
+            await apply_task_status(
+                self.db,
+                task_execution.experiment_id,
+                completed_tasks=1,
+                successful_tasks=1 if success else 0,
+                total_duration_seconds=task_execution.metrics.get("duration_seconds") or 0.0
+            )
+        
         await self.db.commit()
         
         logger.info(f"Completed task: id={task_execution_id}, success={success}")
@@ -202,24 +390,21 @@ class MetricsCollector:
         duration_seconds: float
     ) -> UUID:
         """Record LLM API call."""
-        llm_call = LLMCall(
-            task_execution_id=str(task_execution_id),
-            agent_type=agent_type,
-            started_at=datetime.now(timezone.utc),
-            completed_at=datetime.now(timezone.utc),
-            input_tokens=input_tokens,
-            output_tokens=output_tokens,
-            model=model,
-            duration_seconds=duration_seconds
-        )
-        
-        self.db.add(llm_call)
-        await self.db.commit()
-        await self.db.refresh(llm_call)
+        now = datetime.now(timezone.utc)
+        row_id = await self._insert(LLMCall, {
+            "task_execution_id": str(task_execution_id),
+            "agent_type": agent_type,
+            "started_at": now,
+            "completed_at": now,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "model": model,
+            "duration_seconds": duration_seconds
+        })
         
         logger.debug(f"Recorded LLM call: agent={agent_type}, tokens={input_tokens}/{output_tokens}")
         
-        return UUID(llm_call.id)
+        return row_id
     
     async def record_tool_call(
         self,
@@ -230,23 +415,20 @@ class MetricsCollector:
         error: Optional[str] = None
     ) -> UUID:
         """Record tool invocation."""
-        tool_call = ToolCall(
-            task_execution_id=str(task_execution_id),
-            tool_name=tool_name,
-            started_at=datetime.now(timezone.utc),
-            completed_at=datetime.now(timezone.utc),
-            success=success,
-            duration_seconds=duration_seconds,
-            error=error
-        )
-        
-        self.db.add(tool_call)
-        await self.db.commit()
-        await self.db.refresh(tool_call)
+        now = datetime.now(timezone.utc)
+        row_id = await self._insert(ToolCall, {
+            "task_execution_id": str(task_execution_id),
+            "tool_name": tool_name,
+            "started_at": now,
+            "completed_at": now,
+            "success": success,
+            "duration_seconds": duration_seconds,
+            "error": error
+        })
         
         logger.debug(f"Recorded tool call: tool={tool_name}, success={success}")
         
-        return UUID(tool_call.id)
+        return row_id
     
     async def record_agent_switch(
         self,
@@ -256,21 +438,17 @@ class MetricsCollector:
         reason: str
     ) -> UUID:
         """Record agent switch (multi-agent only)."""
-        agent_switch = AgentSwitch(
-            task_execution_id=str(task_execution_id),
-            from_agent=from_agent,
-            to_agent=to_agent,
-            reason=reason,
-            timestamp=datetime.now(timezone.utc)
-        )
-        
-        self.db.add(agent_switch)
-        await self.db.commit()
-        await self.db.refresh(agent_switch)
+        row_id = await self._insert(AgentSwitch, {
+            "task_execution_id": str(task_execution_id),
+            "from_agent": from_agent,
+            "to_agent": to_agent,
+            "reason": reason,
+            "timestamp": datetime.now(timezone.utc)
+        })
         
         logger.info(f"Recorded agent switch: {from_agent} → {to_agent}")
         
-        return UUID(agent_switch.id)
+        return row_id
     
     async def record_quality_evaluation(
         self,
@@ -284,22 +462,18 @@ class MetricsCollector:
         if score is not None and not (0.0 <= score <= 1.0):
             raise ValueError(f"Score must be between 0.0 and 1.0, got: {score}")
         
-        quality_evaluation = QualityEvaluation(
-            task_execution_id=str(task_execution_id),
-            evaluation_type=evaluation_type,
-            score=score,
-            passed=passed,
-            details=details or {},
-            evaluated_at=datetime.now(timezone.utc)
-        )
-        
-        self.db.add(quality_evaluation)
-        await self.db.commit()
-        await self.db.refresh(quality_evaluation)
+        row_id = await self._insert(QualityEvaluation, {
+            "task_execution_id": str(task_execution_id),
+            "evaluation_type": evaluation_type,
+            "score": score,
+            "passed": passed,
+            "details": details or {},
+            "evaluated_at": datetime.now(timezone.utc)
+        })
         
         logger.info(f"Recorded quality evaluation: type={evaluation_type}, passed={passed}")
         
-        return UUID(quality_evaluation.id)
+        return row_id
     
     async def record_hallucination(
         self,
@@ -308,20 +482,16 @@ class MetricsCollector:
         description: str
     ) -> UUID:
         """Record detected hallucination."""
-        hallucination = Hallucination(
-            task_execution_id=str(task_execution_id),
-            hallucination_type=hallucination_type,
-            description=description,
-            detected_at=datetime.now(timezone.utc)
-        )
-        
-        self.db.add(hallucination)
-        await self.db.commit()
-        await self.db.refresh(hallucination)
+        row_id = await self._insert(Hallucination, {
+            "task_execution_id": str(task_execution_id),
+            "hallucination_type": hallucination_type,
+            "description": description,
+            "detected_at": datetime.now(timezone.utc)
+        })
         
         logger.warning(f"Recorded hallucination: type={hallucination_type}")
         
-        return UUID(hallucination.id)
+        return row_id
     
     async def get_experiment_summary(self, experiment_id: UUID) -> Dict[str, Any]:
         """
@@ -329,10 +499,12 @@ class MetricsCollector:
         
         Args:
             experiment_id: Experiment UUID
-            
+        
         Returns:
             Dictionary with experiment summary statistics
         """
+        await self.flush()
+        
         result = await self.db.execute(
             select(Experiment).where(Experiment.id == str(experiment_id))
         )
@@ -341,26 +513,17 @@ class MetricsCollector:
         if not experiment:
             raise ValueError(f"Experiment not found: {experiment_id}")
         
-        # Get task executions with LLM calls eagerly loaded (fixes N+1 query problem)
-        result = await self.db.execute(
-            select(TaskExecution)
-            .where(TaskExecution.experiment_id == str(experiment_id))
-            .options(selectinload(TaskExecution.llm_calls))
-        )
-        tasks = result.scalars().all()
-        
-        total_tasks = len(tasks)
-        successful_tasks = sum(1 for t in tasks if t.success is True)
-        failed_tasks = sum(1 for t in tasks if t.success is False)
-        
-        # Calculate total tokens from eagerly loaded LLM calls
-        total_input_tokens = 0
-        total_output_tokens = 0
-        
-        for task in tasks:
-            # Access the pre-loaded llm_calls relationship
-            total_input_tokens += sum(call.input_tokens for call in task.llm_calls)
-            total_output_tokens += sum(call.output_tokens for call in task.llm_calls)
+        # Pre-aggregated totals; databases created before rollups are rebuilt once
+        rollup = await self.db.get(ExperimentRollup, str(experiment_id), populate_existing=True)
+        if rollup is None:
+            await rebuild_rollups(self.db, experiment_id)
+            rollup = await self.db.get(ExperimentRollup, str(experiment_id), populate_existing=True)
+        
+        total_tasks = rollup.total_tasks if rollup else 0
+        successful_tasks = rollup.successful_tasks if rollup else 0
+        failed_tasks = (rollup.completed_tasks - rollup.successful_tasks) if rollup else 0
+        total_input_tokens = rollup.input_tokens if rollup else 0
+        total_output_tokens = rollup.output_tokens if rollup else 0
         
         # Calculate cost (example pricing for GPT-4)
         cost = (total_input_tokens * 0.003 + total_output_tokens * 0.015) / 1000
@@ -2,9 +2,11 @@
 Database initialization and session management.
 """
 import logging
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict, Optional
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
 
 from .models import Base
 
@@ -14,14 +16,35 @@ logger = logging.getLogger("benchmark.database")
 engine = None
 async_session_maker = None
 
+# SQLite performance profile applied to every new connection.
+# WAL lets report generation read while a benchmark is writing.
+DEFAULT_SQLITE_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # 64 MB (negative value is KiB)
+    "mmap_size": 268435456,  # 256 MB
+    "temp_store": "MEMORY",
+    "busy_timeout": 30000,  # ms to wait for a lock instead of "database is locked"
+}
 
-def init_database(db_url: str, echo: bool = False) -> None:
+
+def init_database(
+    db_url: str,
+    echo: bool = False,
+    sqlite_pragmas: Optional[Dict[str, Any]] = None,
+    pool_size: int = 5,
+    max_overflow: int = 10
+) -> None:
     """
     Initialize database engine and session maker.
     
     Args:
         db_url: Database URL (e.g., 'sqlite+aiosqlite:///data/metrics.db')
         echo: Whether to echo SQL statements
+        sqlite_pragmas: PRAGMA overrides merged into DEFAULT_SQLITE_PRAGMAS
+            (a value of None removes the pragma)
+        pool_size: Persistent connections kept in the pool
+        max_overflow: Extra connections allowed under load
     """
     global engine, async_session_maker
     
@@ -31,11 +54,31 @@ def init_database(db_url: str, echo: bool = False) -> None:
     
     logger.info(f"Initializing database: {db_url}")
     
-    engine = create_async_engine(
-        db_url,
-        echo=echo,
-        future=True
-    )
+    if db_url.startswith("sqlite") and (":memory:" in db_url or db_url.endswith("://")):
+        # In-memory database lives in a single shared connection
+        engine = create_async_engine(
+            db_url,
+            echo=echo,
+            future=True,
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False}
+        )
+    else:
+        # Pool of reused connections: with WAL readers run next to the single
+        # writer, busy_timeout makes concurrent writers wait instead of failing
+        engine = create_async_engine(
+            db_url,
+            echo=echo,
+            future=True,
+            pool_size=pool_size,
+            max_overflow=max_overflow
+        )
+    
+    if db_url.startswith("sqlite"):
+        pragmas = {**DEFAULT_SQLITE_PRAGMAS, **(sqlite_pragmas or {})}
+        pragmas = {name: value for name, value in pragmas.items() if value is not None}
+        _install_sqlite_pragmas(engine, pragmas)
+        logger.info(f"SQLite profile: {pragmas}")
     
     async_session_maker = async_sessionmaker(
         engine,
@@ -46,6 +89,19 @@ def init_database(db_url: str, echo: bool = False) -> None:
     logger.info("Database engine initialized")
 
 
+def _install_sqlite_pragmas(async_engine: Any, pragmas: Dict[str, Any]) -> None:
+    """Execute PRAGMA statements on every new DBAPI connection."""
+    
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
 async def init_db() -> None:
     """Create all tables in the database."""
     if engine is None:
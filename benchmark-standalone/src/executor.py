@@ -3,9 +3,28 @@ Mock Tool Executor - локальное выполнение tools для benchm
 
 Адаптировано из codelab-ai-service/benchmark/scripts/mock_tool_executor.py
 """
+import asyncio
 import logging
+import os
+import re
+import tempfile
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
+
+from .code_index import CodeIndex
+from .file_reader import ReadError, read_range
+from .patch import (
+    FilePatch,
+    PatchError,
+    apply_hunks,
+    check_deletion,
+    is_search_replace,
+    parse_search_replace,
+    parse_unified_diff,
+)
+from .process import CommandRunner
+from .tree_snapshot import TreeSnapshot
+from .workspace import Workspace
 
 logger = logging.getLogger("benchmark.executor")
 
@@ -18,14 +37,47 @@ class MockToolExecutor:
     позволяя агентам создавать/изменять файлы для валидации.
     """
     
-    def __init__(self, workspace_path: Path):
+    # search_in_code defaults and upper bounds for agent-supplied limits
+    SEARCH_CONTEXT_LINES = 2
+    SEARCH_MAX_CONTEXT_LINES = 10
+    SEARCH_MAX_RESULTS = 100
+    SEARCH_MAX_RESULTS_LIMIT = 1000
+    SEARCH_MAX_BYTES = 64 * 1024
+    
+    # read_file chunk size: default and upper bound for agent-supplied max_bytes
+    READ_MAX_BYTES = 256 * 1024
+    READ_MAX_BYTES_LIMIT = 4 * 1024 * 1024
+    
+    # Commands that may rewrite project sources in place: `dart format`, `dart fix --apply`,
+    # `flutter pub run build_runner ...`
+    SOURCE_WRITING_COMMANDS = {'format', 'fix', 'run'}
+    
+    def __init__(
+        self,
+        workspace_path: Path,
+        workspace: Optional[Workspace] = None,
+        command_runner: Optional[CommandRunner] = None,
+        code_index: Optional[CodeIndex] = None,
+        tree: Optional[TreeSnapshot] = None
+    ):
         """
         Initialize mock executor.
         
         Args:
             workspace_path: Path to test_project workspace
+            workspace: Optional isolated workspace backing workspace_path
+            command_runner: Runner for execute_command, shared to limit concurrent commands
+            code_index: Search index of workspace_path kept from previous tasks
+            tree: Tree snapshot of workspace_path for list_files, shared with the validator
         """
         self.workspace_path = workspace_path
+        self.workspace = workspace
+        self.command_runner = command_runner or CommandRunner()
+        self.tree = tree or TreeSnapshot(workspace_path)
+        self.code_index = code_index or CodeIndex(workspace_path, tree=self.tree)
+        # The tree may have changed since they were last used (workspace reset)
+        self.code_index.mark_stale()
+        self.tree.mark_stale()
         
         if not self.workspace_path.exists():
             logger.warning(f"Workspace not found: {self.workspace_path}")
@@ -40,7 +92,7 @@ class MockToolExecutor:
         Args:
             tool_name: Name of tool to execute
             arguments: Tool arguments
-            
+        
         Returns:
             Tool execution result
         """
@@ -89,31 +141,44 @@ class MockToolExecutor:
         full_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Write file and ensure it's flushed to disk
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-            f.flush()
-            import os
-            os.fsync(f.fileno())
+        self._write_atomic(full_path, content)
+        self.tree.update(path)
+        await self.code_index.update(path)
         
-        # Show file content preview
-        lines = content.split('\n')
-        preview = '\n'.join(lines[:10])
-        if len(lines) > 10:
-            preview += f"\n... ({len(lines) - 10} more lines)"
-        
-        logger.info(f"📝 {action} file: {path} ({len(content)} bytes, {len(lines)} lines)")
-        logger.info(f"📄 Content preview:\n{preview}")
+        lines = content.count('\n') + 1
+        logger.info(f"📝 {action} file: {path} ({len(content)} bytes, {lines} lines)")
+        logger.info(f"📄 Content preview:\n{self._preview(content, 10)}")
         
         return {
             "success": True,
             "message": f"File {action.lower()}: {path}",
             "path": path,
             "size": len(content),
-            "lines": len(lines)
+            "lines": lines
         }
     
+    def _write_atomic(self, full_path: Path, content: str) -> None:
+        """
+        Write file through a temporary file and rename.
+        
+        Replacing the directory entry instead of truncating the file keeps
+        hardlinked workspace files from writing through to the base project.
+        """
+        mode = full_path.stat().st_mode & 0o777 if full_path.exists() else 0o644
+        fd, tmp_path = tempfile.mkstemp(dir=full_path.parent, prefix=f".{full_path.name}.")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    
     async def _read_file(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Read file tool."""
+        """Read file tool (whole file, line range or byte offset, in bounded chunks)."""
         path = args.get('path', '')
         
         if not path:
@@ -121,7 +186,7 @@ class MockToolExecutor:
         
         full_path = self.workspace_path / path
         
-        if not full_path.exists():
+        if not full_path.is_file():
             logger.warning(f"📂 File not found: {path}")
             return {
                 "success": False,
@@ -129,35 +194,119 @@ class MockToolExecutor:
             }
         
         try:
-            content = full_path.read_text(encoding='utf-8')
-            lines = content.split('\n')
-            
-            # Show file content preview
-            preview = '\n'.join(lines[:5])
-            if len(lines) > 5:
-                preview += f"\n... ({len(lines) - 5} more lines)"
-            
-            logger.info(f"📖 Read file: {path} ({len(content)} bytes, {len(lines)} lines)")
-            logger.debug(f"📄 Content preview:\n{preview}")
-            
-            return {
-                "success": True,
-                "content": content,
-                "path": path,
-                "size": len(content),
-                "lines": len(lines)
-            }
+            start_line = self._optional_int(args, 'start_line')
+            end_line = self._optional_int(args, 'end_line')
+            offset = self._optional_int(args, 'offset')
+            max_bytes = self._optional_int(args, 'max_bytes') or self.READ_MAX_BYTES
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        
+        try:
+            chunk = await asyncio.to_thread(
+                read_range,
+                full_path,
+                min(max(max_bytes, 1), self.READ_MAX_BYTES_LIMIT),
+                start_line=start_line,
+                end_line=end_line,
+                offset=offset,
+                continuation=args.get('continuation')
+            )
+        except ReadError as e:
+            return {"success": False, "error": str(e), "path": path}
         except Exception as e:
             logger.error(f"❌ Error reading file {path}: {e}")
             return {
                 "success": False,
                 "error": f"Error reading file: {str(e)}"
             }
+        
+        content = chunk["content"]
+        lines = content.count('\n') + 1
+        
+        range_str = ""
+        if chunk["start_line"] is not None and (chunk["truncated"] or chunk["start_line"] > 1):
+            range_str = f", lines {chunk['start_line']}-{chunk['end_line']}"
+        elif chunk["offset"]:
+            range_str = f", bytes {chunk['offset']}-{chunk['end_offset']}"
+        logger.info(
+            f"📖 Read file: {path} ({len(content)} of {chunk['file_size']} bytes{range_str}"
+            + (", truncated" if chunk["truncated"] else "") + ")"
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"📄 Content preview:\n{self._preview(content, 5)}")
+        
+        return {
+            "success": True,
+            "content": content,
+            "path": path,
+            "size": len(content),
+            "lines": lines,
+            "start_line": chunk["start_line"],
+            "end_line": chunk["end_line"],
+            "offset": chunk["offset"],
+            "end_offset": chunk["end_offset"],
+            "file_size": chunk["file_size"],
+            "truncated": chunk["truncated"],
+            "continuation": chunk["continuation"]
+        }
+    
+    @staticmethod
+    def _optional_int(args: Dict[str, Any], name: str) -> Optional[int]:
+        """
+        Integer tool argument or None.
+        
+        Raises:
+            ValueError: If the argument is not an integer
+        """
+        value = args.get(name)
+        if value is None or value == '':
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"'{name}' must be an integer, got: {value!r}") from None
+    
+    @staticmethod
+    def _flag(args: Dict[str, Any], name: str, default: bool = False) -> bool:
+        """
+        Boolean tool argument.
+        
+        Models often pass booleans as strings: "false" and "0" must not count as true.
+        """
+        value = args.get(name)
+        if value is None:
+            return default
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return bool(value)
+    
+    @staticmethod
+    def _preview(content: str, max_lines: int) -> str:
+        """First lines of content, without splitting all of it."""
+        head = content.split('\n', max_lines)
+        preview = '\n'.join(head[:max_lines])
+        if len(head) > max_lines:
+            remaining = content.count('\n') + 1 - max_lines
+            preview += f"\n... ({remaining} more lines)"
+        return preview
     
     async def _list_files(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """List files tool."""
         path = args.get('path', '.')
-        recursive = args.get('recursive', False)
+        recursive = self._flag(args, 'recursive')
+        
+        # Answered from the tree snapshot; paths outside it (ignored dirs, files)
+        # are listed directly
+        files = self.tree.list_files(path, recursive=recursive)
+        if files is not None:
+            logger.info(
+                f"📂 Listed {len(files)} files {'recursively' if recursive else 'in'} {path}"
+            )
+            return {
+                "success": True,
+                "files": files,
+                "count": len(files)
+            }
         
         full_path = self.workspace_path / path
         
@@ -204,11 +353,28 @@ class MockToolExecutor:
             }
     
     async def _search_in_code(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Search in code tool."""
+        """Search in code tool (substring or regex, answered from the code index)."""
         # Tool registry uses 'query' parameter, but also support 'pattern' for compatibility
         pattern = args.get('query', args.get('pattern', args.get('regex', '')))
         path = args.get('path', '.')
         file_pattern = args.get('file_pattern', '*.dart')
+        is_regex = self._flag(args, 'is_regex', 'query' not in args and 'pattern' not in args)
+        
+        try:
+            context_lines = min(
+                max(int(args.get('context_lines', self.SEARCH_CONTEXT_LINES)), 0),
+                self.SEARCH_MAX_CONTEXT_LINES
+            )
+            max_results = min(
+                max(int(args.get('max_results', self.SEARCH_MAX_RESULTS)), 1),
+                self.SEARCH_MAX_RESULTS_LIMIT
+            )
+            max_bytes = max(int(args.get('max_bytes', self.SEARCH_MAX_BYTES)), 1)
+        except (TypeError, ValueError):
+            return {
+                "success": False,
+                "error": "context_lines, max_results and max_bytes must be integers"
+            }
         
         if not pattern or pattern == 'False' or pattern == '':
             logger.warning(f"Invalid search pattern: '{pattern}', args: {args}")
@@ -224,20 +390,26 @@ class MockToolExecutor:
             return {"success": False, "error": f"Path not found: {path}"}
         
         try:
-            results = []
+            try:
+                found = await self.code_index.search(
+                    pattern,
+                    is_regex=is_regex,
+                    path=path,
+                    file_pattern=file_pattern,
+                    context_lines=context_lines,
+                    max_results=max_results,
+                    max_bytes=max_bytes
+                )
+            except re.error as e:
+                return {"success": False, "error": f"Invalid regex '{pattern}': {e}"}
             
-            # Simple text search (not regex for simplicity)
-            for file_path in full_path.rglob(file_pattern):
-                if file_path.is_file():
-                    try:
-                        content = file_path.read_text(encoding='utf-8')
-                        if pattern in content:
-                            rel_path = str(file_path.relative_to(self.workspace_path))
-                            results.append(rel_path)
-                    except Exception:
-                        pass
+            matches = found["matches"]
+            results = list(dict.fromkeys(match["path"] for match in matches))
             
-            logger.info(f"🔍 Search found {len(results)} matches for '{pattern}' in {path}")
+            logger.info(
+                f"🔍 Search found {len(matches)} lines in {len(results)} files "
+                f"for '{pattern}' in {path}" + (" (truncated)" if found["truncated"] else "")
+            )
             if results:
                 logger.debug(f"📄 Matches: {', '.join(results[:3])}" +
                            (f" ... and {len(results)-3} more" if len(results) > 3 else ""))
@@ -246,7 +418,12 @@ class MockToolExecutor:
                 "success": True,
                 "results": results,
                 "count": len(results),
-                "pattern": pattern
+                "matches": matches,
+                "match_count": len(matches),
+                "truncated": found["truncated"],
+                "skipped": found["skipped"],
+                "pattern": pattern,
+                "regex": is_regex
             }
         except Exception as e:
             logger.error(f"❌ Error searching in {path}: {e}")
@@ -256,22 +433,115 @@ class MockToolExecutor:
             }
     
     async def _apply_diff(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Apply diff tool (simplified implementation)."""
+        """Apply diff tool (unified diff or SEARCH/REPLACE blocks, all hunks or none)."""
         path = args.get('path', '')
+        diff = args.get('diff', args.get('patch', ''))
         
         if not path:
             return {"success": False, "error": "Missing 'path' argument"}
+        if not diff:
+            return {"success": False, "error": "Missing 'diff' argument"}
+        
+        full_path = self.workspace_path / path
+        creates = deletes = False
+        
+        try:
+            search_replace = is_search_replace(diff)
+            if search_replace:
+                hunks = parse_search_replace(diff)
+            else:
+                file_patch = self._select_file_patch(parse_unified_diff(diff), path)
+                hunks = file_patch.hunks
+                creates, deletes = file_patch.creates, file_patch.deletes
+        except PatchError as e:
+            logger.warning(f"⚠️ Invalid diff for {path}: {e}")
+            return {"success": False, "error": f"Invalid diff: {e}", "path": path}
+        
+        exists = full_path.is_file()
+        if not exists and not creates:
+            return {"success": False, "error": f"File not found: {path}", "path": path}
+        if exists and creates and full_path.stat().st_size > 0:
+            return {"success": False, "error": f"File already exists: {path}", "path": path}
+        
+        content = ""
+        if exists:
+            # newline='' keeps CRLF files as they are
+            with open(full_path, 'r', encoding='utf-8', newline='') as f:
+                content = f.read()
+        
+        if deletes:
+            # Deleted only if the diff removes exactly what the file contains
+            result = check_deletion(content, hunks)
+        else:
+            result = await asyncio.to_thread(apply_hunks, content, hunks, search_replace)
+        
+        if not result.success:
+            # A delete patch without hunks is rejected as one hunk
+            total = max(len(hunks), len(result.rejected))
+            logger.warning(
+                f"❌ Diff rejected for {path}: {len(result.rejected)} of {total} hunks, "
+                f"file unchanged"
+            )
+            return {
+                "success": False,
+                "error": (
+                    f"{len(result.rejected)} of {total} hunks did not apply, "
+                    f"file unchanged"
+                ),
+                "path": path,
+                "applied": result.applied,
+                "rejected": result.rejected
+            }
         
-        # Simplified: just acknowledge the diff
-        # Real implementation would parse and apply the diff
-        logger.info(f"Diff applied to: {path}")
+        if deletes:
+            full_path.unlink()
+            self.tree.update(path)
+            await self.code_index.update(path)
+            logger.info(f"🗑️  Diff deleted file: {path}")
+            return {"success": True, "message": f"File deleted: {path}", "path": path}
+        
+        if result.content != content or not exists:
+            full_path.parent.mkdir(parents=True, exist_ok=True)
+            self._write_atomic(full_path, result.content)
+            self.tree.update(path)
+            await self.code_index.update(path)
+        
+        fuzzy = sum(1 for h in result.applied if h["fuzz"] or h["whitespace_insensitive"])
+        logger.info(
+            f"🩹 Diff applied to: {path} ({len(hunks)} hunks, +{result.lines_added} "
+            f"-{result.lines_removed} lines" + (f", {fuzzy} fuzzy" if fuzzy else "") + ")"
+        )
         
         return {
             "success": True,
             "message": f"Diff applied to: {path}",
-            "path": path
+            "path": path,
+            "hunks": len(result.applied),
+            "lines_added": result.lines_added,
+            "lines_removed": result.lines_removed,
+            "applied": result.applied
         }
     
+    @staticmethod
+    def _select_file_patch(patches: List[FilePatch], path: str) -> FilePatch:
+        """
+        Patch of the target file from a unified diff.
+        
+        Raises:
+            PatchError: If the diff changes other files only or several files
+        """
+        if len(patches) == 1:
+            return patches[0]
+        
+        target = os.path.normpath(path)
+        for file_patch in patches:
+            for candidate in (file_patch.new_path, file_patch.old_path):
+                if candidate and os.path.normpath(candidate) == target:
+                    return file_patch
+        
+        paths = ", ".join(p.new_path or p.old_path or "?" for p in patches)
+        raise PatchError(f"diff changes several files ({paths}), none is {path}")
+    
     async def _create_directory(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Create directory tool."""
         path = args.get('path', '')
@@ -285,6 +555,8 @@ class MockToolExecutor:
         
         try:
             full_path.mkdir(parents=True, exist_ok=True)
+            self.tree.update(path)
+            await self.code_index.update(path)
             
             icon = "📁" if dir_exists else "✨"
             logger.info(f"{icon} {action} directory: {path}")
@@ -331,40 +603,52 @@ class MockToolExecutor:
             }
         
         try:
-            import subprocess
+            # Toolchain caches are copied up before the first command, only commands
+            # rewriting sources in place need a private copy of the whole tree
+            if self.workspace and self._rewrites_sources(command_parts):
+                await asyncio.to_thread(self.workspace.detach)
+            elif self.workspace:
+                await asyncio.to_thread(self.workspace.privatize)
             
             full_cwd = self.workspace_path / cwd if cwd != '.' else self.workspace_path
             
-            result = subprocess.run(
-                command_parts,
-                cwd=str(full_cwd),
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            # Runs as an asyncio subprocess: other tasks keep talking to Gateway meanwhile
+            result = await self.command_runner.run(command_parts, cwd=full_cwd)
+            self.code_index.mark_stale()
+            self.tree.mark_stale()
+            
+            if result.timed_out:
+                logger.warning(f"⏱️  Command timed out: {command} ({result.duration:.1f}s)")
+                return {
+                    "success": False,
+                    "error": f"Command timed out after {self.command_runner.timeout}s",
+                    "stdout": result.stdout,
+                    "stderr": result.stderr
+                }
             
             # Log command result with preview
-            success_icon = "✅" if result.returncode == 0 else "❌"
-            logger.info(f"{success_icon} Executed command: {command} (return_code={result.returncode})")
+            success_icon = "✅" if result.success else "❌"
+            logger.info(
+                f"{success_icon} Executed command: {command} "
+                f"(return_code={result.return_code}, {result.duration:.2f}s)"
+            )
             
             if result.stdout:
                 stdout_preview = result.stdout[:200].replace('\n', ' ')
-                logger.info(f"   stdout: {stdout_preview}{'...' if len(result.stdout) > 200 else ''}")
+                ellipsis = '...' if len(result.stdout) > 200 else ''
+                logger.info(f"   stdout: {stdout_preview}{ellipsis}")
             
             if result.stderr:
                 stderr_preview = result.stderr[:200].replace('\n', ' ')
-                logger.warning(f"   stderr: {stderr_preview}{'...' if len(result.stderr) > 200 else ''}")
+                ellipsis = '...' if len(result.stderr) > 200 else ''
+                logger.warning(f"   stderr: {stderr_preview}{ellipsis}")
             
             return {
-                "success": result.returncode == 0,
+                "success": result.success,
                 "stdout": result.stdout,
                 "stderr": result.stderr,
-                "return_code": result.returncode
-            }
-        except subprocess.TimeoutExpired:
-            return {
-                "success": False,
-                "error": "Command timed out"
+                "return_code": result.return_code,
+                "truncated": result.truncated
             }
         except Exception as e:
             logger.error(f"❌ Error executing command {command}: {e}")
@@ -372,3 +656,7 @@ class MockToolExecutor:
                 "success": False,
                 "error": f"Error executing command: {str(e)}"
             }
+    
+    def _rewrites_sources(self, command_parts: List[str]) -> bool:
+        """Whether a toolchain command may write project sources in place."""
+        return any(part in self.SOURCE_WRITING_COMMANDS for part in command_parts[:3])
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Fake Analyzer - заменитель Dart analysis server для тестов без Dart SDK.
+
+Говорит на том же stdio протоколе (JSON сообщение на строку), что и
+`dart language-server --protocol=analyzer`, поддерживая запросы, которые
+использует DartAnalysisServer: server.getVersion, analysis.setAnalysisRoots,
+analysis.updateContent, analysis.getErrors и server.shutdown.
+
+Вместо анализа Dart выполняется простая синтаксическая проверка: парность
+скобок и незакрытые строки/комментарии.
+
+Модуль не зависит от пакета src и запускается как скрипт:
+    python src/fake_analyzer.py
+"""
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+VERSION = "fake-1.0.0"
+
+BRACKETS = {")": "(", "]": "[", "}": "{"}
+
+
+def _error(content: str, offset: int, code: str, message: str) -> Dict[str, Any]:
+    """Build AnalysisError at offset."""
+    line = content.count("\n", 0, offset) + 1
+    column = offset - (content.rfind("\n", 0, offset) + 1) + 1
+    return {
+        "severity": "ERROR",
+        "type": "SYNTACTIC_ERROR",
+        "location": {
+            "file": "",
+            "offset": offset,
+            "length": 1,
+            "startLine": line,
+            "startColumn": column,
+        },
+        "message": message,
+        "code": code,
+    }
+
+
+def check_dart_syntax(content: str) -> List[Dict[str, Any]]:
+    """
+    Find unbalanced brackets and unterminated strings or comments.
+    
+    Args:
+        content: Dart source
+    
+    Returns:
+        Errors in analysis server format (location.file is left empty)
+    """
+    errors = []
+    stack = []
+    i = 0
+    length = len(content)
+    
+    while i < length:
+        char = content[i]
+        
+        if content.startswith("//", i):
+            end = content.find("\n", i)
+            i = length if end == -1 else end
+            continue
+        
+        if content.startswith("/*", i):
+            end = content.find("*/", i + 2)
+            if end == -1:
+                errors.append(_error(content, i, "unterminated_multi_line_comment",
+                                     "Unterminated multi-line comment."))
+                break
+            i = end + 2
+            continue
+        
+        if char in ("'", '"'):
+            raw = i > 0 and content[i - 1] == "r"
+            quote = content[i:i + 3] if content[i:i + 3] == char * 3 else char
+            j = i + len(quote)
+            while j < length:
+                if content.startswith(quote, j):
+                    break
+                if content[j] == "\\" and not raw:
+                    j += 2
+                    continue
+                if content[j] == "\n" and len(quote) == 1:
+                    j = length
+                    break
+                j += 1
+            if j >= length:
+                errors.append(_error(content, i, "unterminated_string_literal",
+                                     "Unterminated string literal."))
+                i = content.find("\n", i) if len(quote) == 1 else length
+                i = length if i == -1 else i
+                continue
+            i = j + len(quote)
+            continue
+        
+        if char in "([{":
+            stack.append((char, i))
+        elif char in BRACKETS:
+            if stack and stack[-1][0] == BRACKETS[char]:
+                stack.pop()
+            else:
+                errors.append(_error(content, i, "unexpected_token", f"Unexpected text '{char}'."))
+        i += 1
+    
+    for bracket, offset in stack:
+        errors.append(_error(content, offset, "expected_token", f"Unclosed '{bracket}'."))
+    
+    return errors
+
+
+class FakeAnalysisServer:
+    """Request handlers of the fake server."""
+    
+    def __init__(self):
+        self.roots: List[str] = []
+        self.overlays: Dict[str, str] = {}
+    
+    def handle(self, method: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Handle request.
+        
+        Args:
+            method: Protocol method
+            params: Request params
+        
+        Returns:
+            Result object
+        
+        Raises:
+            KeyError: Unknown method
+        """
+        if method == "server.getVersion":
+            return {"version": VERSION}
+        if method == "analysis.setAnalysisRoots":
+            self.roots = list(params.get("included", []))
+            return {}
+        if method == "analysis.updateContent":
+            for path, change in params.get("files", {}).items():
+                if change.get("type") == "add":
+                    self.overlays[path] = change.get("content", "")
+                elif change.get("type") == "remove":
+                    self.overlays.pop(path, None)
+            return {}
+        if method == "analysis.getErrors":
+            path = params["file"]
+            content = self.overlays.get(path)
+            if content is None:
+                with open(path, "r", encoding="utf-8") as f:
+                    content = f.read()
+            errors = check_dart_syntax(content)
+            for error in errors:
+                error["location"]["file"] = path
+            return {"errors": errors}
+        if method == "server.shutdown":
+            return {}
+        raise KeyError(method)
+
+
+def main() -> None:
+    """Serve requests from stdin until server.shutdown or EOF."""
+    server = FakeAnalysisServer()
+    
+    def send(message: Dict[str, Any]) -> None:
+        sys.stdout.write(json.dumps(message) + "\n")
+        sys.stdout.flush()
+    
+    send({"event": "server.connected", "params": {"version": VERSION, "pid": os.getpid()}})
+    
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        request_id = request.get("id")
+        method = request.get("method", "")
+        try:
+            result = server.handle(method, request.get("params") or {})
+            send({"id": request_id, "result": result})
+        except KeyError:
+            send({"id": request_id, "error": {"code": "UNKNOWN_REQUEST", "message": method}})
+        except OSError as e:
+            error = {"code": "GET_ERRORS_INVALID_FILE", "message": str(e)}
+            send({"id": request_id, "error": error})
+        
+        if method == "server.shutdown":
+            return
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+File Reader - чтение файлов частями для read_file.
+
+Большой файл не отправляется одним JSON кадром: ответ ограничен max_bytes,
+а продолжение запрашивается по continuation токену. Поддерживаются
+диапазоны строк (start_line/end_line) и смещения в байтах. Диапазоны
+вырезаются из mmap файла, поэтому в памяти оказывается только нужный
+фрагмент. Фрагменты режутся по концу строки (если строка не длиннее
+лимита) и всегда по границе UTF-8 символа.
+
+Токен привязан к mtime/size файла: если файл изменился между запросами,
+чтение продолжения отклоняется.
+"""
+import base64
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+class ReadError(ValueError):
+    """Invalid range or continuation token."""
+
+
+def encode_token(offset: int, line: Optional[int], end: int, signature: Tuple[int, int]) -> str:
+    """
+    Continuation token for the rest of a range.
+    
+    Args:
+        offset: Byte offset of the next chunk
+        line: Line number at offset (None if unknown)
+        end: Byte offset where the requested range ends
+        signature: (mtime_ns, size) of the file when the chunk was read
+    
+    Returns:
+        Opaque URL-safe token
+    """
+    payload = json.dumps([offset, line, end, signature[0], signature[1]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("ascii")).decode("ascii")
+
+
+def decode_token(token: str) -> Tuple[int, Optional[int], int, Tuple[int, int]]:
+    """
+    Parse continuation token.
+    
+    Raises:
+        ReadError: If the token is malformed
+    """
+    try:
+        offset, line, end, mtime_ns, size = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return int(offset), line, int(end), (int(mtime_ns), int(size))
+    except (ValueError, TypeError) as e:
+        raise ReadError(f"Invalid continuation token: {token!r}") from e
+
+
+def _char_start(buffer: mmap.mmap, offset: int) -> int:
+    """Nearest offset at or after `offset` that starts a UTF-8 character."""
+    while offset < len(buffer) and 0x80 <= buffer[offset] < 0xC0:
+        offset += 1
+    return offset
+
+
+def _char_end(buffer: mmap.mmap, start: int, end: int) -> int:
+    """Nearest offset at or before `end` (but after start) that ends a UTF-8 character."""
+    cut = end
+    while cut > start and cut < len(buffer) and 0x80 <= buffer[cut] < 0xC0:
+        cut -= 1
+    return cut if cut > start else end
+
+
+def _line_offset(buffer: mmap.mmap, line: int) -> int:
+    """Byte offset of a line start (1-based), len(buffer) past the last line."""
+    offset = 0
+    for _ in range(line - 1):
+        newline = buffer.find(b"\n", offset)
+        if newline == -1:
+            return len(buffer)
+        offset = newline + 1
+    return offset
+
+
+def read_range(
+    path: Path,
+    max_bytes: int,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    offset: Optional[int] = None,
+    continuation: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Read part of a file.
+    
+    Args:
+        path: File path
+        max_bytes: Maximum bytes of content returned
+        start_line: First line (1-based)
+        end_line: Last line, inclusive
+        offset: Byte offset to start at (instead of start_line)
+        continuation: Token from a previous truncated result (other range arguments ignored)
+    
+    Returns:
+        Dict with "content", "start_line"/"end_line" (None if unknown),
+        "offset"/"end_offset" in bytes, "file_size", "truncated" and
+        "continuation" (token for the rest, None when complete)
+    
+    Raises:
+        ReadError: If the range or token is invalid or the file changed since the token
+        OSError: If the file cannot be read
+    """
+    if start_line is not None and start_line < 1:
+        raise ReadError(f"start_line must be >= 1, got {start_line}")
+    if end_line is not None and start_line is not None and end_line < start_line:
+        raise ReadError(f"end_line {end_line} is before start_line {start_line}")
+    if offset is not None and offset < 0:
+        raise ReadError(f"offset must be >= 0, got {offset}")
+    if offset is not None and end_line is not None:
+        raise ReadError("end_line cannot be combined with offset")
+    
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if stat.st_size == 0:
+            return {
+                "content": "", "start_line": 1, "end_line": 1, "offset": 0, "end_offset": 0,
+                "file_size": 0, "truncated": False, "continuation": None,
+            }
+        
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            size = len(buffer)
+            
+            if continuation:
+                start, line, end, token_signature = decode_token(continuation)
+                if token_signature != signature:
+                    raise ReadError("File changed since the previous chunk, read it again")
+            elif offset is not None:
+                start = _char_start(buffer, min(offset, size))
+                line = 1 if start == 0 else None
+                end = size
+            else:
+                line = start_line or 1
+                start = _line_offset(buffer, line)
+                if start >= size and line > 1:
+                    raise ReadError(f"start_line {line} is past the end of the file")
+                end = _line_offset(buffer, end_line + 1) if end_line is not None else size
+            
+            end = min(end, size)
+            start = min(start, end)
+            stop = min(end, start + max_bytes)
+            if stop < end:
+                # Prefer to stop after a whole line, otherwise at a character boundary
+                newline = buffer.rfind(b"\n", start, stop)
+                stop = newline + 1 if newline != -1 else _char_end(buffer, start, stop)
+            
+            content = buffer[start:stop].decode("utf-8", errors="replace")
+    
+    newlines = content.count("\n")
+    truncated = stop < end
+    last_line = None
+    if line is not None:
+        last_line = line + newlines - (1 if content.endswith("\n") and newlines else 0)
+    
+    return {
+        "content": content,
+        "start_line": line,
+        "end_line": last_line,
+        "offset": start,
+        "end_offset": stop,
+        "file_size": size,
+        "truncated": truncated,
+        "continuation": encode_token(
+            stop, line + newlines if line is not None else None, end, signature
+        ) if truncated else None,
+    }
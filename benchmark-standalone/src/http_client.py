@@ -0,0 +1,58 @@
+"""
+Shared HTTP client - один пул соединений для всех HTTP запросов к Gateway.
+
+Переиспользует TCP/TLS соединения (keep-alive) между созданием сессий,
+запросами метрик, аутентификацией и health check.
+"""
+import importlib.util
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger("benchmark.http")
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_EXPIRY = 30.0
+DEFAULT_TIMEOUT = 5.0
+
+
+def create_http_client(config: Optional[Dict[str, Any]] = None) -> httpx.AsyncClient:
+    """
+    Create long-lived, connection-pooled HTTP client.
+    
+    Args:
+        config: Optional `gateway.http` section from config.yaml:
+            max_connections, max_keepalive_connections, keepalive_expiry,
+            timeout, http2
+    
+    Returns:
+        httpx.AsyncClient to be closed with `aclose()` on shutdown
+    """
+    config = config or {}
+    
+    limits = httpx.Limits(
+        max_connections=config.get('max_connections', DEFAULT_MAX_CONNECTIONS),
+        max_keepalive_connections=config.get(
+            'max_keepalive_connections', DEFAULT_MAX_KEEPALIVE_CONNECTIONS
+        ),
+        keepalive_expiry=config.get('keepalive_expiry', DEFAULT_KEEPALIVE_EXPIRY)
+    )
+    
+    # HTTP/2 needs the optional 'h2' package
+    http2 = bool(config.get('http2', False))
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 requested but 'h2' package is not installed, using HTTP/1.1")
+        http2 = False
+    
+    logger.info(
+        f"HTTP client pool: max_connections={limits.max_connections}, "
+        f"max_keepalive={limits.max_keepalive_connections}, http2={http2}"
+    )
+    
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=config.get('timeout', DEFAULT_TIMEOUT),
+        http2=http2
+    )
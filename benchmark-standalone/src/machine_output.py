@@ -0,0 +1,240 @@
+"""
+Machine Output - разбор машиночитаемого вывода Dart/Flutter toolchain.
+
+Вывод разбирается по мере поступления (через on_output у CommandRunner),
+без накопления полного stdout:
+- `dart analyze --format=machine`: строка на диагностику
+  SEVERITY|TYPE|CODE|FILE|LINE|COLUMN|LENGTH|MESSAGE;
+- `flutter test --machine`: JSON событие на строку (testStart, testDone,
+  error, done, ...), из которых собираются результаты отдельных тестов.
+"""
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("benchmark.machine_output")
+
+ANALYZER_FIELDS = 8
+
+# Longest line kept while waiting for its end (longer lines are dropped)
+MAX_LINE_BYTES = 1024 * 1024
+
+
+class LineParser(ABC):
+    """Splits streamed output chunks into lines and parses them one by one."""
+    
+    def __init__(self):
+        """Initialize line parser."""
+        self._partial = b""
+        self.skipped_lines = 0
+    
+    def feed(self, chunk: bytes) -> None:
+        """
+        Consume output chunk.
+        
+        Args:
+            chunk: Raw bytes as read from the process
+        """
+        data = self._partial + chunk
+        lines = data.split(b"\n")
+        self._partial = lines.pop()
+        if len(self._partial) > MAX_LINE_BYTES:
+            self._partial = b""
+            self.skipped_lines += 1
+        
+        for line in lines:
+            text = line.decode("utf-8", errors="replace").strip()
+            if text:
+                self.parse_line(text)
+    
+    def close(self) -> None:
+        """Parse the last line if output did not end with a newline."""
+        if self._partial:
+            data, self._partial = self._partial, b""
+            self.feed(data + b"\n")
+    
+    def on_output(self, stream: str, chunk: bytes) -> None:
+        """CommandRunner callback: parse stdout, ignore stderr."""
+        if stream == "stdout":
+            self.feed(chunk)
+    
+    @abstractmethod
+    def parse_line(self, line: str) -> None:
+        """Handle one complete line."""
+
+
+def _split_machine_line(line: str) -> List[str]:
+    """Split analyzer machine line on unescaped '|' and unescape fields."""
+    fields = []
+    current = []
+    escaped = False
+    for char in line:
+        if escaped:
+            current.append(char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "|":
+            fields.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    fields.append("".join(current))
+    return fields
+
+
+def parse_analyzer_line(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse one `dart analyze --format=machine` line.
+    
+    Args:
+        line: Output line
+    
+    Returns:
+        Diagnostic (severity, type, code, file, line, column, length, message)
+        or None for lines that are not diagnostics
+    """
+    fields = _split_machine_line(line)
+    if len(fields) < ANALYZER_FIELDS or fields[0] not in ("ERROR", "WARNING", "INFO"):
+        return None
+    
+    severity, diagnostic_type, code, file_path, line_number, column, length = fields[:7]
+    try:
+        return {
+            "severity": severity,
+            "type": diagnostic_type,
+            "code": code.lower(),
+            "file": file_path,
+            "line": int(line_number),
+            "column": int(column),
+            "length": int(length),
+            "message": "|".join(fields[7:]),
+        }
+    except ValueError:
+        return None
+
+
+class AnalyzerOutputParser(LineParser):
+    """
+    Collects diagnostics from `dart analyze --format=machine`.
+    
+    Usage:
+        parser = AnalyzerOutputParser()
+        await runner.run(["dart", "analyze", "--format=machine", path], cwd=root,
+                         on_output=parser.on_output, capture=False)
+        parser.close()
+        errors = parser.errors_for(path)
+    """
+    
+    def __init__(self):
+        """Initialize analyzer output parser."""
+        super().__init__()
+        self.diagnostics: List[Dict[str, Any]] = []
+    
+    def parse_line(self, line: str) -> None:
+        diagnostic = parse_analyzer_line(line)
+        if diagnostic is not None:
+            self.diagnostics.append(diagnostic)
+    
+    def errors_for(self, file_path: str) -> List[Dict[str, Any]]:
+        """
+        ERROR diagnostics of one file.
+        
+        Args:
+            file_path: File path (compared after normalization)
+        
+        Returns:
+            Diagnostics with severity ERROR reported for the file
+        """
+        target = os.path.normpath(os.path.abspath(file_path))
+        return [
+            d for d in self.diagnostics
+            if d["severity"] == "ERROR" and os.path.normpath(os.path.abspath(d["file"])) == target
+        ]
+
+
+class TestOutputParser(LineParser):
+    """
+    Collects per-test results from `flutter test --machine` events.
+    
+    Hidden tests (suite loading) are reported by flutter as tests too; they
+    count only when they fail, e.g. a test file that does not compile.
+    """
+    
+    def __init__(self):
+        """Initialize test event parser."""
+        super().__init__()
+        self.success: Optional[bool] = None
+        self._tests: Dict[int, Dict[str, Any]] = {}
+        self._suites: Dict[int, str] = {}
+    
+    def parse_line(self, line: str) -> None:
+        # Non-JSON lines (build output, prints) are ignored
+        if not line.startswith("{"):
+            return
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            return
+        if isinstance(event, dict):
+            self._handle_event(event)
+    
+    def _handle_event(self, event: Dict[str, Any]) -> None:
+        """Update state from one test event."""
+        event_type = event.get("type")
+        
+        if event_type == "suite":
+            suite = event.get("suite", {})
+            self._suites[suite.get("id")] = suite.get("path") or ""
+        elif event_type == "testStart":
+            test = event.get("test", {})
+            self._tests[test.get("id")] = {
+                "name": test.get("name", ""),
+                "suite": self._suites.get(test.get("suiteID"), ""),
+                "result": None,
+                "skipped": False,
+                "hidden": False,
+                "started_ms": event.get("time", 0),
+                "duration_ms": None,
+                "error": None,
+            }
+        elif event_type == "error":
+            test = self._tests.get(event.get("testID"))
+            if test is not None and test["error"] is None:
+                test["error"] = event.get("error", "")
+        elif event_type == "testDone":
+            test = self._tests.get(event.get("testID"))
+            if test is not None:
+                test["result"] = event.get("result")
+                test["skipped"] = event.get("skipped", False)
+                test["hidden"] = event.get("hidden", False)
+                test["duration_ms"] = event.get("time", 0) - test["started_ms"]
+        elif event_type == "done":
+            self.success = event.get("success")
+    
+    @property
+    def tests(self) -> List[Dict[str, Any]]:
+        """
+        Test records: name, suite, result, skipped, duration_ms, error.
+        
+        result is "success", "failure", "error" or None (did not finish).
+        """
+        return [
+            {key: value for key, value in test.items() if key not in ("started_ms", "hidden")}
+            for test in self._tests.values()
+            if not test["hidden"] or test["result"] not in ("success", None)
+        ]
+    
+    def get_summary(self) -> Dict[str, Any]:
+        """Counts of passed, failed, skipped and unfinished tests."""
+        tests = self.tests
+        return {
+            "total": len(tests),
+            "passed": sum(1 for t in tests if t["result"] == "success" and not t["skipped"]),
+            "failed": sum(1 for t in tests if t["result"] in ("failure", "error")),
+            "skipped": sum(1 for t in tests if t["skipped"]),
+            "unfinished": sum(1 for t in tests if t["result"] is None),
+            "success": self.success,
+        }
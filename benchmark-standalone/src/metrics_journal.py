@@ -0,0 +1,130 @@
+"""
+Metrics Journal - журнал строк буферизованного MetricsCollector.
+
+Строка дописывается в журнал коллектора до того, как record_* вернет ее ID,
+поэтому падение процесса не теряет подтвержденные строки: при следующем
+запуске журналы воспроизводятся в базу (replay). Строки, которые уже успели
+попасть в базу, при воспроизведении пропускаются по ID. Журнал удаляется
+после flush, когда у коллектора не осталось несохраненных строк.
+
+Запись идет в ОС без fsync: строки переживают падение процесса, но не
+операционной системы (как и коммиты SQLite с synchronous=NORMAL).
+"""
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from sqlalchemy import DateTime
+
+logger = logging.getLogger("benchmark.metrics_journal")
+
+JOURNAL_SUFFIX = ".jsonl"
+
+
+class MetricsJournal:
+    """
+    Append-only journal of one collector's unflushed rows.
+    
+    Usage:
+        journal = MetricsJournal(Path("data/metrics_journal"))
+        journal.append(ToolCall, values)   # before the row ID is returned
+        ...
+        journal.discard()                  # once every row is committed
+    """
+    
+    def __init__(self, directory: Path):
+        """
+        Initialize journal (the file is created on the first append).
+        
+        Args:
+            directory: Directory shared by the journals of all collectors
+        """
+        self.directory = directory
+        self.path = directory / f"{uuid.uuid4()}{JOURNAL_SUFFIX}"
+        self._file: Optional[Any] = None
+    
+    def append(self, model: Type[Any], values: Dict[str, Any]) -> None:
+        """
+        Write row to the journal.
+        
+        Args:
+            model: ORM model class
+            values: Column values including the client-generated ID
+        
+        Raises:
+            OSError: If the journal cannot be written
+        """
+        if self._file is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        
+        record = {"table": model.__tablename__, "values": values}
+        self._file.write(json.dumps(record, default=_encode) + "\n")
+        # Hand the line to the OS now: a crash after this point keeps it
+        self._file.flush()
+    
+    def discard(self) -> None:
+        """Remove journal after every row in it was committed."""
+        if self._file is None:
+            return
+        
+        self._file.close()
+        self._file = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+    
+    @staticmethod
+    def pending(directory: Path) -> List[Path]:
+        """Journals left by collectors that did not flush (crashed runs)."""
+        if not directory.is_dir():
+            return []
+        return sorted(directory.glob(f"*{JOURNAL_SUFFIX}"))
+    
+    @staticmethod
+    def read(
+        path: Path,
+        models: Dict[str, Type[Any]]
+    ) -> Iterator[Tuple[Type[Any], Dict[str, Any]]]:
+        """
+        Rows of a journal file.
+        
+        A torn last line (crash in the middle of a write) is skipped: its
+        row was never acknowledged.
+        
+        Args:
+            path: Journal file
+            models: ORM model classes by table name
+        
+        Yields:
+            (model, values) with datetime columns decoded
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping torn journal line in {path.name}")
+                    continue
+                
+                model = models[record["table"]]
+                values = record["values"]
+                for column in model.__table__.columns:
+                    if isinstance(column.type, DateTime) and values.get(column.name):
+                        values[column.name] = datetime.fromisoformat(values[column.name])
+                yield model, values
+    
+    def __repr__(self) -> str:
+        return f"<MetricsJournal(path='{self.path}')>"
+
+
+def _encode(value: Any) -> Any:
+    """JSON encoding of values json does not know (datetimes)."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot journal value of type {type(value).__name__}")
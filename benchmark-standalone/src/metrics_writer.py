@@ -0,0 +1,230 @@
+"""
+Metrics Writer - фоновая запись метрик вне цикла обработки WebSocket сообщений.
+
+События от GatewayClient попадают в ограниченную очередь и сохраняются
+отдельной asyncio задачей через MetricsCollector.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from .collector import MetricsCollector
+
+logger = logging.getLogger("benchmark.metrics_writer")
+
+
+class MetricsWriter:
+    """
+    Background writer with a bounded queue in front of MetricsCollector.
+    
+    Exposes the same `record_*` methods as MetricsCollector, but they only
+    enqueue the event and return immediately unless the queue is full
+    (backpressure). Events are persisted in submission order.
+    
+    Usage:
+        writer = MetricsWriter(MetricsCollector(db, buffered=True))
+        writer.start()
+        await writer.record_tool_call(task_execution_id, "read_file", True, 0.1)
+        await writer.flush()   # wait until everything submitted so far is stored
+        await writer.close()   # drain and stop
+    """
+    
+    def __init__(
+        self,
+        collector: MetricsCollector,
+        queue_size: int = 10000,
+        flush_interval: Optional[float] = None
+    ):
+        """
+        Initialize metrics writer.
+        
+        Args:
+            collector: Collector used to persist events
+            queue_size: Maximum number of queued events before submitters wait
+            flush_interval: Idle seconds after which buffered rows are flushed
+                (default: collector.flush_interval)
+        """
+        self.collector = collector
+        self.flush_interval = flush_interval or collector.flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._worker: Optional[asyncio.Task] = None
+        
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.backpressure_waits = 0
+        self.backpressure_wait_seconds = 0.0
+        
+        logger.debug(f"MetricsWriter initialized: queue_size={queue_size}")
+    
+    def start(self) -> None:
+        """Start background worker task."""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run(), name="metrics-writer")
+    
+    async def record_llm_call(
+        self,
+        task_execution_id: UUID,
+        agent_type: str,
+        input_tokens: int,
+        output_tokens: int,
+        model: str,
+        duration_seconds: float
+    ) -> None:
+        """Queue LLM API call."""
+        await self._submit("record_llm_call", {
+            "task_execution_id": task_execution_id,
+            "agent_type": agent_type,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "model": model,
+            "duration_seconds": duration_seconds
+        })
+    
+    async def record_tool_call(
+        self,
+        task_execution_id: UUID,
+        tool_name: str,
+        success: bool,
+        duration_seconds: float,
+        error: Optional[str] = None
+    ) -> None:
+        """Queue tool invocation."""
+        await self._submit("record_tool_call", {
+            "task_execution_id": task_execution_id,
+            "tool_name": tool_name,
+            "success": success,
+            "duration_seconds": duration_seconds,
+            "error": error
+        })
+    
+    async def record_agent_switch(
+        self,
+        task_execution_id: UUID,
+        from_agent: Optional[str],
+        to_agent: str,
+        reason: str
+    ) -> None:
+        """Queue agent switch."""
+        await self._submit("record_agent_switch", {
+            "task_execution_id": task_execution_id,
+            "from_agent": from_agent,
+            "to_agent": to_agent,
+            "reason": reason
+        })
+    
+    async def record_quality_evaluation(
+        self,
+        task_execution_id: UUID,
+        evaluation_type: str,
+        score: Optional[float],
+        passed: bool,
+        details: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Queue quality evaluation."""
+        await self._submit("record_quality_evaluation", {
+            "task_execution_id": task_execution_id,
+            "evaluation_type": evaluation_type,
+            "score": score,
+            "passed": passed,
+            "details": details
+        })
+    
+    async def record_hallucination(
+        self,
+        task_execution_id: UUID,
+        hallucination_type: str,
+        description: str
+    ) -> None:
+        """Queue detected hallucination."""
+        await self._submit("record_hallucination", {
+            "task_execution_id": task_execution_id,
+            "hallucination_type": hallucination_type,
+            "description": description
+        })
+    
+    async def flush(self) -> None:
+        """Wait until every event submitted so far is written to the database."""
+        if self._worker is None:
+            await self.collector.flush()
+            return
+        
+        done = asyncio.get_running_loop().create_future()
+        await self._queue.put(done)
+        await done
+    
+    async def close(self) -> None:
+        """Drain the queue, flush and stop the worker."""
+        if self._worker is None:
+            return
+        
+        await self.flush()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        
+        logger.info(f"📊 Metrics writer drained: {self.get_stats()}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Writer counters including backpressure metrics."""
+        return {
+            "submitted": self.submitted,
+            "written": self.written,
+            "failed": self.failed,
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "backpressure_waits": self.backpressure_waits,
+            "backpressure_wait_seconds": round(self.backpressure_wait_seconds, 4),
+        }
+    
+    async def _submit(self, method: str, kwargs: Dict[str, Any]) -> None:
+        """Queue collector call, waiting if the queue is full."""
+        self.submitted += 1
+        item = (method, kwargs)
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.backpressure_waits += 1
+            start_time = time.perf_counter()
+            await self._queue.put(item)
+            self.backpressure_wait_seconds += time.perf_counter() - start_time
+        
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+    
+    async def _run(self) -> None:
+        """Worker loop: persist queued events, flush on idle and on request."""
+        while True:
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                await self._flush_collector()
+                continue
+            
+            try:
+                if isinstance(item, asyncio.Future):
+                    await self._flush_collector()
+                    if not item.done():
+                        item.set_result(None)
+                else:
+                    method, kwargs = item
+                    try:
+                        await getattr(self.collector, method)(**kwargs)
+                        self.written += 1
+                    except Exception as e:
+                        self.failed += 1
+                        logger.error(f"Failed to write metric {method}: {e}")
+            finally:
+                self._queue.task_done()
+    
+    async def _flush_collector(self) -> None:
+        """Flush collector buffer, keeping the worker alive on errors."""
+        try:
+            await self.collector.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush metrics: {e}")
@@ -0,0 +1,593 @@
+"""
+Mock Gateway - локальная замена Gateway для офлайн и воспроизводимых прогонов.
+
+Реализует тот же протокол, что использует GatewayClient:
+- HTTP: /api/v1/sessions, /api/v1/events/metrics/session/{id}, /health, /oauth/token
+- WebSocket: /ws/{session_id} (любой путь, оканчивающийся на session_id)
+
+На каждое user_message воспроизводится сценарий: поток токенов assistant_message,
+tool_call (с ожиданием tool_result) и agent_switched. Сценарии задаются в YAML
+или как записанные потоки сообщений (JSONL), скорость - профилем задержек.
+"""
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+import websockets
+import yaml
+from websockets.asyncio.server import ServerConnection, serve
+
+logger = logging.getLogger("benchmark.mock_gateway")
+
+# Latency profiles (seconds, tokens per second; 0 disables the delay)
+PROFILES: Dict[str, Dict[str, float]] = {
+    "instant": {
+        "http_latency": 0.0,
+        "first_token_latency": 0.0,
+        "tokens_per_second": 0,
+        "tool_call_latency": 0.0,
+        "jitter": 0.0,
+    },
+    "fast": {
+        "http_latency": 0.001,
+        "first_token_latency": 0.05,
+        "tokens_per_second": 500,
+        "tool_call_latency": 0.02,
+        "jitter": 0.1,
+    },
+    "realistic": {
+        "http_latency": 0.02,
+        "first_token_latency": 0.8,
+        "tokens_per_second": 40,
+        "tool_call_latency": 0.5,
+        "jitter": 0.25,
+    },
+}
+
+DEFAULT_MODEL = "mock-model"
+
+# Used when no scenario matches the task description
+DEFAULT_SCENARIO: Dict[str, Any] = {
+    "name": "default",
+    "steps": [
+        {"agent_switched": {
+            "from_agent": "orchestrator",
+            "to_agent": "coder",
+            "reason": "Task requires code inspection",
+        }},
+        {"assistant_message": "Let me look at the project structure first."},
+        {"tool_call": {"tool_name": "list_files", "arguments": {"path": ".", "recursive": True}}},
+        {"assistant_message": "I have reviewed the project files. The task is complete."},
+    ],
+}
+
+HTTP_REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found"}
+
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+def load_scenarios(path: Path) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, float]]]:
+    """
+    Load scenarios and custom profiles from a YAML file.
+    
+    Scenario format:
+        scenarios:
+          - name: create_widget
+            match: "user_card"          # regex searched in the user message
+            steps:
+              - agent_switched: {from_agent: orchestrator, to_agent: coder, reason: "..."}
+              - assistant_message: "Creating the widget..."
+              - tool_call: {tool_name: write_file, arguments: {path: ..., content: ...}}
+              - sleep: 0.5
+              - disconnect: true          # drop the WebSocket once, resume on reattach
+              - tool_call: {tool_name: read_file, arguments: {...}, disconnect: true}
+                                          # drop right after sending, replay on reattach
+              - error: "Internal error"   # ends the turn with an error message
+          - name: recorded
+            recording: recordings/task_001.jsonl   # raw gateway messages, one per line
+    
+    Args:
+        path: Scenarios YAML file
+    
+    Returns:
+        (scenarios, profiles) tuple
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f) or {}
+    
+    scenarios = []
+    for scenario in data.get('scenarios', []):
+        if 'recording' in scenario:
+            recording_path = path.parent / scenario['recording']
+            scenario = {**scenario, 'steps': load_recording(recording_path)}
+        scenarios.append(scenario)
+    
+    logger.info(f"Loaded {len(scenarios)} mock scenarios from {path}")
+    return scenarios, data.get('profiles', {})
+
+
+def load_recording(path: Path) -> List[Dict[str, Any]]:
+    """
+    Convert recorded gateway messages (JSONL) to scenario steps.
+    
+    Consecutive assistant_message tokens are replayed one by one with the
+    profile token rate; tool_call messages wait for the matching tool_result.
+    
+    Args:
+        path: JSONL file, one gateway -> client message per line
+    
+    Returns:
+        Scenario steps
+    """
+    steps = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                steps.append({"message": json.loads(line)})
+    return steps
+
+
+class MockGateway:
+    """
+    In-process Gateway stand-in serving HTTP and WebSocket on local ports.
+    
+    Usage:
+        async with MockGateway(profile="fast") as gateway:
+            client = GatewayClient(gateway.base_url, gateway.ws_url, auth_manager)
+    """
+    
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ws_port: int = 0,
+        scenarios: Optional[List[Dict[str, Any]]] = None,
+        profile: str = "instant",
+        profiles: Optional[Dict[str, Dict[str, float]]] = None,
+        seed: int = 0,
+        tool_result_timeout: float = 60.0
+    ):
+        """
+        Initialize mock gateway.
+        
+        Args:
+            host: Interface to bind
+            port: HTTP port (0 picks a free port)
+            ws_port: WebSocket port (0 picks a free port)
+            scenarios: Scenarios tried in order; first whose `match` fits is played
+            profile: Latency profile name
+            profiles: Additional profiles merged over the built-in ones
+            seed: Random seed for jitter (runs are reproducible for a given seed)
+            tool_result_timeout: Seconds to wait for a tool_result
+        """
+        all_profiles = {**PROFILES, **(profiles or {})}
+        if profile not in all_profiles:
+            raise ValueError(
+                f"Unknown mock gateway profile: {profile} "
+                f"(available: {', '.join(sorted(all_profiles))})"
+            )
+        
+        self.host = host
+        self.port = port
+        self.ws_port = ws_port
+        self.scenarios = list(scenarios or []) + [DEFAULT_SCENARIO]
+        self.profile_name = profile
+        self.profile = {**PROFILES["instant"], **all_profiles[profile]}
+        self.tool_result_timeout = tool_result_timeout
+        self._random = random.Random(seed)
+        
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self._http_server: Optional[asyncio.Server] = None
+        self._ws_server: Optional[Any] = None
+        
+        self.stats = {
+            "http_requests": 0,
+            "sessions_created": 0,
+            "ws_connections": 0,
+            "messages_sent": 0,
+            "bytes_sent": 0,
+            "tool_calls": 0,
+            "tool_results": 0,
+            "disconnects": 0,
+            "resumes": 0,
+        }
+    
+    @property
+    def base_url(self) -> str:
+        """HTTP base URL for GatewayClient."""
+        return f"http://{self.host}:{self.port}"
+    
+    @property
+    def ws_url(self) -> str:
+        """WebSocket URL base for GatewayClient."""
+        return f"ws://{self.host}:{self.ws_port}/ws"
+    
+    async def start(self) -> None:
+        """Start HTTP and WebSocket servers."""
+        self._http_server = await asyncio.start_server(self._handle_http, self.host, self.port)
+        self.port = self._http_server.sockets[0].getsockname()[1]
+        
+        self._ws_server = await serve(self._handle_ws, self.host, self.ws_port)
+        self.ws_port = next(iter(self._ws_server.sockets)).getsockname()[1]
+        
+        logger.info(
+            f"🧪 Mock Gateway started: {self.base_url}, {self.ws_url} "
+            f"(profile={self.profile_name}, scenarios={len(self.scenarios) - 1})"
+        )
+    
+    async def stop(self) -> None:
+        """Stop servers and close open connections."""
+        if self._ws_server:
+            self._ws_server.close()
+            await self._ws_server.wait_closed()
+            self._ws_server = None
+        if self._http_server:
+            self._http_server.close()
+            await self._http_server.wait_closed()
+            self._http_server = None
+        
+        logger.info(f"Mock Gateway stopped: {self.stats}")
+    
+    async def __aenter__(self) -> "MockGateway":
+        await self.start()
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
+    
+    def gateway_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Gateway config section pointed at this mock.
+        
+        Args:
+            config: Original `gateway` section from config.yaml
+        
+        Returns:
+            Copy with URLs replaced and internal auth
+        """
+        return {
+            **config,
+            "base_url": self.base_url,
+            "ws_url": self.ws_url,
+            "auth_type": "internal",
+            "api_key": config.get("api_key") or "mock",
+        }
+    
+    # HTTP
+    
+    async def _handle_http(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve keep-alive HTTP/1.1 requests on one connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                
+                method, target, _ = request_line.decode('latin-1').split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode('latin-1').partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                
+                body = b""
+                if int(headers.get("content-length", 0)):
+                    body = await reader.readexactly(int(headers["content-length"]))
+                
+                self.stats["http_requests"] += 1
+                await self._delay(self.profile["http_latency"])
+                status, payload = self._route(method, urlsplit(target).path, body)
+                
+                data = json.dumps(payload).encode('utf-8')
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'OK')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode('latin-1') + data
+                )
+                await writer.drain()
+                
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+    
+    def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        """Dispatch HTTP request to a handler, returning (status, JSON payload)."""
+        path = path.rstrip("/")
+        
+        if method == "GET" and path in ("/health", "/api/v1/health"):
+            return 200, {"status": "healthy", "service": "mock-gateway"}
+        
+        if method == "POST" and path == "/api/v1/sessions":
+            session_id = str(uuid4())
+            self.sessions[session_id] = {
+                "created_at": time.time(),
+                "requests": [],
+                "call_ids": {},
+                "dropped": set(),
+            }
+            self.stats["sessions_created"] += 1
+            return 201, {"id": session_id, "session_id": session_id}
+        
+        if method == "GET" and path.startswith("/api/v1/events/metrics/session/"):
+            session = self.sessions.get(path.rsplit("/", 1)[1])
+            if session is None:
+                return 404, {"detail": "Session not found"}
+            return 200, self._session_metrics(session)
+        
+        if method == "POST" and path.endswith("/oauth/token"):
+            return 200, {
+                "access_token": f"mock-{uuid4().hex}",
+                "refresh_token": f"mock-{uuid4().hex}",
+                "token_type": "bearer",
+                "expires_in": 3600,
+            }
+        
+        return 404, {"detail": f"Not found: {method} {path}"}
+    
+    def _session_metrics(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        """Session LLM metrics in the Gateway events API format."""
+        requests = session["requests"]
+        return {
+            "requests": requests,
+            "total_requests": len(requests),
+            "total_tokens": sum(r["total_tokens"] for r in requests),
+            "total_duration_ms": sum(r["duration_ms"] for r in requests),
+        }
+    
+    # WebSocket
+    
+    async def _handle_ws(self, websocket: ServerConnection) -> None:
+        """Serve one WebSocket session: play a scenario per user_message."""
+        session_id = websocket.request.path.rstrip("/").rsplit("/", 1)[-1]
+        session = self.sessions.get(session_id)
+        if session is None:
+            await websocket.close(code=1008, reason="Unknown session")
+            return
+        
+        self.stats["ws_connections"] += 1
+        try:
+            # Reattach after a dropped connection continues the interrupted scenario
+            resume = session.pop("resume", None)
+            if resume:
+                self.stats["resumes"] += 1
+                await self._play_safe(websocket, session, **resume)
+            
+            async for raw in websocket:
+                msg = json.loads(raw)
+                if msg.get("type") == "user_message":
+                    await self._play_safe(websocket, session, msg.get("content", ""))
+        except websockets.ConnectionClosed:
+            pass
+    
+    async def _play_safe(self, websocket: ServerConnection, *args: Any, **kwargs: Any) -> None:
+        """Play scenario, reporting tool_result timeouts as an error message."""
+        try:
+            await self._play(websocket, *args, **kwargs)
+        except asyncio.TimeoutError:
+            await self._send(websocket, {
+                "type": "error",
+                "content": "Timed out waiting for tool_result",
+            })
+    
+    def _select_scenario(self, content: str) -> Dict[str, Any]:
+        """First scenario whose `match` regex is found in the message."""
+        for scenario in self.scenarios:
+            pattern = scenario.get("match")
+            if pattern is None or re.search(pattern, content):
+                return scenario
+        return DEFAULT_SCENARIO
+    
+    async def _play(
+        self,
+        websocket: ServerConnection,
+        session: Dict[str, Any],
+        content: str,
+        scenario: Optional[Dict[str, Any]] = None,
+        start: int = 0
+    ) -> None:
+        """Replay scenario steps for one user message (from `start` when resuming)."""
+        scenario = scenario or self._select_scenario(content)
+        steps = scenario.get("steps", [])
+        logger.debug(f"Playing scenario '{scenario.get('name', 'unnamed')}' ({len(steps)} steps)")
+        
+        # Each stretch of generation up to a tool call or the end is one LLM request
+        turn = {"prompt_tokens": len(content) // 4, "completion_tokens": 0,
+                "started_at": time.perf_counter(), "first_token": True}
+        
+        last_text_step = max(
+            (i for i, step in enumerate(steps) if self._is_text_step(step)), default=None
+        )
+        
+        for i, step in enumerate(steps[start:], start):
+            if "message" in step:
+                message = dict(step["message"])
+                if message.get("type") == "tool_call":
+                    result = await self._tool_call(websocket, session, turn, message)
+                    turn = self._next_turn(result)
+                else:
+                    if message.get("type") == "assistant_message":
+                        await self._token_delay(turn)
+                        turn["completion_tokens"] += 1
+                    await self._send(websocket, message)
+            
+            elif "assistant_message" in step:
+                tokens = TOKEN_PATTERN.findall(str(step["assistant_message"])) or [""]
+                for j, token in enumerate(tokens):
+                    await self._token_delay(turn)
+                    turn["completion_tokens"] += 1
+                    await self._send(websocket, {
+                        "type": "assistant_message",
+                        "token": token,
+                        "is_final": i == last_text_step and j == len(tokens) - 1,
+                    })
+            
+            elif "tool_call" in step:
+                call = step["tool_call"]
+                message = {
+                    "type": "tool_call",
+                    # Same call_id when the call is replayed after a reconnect
+                    "call_id": call.get("call_id") or session["call_ids"].setdefault(
+                        i, f"call_{uuid4().hex}"
+                    ),
+                    "tool_name": call["tool_name"],
+                    "arguments": call.get("arguments", {}),
+                    "requires_approval": False,
+                }
+                if call.get("disconnect") and i not in session["dropped"]:
+                    await self._send(websocket, message)
+                    self.stats["tool_calls"] += 1
+                    await self._disconnect(websocket, session, content, scenario, i, resume_at=i)
+                    return
+                result = await self._tool_call(websocket, session, turn, message)
+                turn = self._next_turn(result)
+            
+            elif "disconnect" in step:
+                if i not in session["dropped"]:
+                    self._finish_turn(session, turn)
+                    await self._disconnect(
+                        websocket, session, content, scenario, i, resume_at=i + 1
+                    )
+                    return
+            
+            elif "agent_switched" in step:
+                switch = step["agent_switched"]
+                await self._send(websocket, {
+                    "type": "agent_switched",
+                    "content": f"Switched to {switch.get('to_agent')}",
+                    "metadata": switch,
+                })
+            
+            elif "sleep" in step:
+                await asyncio.sleep(float(step["sleep"]))
+            
+            elif "error" in step:
+                self._finish_turn(session, turn, success=False)
+                await self._send(websocket, {"type": "error", "content": step["error"]})
+                return
+        
+        if last_text_step is None:
+            await self._send(
+                websocket, {"type": "assistant_message", "token": "", "is_final": True}
+            )
+        
+        self._finish_turn(session, turn)
+    
+    async def _disconnect(
+        self,
+        websocket: ServerConnection,
+        session: Dict[str, Any],
+        content: str,
+        scenario: Dict[str, Any],
+        step: int,
+        resume_at: int
+    ) -> None:
+        """Drop connection abnormally (once per step), remembering where to resume."""
+        session["dropped"].add(step)
+        session["resume"] = {"content": content, "scenario": scenario, "start": resume_at}
+        self.stats["disconnects"] += 1
+        await websocket.close(code=1012, reason="Service restart")
+    
+    @staticmethod
+    def _is_text_step(step: Dict[str, Any]) -> bool:
+        """Whether step streams assistant_message tokens."""
+        if "message" in step:
+            return step["message"].get("type") == "assistant_message"
+        return "assistant_message" in step
+    
+    async def _tool_call(
+        self,
+        websocket: ServerConnection,
+        session: Dict[str, Any],
+        turn: Dict[str, Any],
+        message: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Send tool_call and wait for its tool_result, closing the current turn."""
+        await self._delay(self.profile["tool_call_latency"])
+        turn["completion_tokens"] += len(json.dumps(message.get("arguments", {}))) // 4
+        self._finish_turn(session, turn)
+        
+        await self._send(websocket, message)
+        self.stats["tool_calls"] += 1
+        
+        deadline = time.monotonic() + self.tool_result_timeout
+        while True:
+            raw = await asyncio.wait_for(websocket.recv(), timeout=deadline - time.monotonic())
+            reply = json.loads(raw)
+            if (
+                reply.get("type") == "tool_result"
+                and reply.get("call_id") == message.get("call_id")
+            ):
+                self.stats["tool_results"] += 1
+                return reply.get("result")
+            logger.debug(f"Ignoring message while waiting for tool_result: {reply.get('type')}")
+    
+    @staticmethod
+    def _next_turn(result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Start new LLM turn whose prompt includes the tool result."""
+        return {
+            "prompt_tokens": len(json.dumps(result or {})) // 4,
+            "completion_tokens": 0,
+            "started_at": time.perf_counter(),
+            "first_token": True,
+        }
+    
+    @staticmethod
+    def _finish_turn(session: Dict[str, Any], turn: Dict[str, Any], success: bool = True) -> None:
+        """Record finished LLM turn in session metrics."""
+        if turn["completion_tokens"] == 0 and success:
+            return
+        
+        duration_ms = int((time.perf_counter() - turn["started_at"]) * 1000)
+        session["requests"].append({
+            "model": DEFAULT_MODEL,
+            "prompt_tokens": turn["prompt_tokens"],
+            "completion_tokens": turn["completion_tokens"],
+            "total_tokens": turn["prompt_tokens"] + turn["completion_tokens"],
+            "duration_ms": duration_ms,
+            "success": success,
+        })
+        turn["completion_tokens"] = 0
+        turn["started_at"] = time.perf_counter()
+    
+    async def _token_delay(self, turn: Dict[str, Any]) -> None:
+        """Sleep for time to first token or inter-token gap."""
+        if turn["first_token"]:
+            turn["first_token"] = False
+            await self._delay(self.profile["first_token_latency"])
+        elif self.profile["tokens_per_second"]:
+            await self._delay(1.0 / self.profile["tokens_per_second"])
+    
+    async def _delay(self, seconds: float) -> None:
+        """Sleep with profile jitter applied."""
+        if seconds <= 0:
+            return
+        jitter = self.profile["jitter"]
+        if jitter:
+            seconds *= 1 + self._random.uniform(-jitter, jitter)
+        await asyncio.sleep(seconds)
+    
+    async def _send(self, websocket: ServerConnection, message: Dict[str, Any]) -> None:
+        """Send JSON message and count it."""
+        data = json.dumps(message)
+        await websocket.send(data)
+        self.stats["messages_sent"] += 1
+        self.stats["bytes_sent"] += len(data)
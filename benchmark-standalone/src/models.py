@@ -344,3 +344,77 @@ class Hallucination(Base):
     )
     
     task_execution = relationship("TaskExecution", back_populates="hallucinations")
+
+
+class ExperimentRollup(Base):
+    """
+    Pre-aggregated experiment totals.
+    
+    Maintained incrementally by MetricsCollector, rebuilt with rebuild_rollups().
+    """
+    __tablename__ = "poc_experiment_rollups"
+    
+    experiment_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("poc_experiments.id", ondelete="CASCADE"),
+        primary_key=True,
+        comment="Reference to experiment"
+    )
+    total_tasks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    completed_tasks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    successful_tasks: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_duration_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    llm_calls: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    input_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    output_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    llm_duration_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    tool_calls: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    successful_tool_calls: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    tool_duration_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    agent_switches: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    hallucinations: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
+    
+    def __repr__(self) -> str:
+        return f"<ExperimentRollup(experiment_id='{self.experiment_id}', tasks={self.total_tasks})>"
+
+
+class TaskRollup(Base):
+    """
+    Pre-aggregated per-task totals.
+    
+    Maintained incrementally by MetricsCollector, rebuilt with rebuild_rollups().
+    """
+    __tablename__ = "poc_task_rollups"
+    
+    task_execution_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("poc_task_executions.id", ondelete="CASCADE"),
+        primary_key=True,
+        comment="Reference to task execution"
+    )
+    experiment_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("poc_experiments.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+        comment="Reference to experiment"
+    )
+    llm_calls: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    input_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    output_tokens: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    llm_duration_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    tool_calls: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    successful_tool_calls: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    tool_duration_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    agent_switches: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    hallucinations: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
@@ -0,0 +1,547 @@
+"""
+Patch - применение diff для apply_diff.
+
+Поддерживаются два формата:
+- unified diff (`--- a/file`, `+++ b/file`, `@@ -l,s +l,s @@`), в том числе
+  создание файла из `/dev/null`;
+- блоки поиска/замены:
+      <<<<<<< SEARCH
+      :start_line:10
+      -------
+      old code
+      =======
+      new code
+      >>>>>>> REPLACE
+
+Hunk ищется сначала в ожидаемой строке, затем все дальше от нее; если
+точного совпадения нет - без учета пробелов по краям строк, затем с
+отброшенными крайними строками контекста (fuzz, как у patch). Применение
+атомарно: при отклонении хотя бы одного hunk файл не меняется, а отчет
+перечисляет отклоненные hunk с причиной. Новое содержимое собирается из
+неизмененных срезов исходного текста и замененных участков.
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Context lines that may be dropped from each end of a hunk that does not match
+MAX_FUZZ = 2
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+SEARCH_MARKER = re.compile(r"^<{5,} ?SEARCH\s*$")
+DIVIDER_MARKER = re.compile(r"^={5,}\s*$")
+REPLACE_MARKER = re.compile(r"^>{5,} ?REPLACE\s*$")
+START_LINE = re.compile(r"^:start_line:\s*(\d+)\s*$")
+SEPARATOR = re.compile(r"^-{3,}\s*$")
+NO_NEWLINE = "\\ No newline at end of file"
+
+
+class PatchError(ValueError):
+    """Diff text is malformed or in an unknown format."""
+
+
+class Hunk:
+    """One change: unified diff hunk or search/replace block, as tagged lines."""
+    
+    def __init__(self, index: int, start_line: Optional[int], lines: List[Tuple[str, str]]):
+        """
+        Initialize hunk.
+        
+        Args:
+            index: Position in the diff (1-based), used in reports
+            start_line: Line the change is expected at (1-based), None if unknown
+            lines: (tag, text) pairs, tag ' ' context, '-' removed, '+' added
+        """
+        self.index = index
+        self.start_line = start_line
+        self.lines = lines
+        # "\ No newline at end of file" after the last old / new line
+        self.old_no_newline = False
+        self.new_no_newline = False
+    
+    @property
+    def old_lines(self) -> List[str]:
+        """Lines the hunk expects in the file."""
+        return [text for tag, text in self.lines if tag != "+"]
+    
+    @property
+    def new_lines(self) -> List[str]:
+        """Lines the hunk leaves in the file."""
+        return [text for tag, text in self.lines if tag != "-"]
+    
+    def trimmed(self, fuzz: int) -> Optional["Hunk"]:
+        """Hunk without up to `fuzz` context lines at each end, None if nothing to trim."""
+        lines = list(self.lines)
+        start_line = self.start_line
+        trimmed = False
+        for _ in range(fuzz):
+            if len(lines) > 1 and lines[0][0] == " ":
+                lines.pop(0)
+                start_line = start_line + 1 if start_line else start_line
+                trimmed = True
+            if len(lines) > 1 and lines[-1][0] == " ":
+                lines.pop()
+                trimmed = True
+        if not trimmed:
+            return None
+        hunk = Hunk(self.index, start_line, lines)
+        hunk.old_no_newline = self.old_no_newline
+        hunk.new_no_newline = self.new_no_newline
+        return hunk
+
+
+class FilePatch:
+    """Hunks for one file."""
+    
+    def __init__(self, old_path: Optional[str], new_path: Optional[str]):
+        """
+        Initialize file patch.
+        
+        Args:
+            old_path: Path from the '---' header (None for /dev/null)
+            new_path: Path from the '+++' header (None for /dev/null)
+        """
+        self.old_path = old_path
+        self.new_path = new_path
+        self.hunks: List[Hunk] = []
+    
+    @property
+    def creates(self) -> bool:
+        """Whether the patch creates a new file."""
+        return self.old_path is None and self.new_path is not None
+    
+    @property
+    def deletes(self) -> bool:
+        """Whether the patch deletes the file."""
+        return self.new_path is None and self.old_path is not None
+
+
+def _header_path(value: str) -> Optional[str]:
+    """Path from a ---/+++ header without a/ b/ prefix and timestamp."""
+    path = value.split("\t", 1)[0].strip()
+    if path == "/dev/null":
+        return None
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    return path
+
+
+def _mark_no_newline(hunk: Hunk) -> None:
+    """Record a "No newline at end of file" marker for the preceding hunk line."""
+    if hunk.lines:
+        tag = hunk.lines[-1][0]
+        hunk.old_no_newline = hunk.old_no_newline or tag in " -"
+        hunk.new_no_newline = hunk.new_no_newline or tag in " +"
+
+
+def parse_unified_diff(text: str) -> List[FilePatch]:
+    """
+    Parse unified diff.
+    
+    Headers are optional: hunks without them form one patch for the target file.
+    
+    Args:
+        text: Diff text
+    
+    Returns:
+        Patches in diff order
+    
+    Raises:
+        PatchError: If no hunk is found or a hunk is malformed
+    """
+    patches: List[FilePatch] = []
+    current: Optional[FilePatch] = None
+    lines = _text_lines(text)
+    i = 0
+    
+    while i < len(lines):
+        line = lines[i]
+        
+        if line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "):
+            current = FilePatch(_header_path(line[4:]), _header_path(lines[i + 1][4:]))
+            patches.append(current)
+            i += 2
+            continue
+        
+        header = HUNK_HEADER.match(line)
+        if not header:
+            i += 1
+            continue
+        
+        if current is None:
+            current = FilePatch("", "")
+            patches.append(current)
+        
+        old_count = int(header.group(2)) if header.group(2) is not None else 1
+        new_count = int(header.group(4)) if header.group(4) is not None else 1
+        # A hunk without old lines inserts after line `old_start`
+        start_line = int(header.group(1)) + (1 if old_count == 0 else 0)
+        hunk = Hunk(sum(len(p.hunks) for p in patches) + 1, max(start_line, 1), [])
+        
+        i += 1
+        old_seen = new_seen = 0
+        while i < len(lines) and (old_seen < old_count or new_seen < new_count):
+            body = lines[i]
+            if body.startswith(NO_NEWLINE[:2]):
+                _mark_no_newline(hunk)
+                i += 1
+                continue
+            tag, content = (body[0], body[1:]) if body else (" ", "")
+            if tag not in " -+":
+                raise PatchError(f"Hunk {hunk.index}: unexpected line {body!r}")
+            hunk.lines.append((tag, content))
+            if tag != "+":
+                old_seen += 1
+            if tag != "-":
+                new_seen += 1
+            i += 1
+        
+        if old_seen != old_count or new_seen != new_count:
+            raise PatchError(
+                f"Hunk {hunk.index}: expected -{old_count}/+{new_count} lines, "
+                f"got -{old_seen}/+{new_seen}"
+            )
+        if i < len(lines) and lines[i].startswith(NO_NEWLINE[:2]):
+            _mark_no_newline(hunk)
+            i += 1
+        current.hunks.append(hunk)
+    
+    if not any(p.hunks for p in patches) and not any(p.deletes for p in patches):
+        raise PatchError("No hunks found in unified diff")
+    return patches
+
+
+def parse_search_replace(text: str) -> List[Hunk]:
+    """
+    Parse SEARCH/REPLACE blocks.
+    
+    Args:
+        text: Diff text
+    
+    Returns:
+        Blocks as hunks ('-' search lines, '+' replacement lines)
+    
+    Raises:
+        PatchError: If a block is not terminated or has no search text
+    """
+    hunks: List[Hunk] = []
+    lines = _text_lines(text)
+    i = 0
+    
+    while i < len(lines):
+        if not SEARCH_MARKER.match(lines[i]):
+            i += 1
+            continue
+        
+        index = len(hunks) + 1
+        i += 1
+        start_line = None
+        if i < len(lines) and START_LINE.match(lines[i]):
+            start_line = int(START_LINE.match(lines[i]).group(1))
+            i += 1
+        if i < len(lines) and SEPARATOR.match(lines[i]):
+            i += 1
+        
+        search: List[str] = []
+        while i < len(lines) and not DIVIDER_MARKER.match(lines[i]):
+            search.append(lines[i])
+            i += 1
+        if i >= len(lines):
+            raise PatchError(f"Block {index}: missing '=======' divider")
+        i += 1
+        
+        replace: List[str] = []
+        while i < len(lines) and not REPLACE_MARKER.match(lines[i]):
+            replace.append(lines[i])
+            i += 1
+        if i >= len(lines):
+            raise PatchError(f"Block {index}: missing '>>>>>>> REPLACE' marker")
+        i += 1
+        
+        if not any(line.strip() for line in search):
+            raise PatchError(f"Block {index}: empty SEARCH section")
+        hunks.append(Hunk(
+            index,
+            start_line,
+            [("-", line) for line in search] + [("+", line) for line in replace]
+        ))
+    
+    if not hunks:
+        raise PatchError("No SEARCH/REPLACE blocks found")
+    return hunks
+
+
+def is_search_replace(text: str) -> bool:
+    """Whether diff text uses SEARCH/REPLACE blocks."""
+    return any(SEARCH_MARKER.match(line) for line in _text_lines(text))
+
+
+class PatchResult:
+    """Outcome of applying hunks to a text."""
+    
+    def __init__(self):
+        self.content: Optional[str] = None
+        self.applied: List[Dict[str, Any]] = []
+        self.rejected: List[Dict[str, Any]] = []
+        self.lines_added = 0
+        self.lines_removed = 0
+    
+    @property
+    def success(self) -> bool:
+        """Whether every hunk applied."""
+        return not self.rejected
+
+
+def _split_lines(content: str) -> Tuple[List[str], List[int]]:
+    """
+    Lines without line breaks and their start offsets (plus end offset).
+    
+    Only '\n' ends a line, as in diff line numbers: unlike str.splitlines(),
+    form feeds and Unicode line separators stay inside their line.
+    """
+    lines = [line + "\n" for line in content.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    return [_strip_line_break(line) for line in lines], offsets
+
+
+def _text_lines(text: str) -> List[str]:
+    """Lines of diff text split on '\n' only (see _split_lines)."""
+    return _split_lines(text)[0]
+
+
+def _strip_line_break(line: str) -> str:
+    """Line without its '\n' or '\r\n'."""
+    line = line[:-1] if line.endswith("\n") else line
+    return line[:-1] if line.endswith("\r") else line
+
+
+def _matches(file_lines: List[str], pos: int, expected: List[str], loose: bool) -> bool:
+    """Whether file lines at pos equal expected lines (loose: ignoring edge whitespace)."""
+    if pos < 0 or pos + len(expected) > len(file_lines):
+        return False
+    if loose:
+        return all(
+            file_lines[pos + k].strip() == line.strip() for k, line in enumerate(expected)
+        )
+    return file_lines[pos:pos + len(expected)] == expected
+
+
+def _find(
+    file_lines: List[str],
+    expected: List[str],
+    around: int,
+    lower: int,
+    loose: bool,
+    unique: bool
+) -> Tuple[Optional[int], int]:
+    """
+    Position of expected lines searching outward from `around`.
+    
+    Returns:
+        (position or None, number of positions that match)
+    """
+    last = len(file_lines) - len(expected)
+    around = min(max(around, lower), max(last, lower))
+    found = None
+    count = 0
+    for distance in range(0, max(around - lower, last - around) + 1):
+        for pos in ((around,) if distance == 0 else (around - distance, around + distance)):
+            if pos < lower or pos > last or not _matches(file_lines, pos, expected, loose):
+                continue
+            if found is None:
+                found = pos
+            count += 1
+            if not unique:
+                return found, count
+    return found, count
+
+
+def _reindent(lines: List[str], source: List[str], target: List[str]) -> List[str]:
+    """Shift indentation of replacement lines when the search text was indented differently."""
+    def indent(block: List[str]) -> Optional[str]:
+        for line in block:
+            if line.strip():
+                return line[:len(line) - len(line.lstrip())]
+        return None
+    
+    source_indent, target_indent = indent(source), indent(target)
+    if source_indent is None or target_indent is None or source_indent == target_indent:
+        return lines
+    return [
+        target_indent + line[len(source_indent):] if line.startswith(source_indent) else line
+        for line in lines
+    ]
+
+
+def apply_hunks(content: str, hunks: List[Hunk], search_replace: bool = False) -> PatchResult:
+    """
+    Apply hunks to text.
+    
+    Hunks apply in order and must not overlap. Each is matched exactly,
+    then ignoring edge whitespace, then with up to MAX_FUZZ context lines
+    dropped from each end (unified hunks). SEARCH/REPLACE blocks without a
+    start line must match exactly one place.
+    
+    Args:
+        content: Current file text
+        hunks: Hunks to apply
+        search_replace: Hunks come from SEARCH/REPLACE blocks
+    
+    Returns:
+        Result with new content (None if any hunk was rejected)
+    """
+    result = PatchResult()
+    file_lines, offsets = _split_lines(content)
+    newline = "\r\n" if "\r\n" in content else "\n"
+    
+    # (first line, end line, replacement lines, hunk) in file order
+    edits: List[Tuple[int, int, List[str], Hunk]] = []
+    lower = 0
+    drift = 0
+    
+    for hunk in hunks:
+        match = None
+        candidates = [(0, hunk)]
+        if not search_replace:
+            for fuzz in range(1, MAX_FUZZ + 1):
+                trimmed = hunk.trimmed(fuzz)
+                if trimmed is not None:
+                    candidates.append((fuzz, trimmed))
+        
+        reason = "not found"
+        for fuzz, variant in candidates:
+            expected = variant.old_lines
+            around = (variant.start_line - 1 + drift) if variant.start_line else lower
+            
+            if not expected:
+                # Pure insertion: placed at the expected line
+                match = (min(max(around, lower), len(file_lines)), variant, fuzz, False)
+                break
+            
+            for loose in (False, True):
+                
+                unique = search_replace and hunk.start_line is None
+                pos, count = _find(file_lines, expected, around, lower, loose, unique)
+                if pos is not None and unique and count > 1:
+                    reason = (
+                        f"ambiguous: search text found {count} times, "
+                        f"add context or :start_line:"
+                    )
+                    pos = None
+                    break
+                if pos is not None:
+                    match = (pos, variant, fuzz, loose)
+                    break
+            if match or reason.startswith("ambiguous"):
+                break
+        
+        if match is None:
+            result.rejected.append({
+                "hunk": hunk.index,
+                "start_line": hunk.start_line,
+                "reason": reason,
+                "expected": "\n".join(hunk.old_lines[:10]),
+            })
+            continue
+        
+        pos, variant, fuzz, loose = match
+        replacement: List[str] = []
+        k = pos
+        for tag, text in variant.lines:
+            if tag == " ":
+                # Context keeps the file's own text (it may differ in whitespace)
+                replacement.append(file_lines[k])
+                k += 1
+            elif tag == "-":
+                k += 1
+            else:
+                replacement.append(text)
+        if search_replace and loose:
+            replacement = _reindent(replacement, variant.old_lines, file_lines[pos:k])
+        
+        edits.append((pos, k, replacement, hunk))
+        result.applied.append({
+            "hunk": hunk.index,
+            "line": pos + 1,
+            "offset": (pos + 1 - variant.start_line) if variant.start_line else None,
+            "fuzz": fuzz,
+            "whitespace_insensitive": loose,
+        })
+        result.lines_removed += sum(1 for tag, _ in variant.lines if tag == "-")
+        result.lines_added += sum(1 for tag, _ in variant.lines if tag == "+")
+        if variant.start_line:
+            drift = pos + 1 - variant.start_line
+        lower = k
+    
+    if result.rejected:
+        return result
+    
+    # Unchanged regions are copied as slices of the original text
+    parts: List[str] = []
+    cursor = 0
+    for first, end, replacement, hunk in edits:
+        parts.append(content[offsets[cursor]:offsets[first]])
+        if replacement:
+            parts.append(newline.join(replacement))
+            if end < len(file_lines):
+                parts.append(newline)
+            elif hunk.new_no_newline:
+                pass
+            elif hunk.old_no_newline or content.endswith(("\n", "\r")) or not content:
+                parts.append(newline)
+        cursor = end
+    parts.append(content[offsets[cursor]:])
+    
+    result.content = "".join(parts)
+    return result
+
+
+def check_deletion(content: str, hunks: List[Hunk]) -> PatchResult:
+    """
+    Verify that a delete-file patch removes exactly the current text.
+    
+    A stale or wrong diff must not delete a file the model never saw, so
+    the removed lines are compared with the file as strictly as a context
+    mismatch would be.
+    
+    Args:
+        content: Current file text
+        hunks: Hunks of the delete patch (no hunks: the file must be empty)
+    
+    Returns:
+        Result with empty content, or the mismatching hunk in rejected
+    """
+    result = PatchResult()
+    file_lines, _ = _split_lines(content)
+    removed = [text for hunk in hunks for tag, text in hunk.lines if tag == "-"]
+    
+    reason = None
+    if any(tag != "-" for hunk in hunks for tag, _ in hunk.lines):
+        reason = "delete patch must only remove lines"
+    elif removed != file_lines:
+        reason = (
+            f"file differs from the deleted content ({len(file_lines)} lines in the file, "
+            f"{len(removed)} removed by the diff)"
+        )
+    
+    if reason:
+        result.rejected.append({
+            "hunk": hunks[0].index if hunks else 1,
+            "start_line": 1,
+            "reason": reason,
+            "expected": "\n".join(removed[:10]),
+        })
+        return result
+    
+    result.applied.extend(
+        {"hunk": hunk.index, "line": 1, "offset": None, "fuzz": 0, "whitespace_insensitive": False}
+        for hunk in hunks
+    )
+    result.lines_removed = len(removed)
+    result.content = ""
+    return result
@@ -0,0 +1,259 @@
+"""
+Command Runner - неблокирующий запуск внешних команд (dart, flutter).
+
+Команды запускаются через asyncio subprocess, поэтому долгие `flutter test`
+или `dart analyze` не останавливают event loop и WebSocket соединения
+других задач. Вывод читается по мере появления и обрезается после
+max_output_bytes, по таймауту завершается вся группа процессов, а число
+одновременно запущенных команд ограничено семафором.
+"""
+import asyncio
+import logging
+import os
+import signal
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+logger = logging.getLogger("benchmark.process")
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_OUTPUT_BYTES = 1024 * 1024
+
+# Seconds between SIGTERM and SIGKILL of a timed out process group
+KILL_GRACE_PERIOD = 2.0
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class CommandResult:
+    """Outcome of an external command."""
+    
+    def __init__(
+        self,
+        return_code: Optional[int],
+        stdout: str,
+        stderr: str,
+        duration: float,
+        timed_out: bool = False,
+        truncated: bool = False
+    ):
+        """
+        Initialize command result.
+        
+        Args:
+            return_code: Process exit code (None if it was killed on timeout)
+            stdout: Captured standard output (possibly truncated)
+            stderr: Captured standard error (possibly truncated)
+            duration: Wall time in seconds, including waiting for a slot
+            timed_out: Whether the process group was killed on timeout
+            truncated: Whether output exceeded the capture limit
+        """
+        self.return_code = return_code
+        self.stdout = stdout
+        self.stderr = stderr
+        self.duration = duration
+        self.timed_out = timed_out
+        self.truncated = truncated
+    
+    @property
+    def success(self) -> bool:
+        """Whether the command finished with exit code 0."""
+        return self.return_code == 0 and not self.timed_out
+    
+    def __repr__(self) -> str:
+        return (
+            f"<CommandResult(return_code={self.return_code}, timed_out={self.timed_out}, "
+            f"duration={self.duration:.2f}s)>"
+        )
+
+
+class _OutputBuffer:
+    """Collects stream output up to a byte limit."""
+    
+    def __init__(self, limit: int):
+        """
+        Initialize output buffer.
+        
+        Args:
+            limit: Maximum bytes kept
+        """
+        self.limit = limit
+        self.size = 0
+        self._chunks: List[bytes] = []
+    
+    def add(self, chunk: bytes) -> None:
+        """Keep chunk while under the limit, count it always."""
+        room = self.limit - min(self.size, self.limit)
+        if room > 0:
+            self._chunks.append(chunk[:room])
+        self.size += len(chunk)
+    
+    @property
+    def truncated(self) -> bool:
+        """Whether output exceeded the limit."""
+        return self.size > self.limit
+    
+    def text(self) -> str:
+        """Decoded output with a truncation note."""
+        text = b"".join(self._chunks).decode("utf-8", errors="replace")
+        if self.truncated and self.limit:
+            text += f"\n... [output truncated: {self.size} bytes total]"
+        return text
+
+
+class CommandRunner:
+    """
+    Runs external commands as asyncio subprocesses with bounded parallelism.
+    
+    One runner is shared by all tool executors and validators of a benchmark
+    run, so its `max_concurrent` limits toolchain processes machine-wide.
+    
+    Usage:
+        runner = CommandRunner(max_concurrent=2, timeout=60)
+        result = await runner.run(["dart", "analyze"], cwd=project_path)
+        if result.timed_out: ...
+    """
+    
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES
+    ):
+        """
+        Initialize command runner.
+        
+        Args:
+            max_concurrent: Maximum commands running at once (default: CPU count)
+            timeout: Default command timeout in seconds
+            max_output_bytes: Bytes kept per output stream, the rest is counted and dropped
+        """
+        self.max_concurrent = max_concurrent or os.cpu_count() or 1
+        if self.max_concurrent < 1:
+            raise ValueError(f"max_concurrent must be >= 1, got: {self.max_concurrent}")
+        
+        self.timeout = timeout
+        self.max_output_bytes = max_output_bytes
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        
+        logger.debug(
+            f"CommandRunner initialized: max_concurrent={self.max_concurrent}, "
+            f"timeout={timeout}s, max_output_bytes={max_output_bytes}"
+        )
+    
+    async def run(
+        self,
+        args: Sequence[str],
+        cwd: Path,
+        timeout: Optional[float] = None,
+        on_output: Optional[Callable[[str, bytes], None]] = None,
+        capture: bool = True
+    ) -> CommandResult:
+        """
+        Run command and capture its output.
+        
+        Args:
+            args: Program and its arguments (no shell)
+            cwd: Working directory
+            timeout: Timeout in seconds (default: runner timeout)
+            on_output: Optional callback receiving ("stdout" | "stderr", chunk) as output arrives
+            capture: Keep output in the result (False when on_output consumes it)
+        
+        Returns:
+            Command result (timed out commands return partial output)
+        
+        Raises:
+            OSError: If the program cannot be started (e.g. not installed)
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        start_time = time.perf_counter()
+        
+        async with self._semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                cwd=str(cwd),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                # Own process group: on timeout the whole tree is killed, not only the wrapper
+                start_new_session=(os.name == "posix")
+            )
+            
+            limit = self.max_output_bytes if capture else 0
+            stdout = _OutputBuffer(limit)
+            stderr = _OutputBuffer(limit)
+            finished = asyncio.gather(
+                self._read_stream(process.stdout, stdout, "stdout", on_output),
+                self._read_stream(process.stderr, stderr, "stderr", on_output),
+                process.wait()
+            )
+            
+            timed_out = False
+            try:
+                await asyncio.wait_for(asyncio.shield(finished), timeout=timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                logger.warning(f"⏱️  Command timed out after {timeout}s: {' '.join(args)}")
+                await self._kill(process, finished)
+            except BaseException:
+                # Cancelled task must not leave the toolchain running
+                await self._kill(process, finished)
+                raise
+        
+        return CommandResult(
+            return_code=None if timed_out else process.returncode,
+            stdout=stdout.text(),
+            stderr=stderr.text(),
+            duration=time.perf_counter() - start_time,
+            timed_out=timed_out,
+            truncated=capture and (stdout.truncated or stderr.truncated)
+        )
+    
+    @staticmethod
+    async def _read_stream(
+        stream: asyncio.StreamReader,
+        buffer: _OutputBuffer,
+        name: str,
+        on_output: Optional[Callable[[str, bytes], None]]
+    ) -> None:
+        """Read stream until EOF into buffer."""
+        while True:
+            chunk = await stream.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            buffer.add(chunk)
+            if on_output:
+                on_output(name, chunk)
+    
+    @staticmethod
+    async def _kill(process: asyncio.subprocess.Process, finished: asyncio.Future) -> None:
+        """
+        Terminate the process group, kill what is left and stop reading output.
+        
+        The group is signalled even if the lead process already exited: its
+        descendants may still be running and holding stdout/stderr open.
+        
+        Args:
+            process: Lead process (leader of its own group)
+            finished: Gather of the output readers and process.wait()
+        """
+        for sig in (signal.SIGTERM, getattr(signal, "SIGKILL", signal.SIGTERM)):
+            try:
+                if os.name == "posix":
+                    os.killpg(process.pid, sig)
+                elif process.returncode is None:
+                    process.kill()
+            except ProcessLookupError:
+                pass
+            
+            try:
+                # Collect output written before the kill (returns at once when done)
+                await asyncio.wait_for(asyncio.shield(finished), timeout=KILL_GRACE_PERIOD)
+            except Exception:
+                # Timeout or a failed reader (e.g. raising on_output): SIGKILL must still follow
+                pass
+        
+        if not finished.done():
+            finished.cancel()
+        await asyncio.gather(finished, return_exceptions=True)
@@ -8,14 +8,16 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .models import (
     AgentSwitch,
     Experiment,
+    ExperimentRollup,
     Hallucination,
     LLMCall,
+    QualityEvaluation,
     TaskExecution,
     ToolCall,
 )
@@ -57,35 +59,42 @@ class ReportGenerator:
         
         Args:
             experiment: Experiment object
-            
+        
         Returns:
             Dictionary with statistics
         """
-        # Get task executions
+        # Task counts and durations grouped by category and type (one query)
+        duration = func.coalesce(TaskExecution.metrics['duration_seconds'].as_float(), 0.0)
+        successful = case((TaskExecution.success.is_(True), 1), else_=0)
+        
         result = await self.db.execute(
-            select(TaskExecution)
+            select(
+                TaskExecution.task_category,
+                TaskExecution.task_type,
+                func.count(TaskExecution.id),
+                func.coalesce(func.sum(successful), 0),
+                func.coalesce(func.sum(duration), 0.0),
+            )
             .where(TaskExecution.experiment_id == experiment.id)
-            .order_by(TaskExecution.started_at)
+            .group_by(TaskExecution.task_category, TaskExecution.task_type)
         )
-        tasks = list(result.scalars().all())
+        groups = result.all()
         
-        # Helper function to get duration
-        def get_duration(task: TaskExecution) -> float:
-            if task.metrics and isinstance(task.metrics, dict):
-                return task.metrics.get('duration_seconds', 0) or 0
-            return 0
+        total_tasks = sum(row[2] for row in groups)
+        successful_tasks = sum(row[3] for row in groups)
+        total_duration = float(sum(row[4] for row in groups))
         
         stats = {
             "experiment_id": str(experiment.id),
             "mode": experiment.mode,
             "started_at": experiment.started_at.isoformat(),
             "completed_at": experiment.completed_at.isoformat() if experiment.completed_at else None,
-            "total_tasks": len(tasks),
-            "successful_tasks": sum(1 for t in tasks if t.success),
-            "failed_tasks": sum(1 for t in tasks if not t.success),
-            "success_rate": sum(1 for t in tasks if t.success) / len(tasks) if tasks else 0,
-            "total_duration": sum(get_duration(t) for t in tasks),
-            "avg_task_duration": sum(get_duration(t) for t in tasks) / len(tasks) if tasks else 0,
+            "total_tasks": total_tasks,
+            "successful_tasks": successful_tasks,
+            "failed_tasks": total_tasks - successful_tasks,
+            "success_rate": successful_tasks / total_tasks if total_tasks else 0,
+            "total_duration": total_duration,
+            "avg_task_duration": total_duration / total_tasks if total_tasks else 0,
             "total_llm_calls": 0,
             "total_tool_calls": 0,
             "total_agent_switches": 0,
@@ -97,53 +106,38 @@ class ReportGenerator:
             "tasks_by_type": {},
         }
         
-        # Collect detailed metrics
-        for task in tasks:
-            # Count by category and type
-            category = task.task_category
-            task_type = task.task_type
-            
-            if category not in stats["tasks_by_category"]:
-                stats["tasks_by_category"][category] = {"total": 0, "successful": 0}
-            stats["tasks_by_category"][category]["total"] += 1
-            if task.success:
-                stats["tasks_by_category"][category]["successful"] += 1
-            
-            if task_type not in stats["tasks_by_type"]:
-                stats["tasks_by_type"][task_type] = {"total": 0, "successful": 0}
-            stats["tasks_by_type"][task_type]["total"] += 1
-            if task.success:
-                stats["tasks_by_type"][task_type]["successful"] += 1
-            
-            # LLM calls
-            result = await self.db.execute(
-                select(LLMCall).where(LLMCall.task_execution_id == task.id)
-            )
-            llm_calls = list(result.scalars().all())
-            stats["total_llm_calls"] += len(llm_calls)
-            stats["total_input_tokens"] += sum(c.input_tokens for c in llm_calls)
-            stats["total_output_tokens"] += sum(c.output_tokens for c in llm_calls)
-            
-            # Tool calls
-            result = await self.db.execute(
-                select(ToolCall).where(ToolCall.task_execution_id == task.id)
-            )
-            tool_calls = list(result.scalars().all())
-            stats["total_tool_calls"] += len(tool_calls)
-            
-            # Agent switches
-            result = await self.db.execute(
-                select(AgentSwitch).where(AgentSwitch.task_execution_id == task.id)
+        for category, task_type, count, success_count, _ in groups:
+            for key, breakdown in ((category, stats["tasks_by_category"]),
+                                   (task_type, stats["tasks_by_type"])):
+                entry = breakdown.setdefault(key, {"total": 0, "successful": 0})
+                entry["total"] += count
+                entry["successful"] += success_count
+        
+        # Child row aggregates from the pre-aggregated rollup when available
+        rollup = await self.db.get(ExperimentRollup, experiment.id, populate_existing=True)
+        if rollup is not None:
+            stats["total_llm_calls"] = rollup.llm_calls
+            stats["total_input_tokens"] = rollup.input_tokens
+            stats["total_output_tokens"] = rollup.output_tokens
+            stats["total_tool_calls"] = rollup.tool_calls
+            stats["total_agent_switches"] = rollup.agent_switches
+            stats["total_hallucinations"] = rollup.hallucinations
+        else:
+            await self._aggregate_child_rows(experiment, stats)
+        
+        # Validation cache counters recorded with auto_check evaluations
+        result = await self.db.execute(
+            select(
+                func.coalesce(func.sum(QualityEvaluation.details['cache_hits'].as_integer()), 0),
+                func.coalesce(func.sum(QualityEvaluation.details['cache_misses'].as_integer()), 0),
             )
-            agent_switches = list(result.scalars().all())
-            stats["total_agent_switches"] += len(agent_switches)
-            
-            # Hallucinations
-            result = await self.db.execute(
-                select(Hallucination).where(Hallucination.task_execution_id == task.id)
+            .join(TaskExecution, QualityEvaluation.task_execution_id == TaskExecution.id)
+            .where(
+                TaskExecution.experiment_id == experiment.id,
+                QualityEvaluation.evaluation_type == "auto_check"
             )
-            hallucinations = list(result.scalars().all())
-            stats["total_hallucinations"] += len(hallucinations)
+        )
+        stats["validation_cache_hits"], stats["validation_cache_misses"] = result.one()
         
         # Calculate cost (GPT-4 pricing)
         input_cost_per_1k = 0.03
@@ -156,6 +150,48 @@ class ReportGenerator:
         
         return stats
     
+    async def _aggregate_child_rows(self, experiment: Experiment, stats: Dict[str, Any]) -> None:
+        """
+        Aggregate LLM/tool/switch/hallucination rows with scalar subqueries (one query).
+        
+        Used for experiments without a rollup row.
+        """
+        task_ids = (
+            select(TaskExecution.id)
+            .where(TaskExecution.experiment_id == experiment.id)
+            .scalar_subquery()
+        )
+        
+        def count_rows(model: Any) -> Any:
+            return (
+                select(func.count(model.id))
+                .where(model.task_execution_id.in_(task_ids))
+                .scalar_subquery()
+            )
+        
+        result = await self.db.execute(
+            select(
+                count_rows(LLMCall),
+                select(func.coalesce(func.sum(LLMCall.input_tokens), 0))
+                .where(LLMCall.task_execution_id.in_(task_ids))
+                .scalar_subquery(),
+                select(func.coalesce(func.sum(LLMCall.output_tokens), 0))
+                .where(LLMCall.task_execution_id.in_(task_ids))
+                .scalar_subquery(),
+                count_rows(ToolCall),
+                count_rows(AgentSwitch),
+                count_rows(Hallucination),
+            )
+        )
+        (
+            stats["total_llm_calls"],
+            stats["total_input_tokens"],
+            stats["total_output_tokens"],
+            stats["total_tool_calls"],
+            stats["total_agent_switches"],
+            stats["total_hallucinations"],
+        ) = result.one()
+    
     def generate_markdown_report(
         self,
         single_agent_stats: Optional[Dict[str, Any]],
@@ -167,7 +203,7 @@ class ReportGenerator:
         Args:
             single_agent_stats: Statistics for single-agent mode
             multi_agent_stats: Statistics for multi-agent mode
-            
+        
         Returns:
             Markdown formatted report
         """
@@ -246,6 +282,13 @@ class ReportGenerator:
             lines.append(f"| Total Agent Switches | {stats['total_agent_switches']} |")
         
         lines.append(f"| Total Hallucinations | {stats['total_hallucinations']} |")
+        
+        cache_lookups = stats['validation_cache_hits'] + stats['validation_cache_misses']
+        if cache_lookups:
+            lines.append(
+                f"| Validation Cache Hits | {stats['validation_cache_hits']}/{cache_lookups} "
+                f"({stats['validation_cache_hits'] / cache_lookups:.0%}) |"
+            )
         lines.append("")
         
         lines.append("### Token Usage")
@@ -317,7 +360,7 @@ class ReportGenerator:
         Args:
             experiment_id: Specific experiment ID to report on
             latest: Use latest experiments (one for each mode)
-            
+        
         Returns:
             Markdown formatted report
         """
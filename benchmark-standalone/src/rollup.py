@@ -0,0 +1,301 @@
+"""
+Rollups - предагрегированные итоги по экспериментам и задачам.
+
+MetricsCollector обновляет таблицы poc_experiment_rollups и poc_task_rollups
+инкрементально в той же транзакции, что и исходные строки метрик.
+Для старых баз итоги можно пересчитать через rebuild_rollups().
+
+Инкремент в SQLite и PostgreSQL выполняется одним INSERT ... ON CONFLICT
+DO UPDATE, в остальных базах - через UPDATE и INSERT при отсутствии строки.
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple, Type
+from uuid import UUID
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import (
+    AgentSwitch,
+    ExperimentRollup,
+    Hallucination,
+    LLMCall,
+    TaskExecution,
+    TaskRollup,
+    ToolCall,
+)
+
+logger = logging.getLogger("benchmark.rollup")
+
+# Counters shared by experiment and task rollups
+ROLLUP_COUNTERS = (
+    "llm_calls",
+    "input_tokens",
+    "output_tokens",
+    "llm_duration_seconds",
+    "tool_calls",
+    "successful_tool_calls",
+    "tool_duration_seconds",
+    "agent_switches",
+    "hallucinations",
+)
+
+
+def row_deltas(model: Type[Any], values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rollup counter increments for a single metric row.
+    
+    Args:
+        model: ORM model class of the row
+        values: Column values of the row
+    
+    Returns:
+        Counter increments (empty for rows that are not rolled up)
+    """
+    if model is LLMCall:
+        return {
+            "llm_calls": 1,
+            "input_tokens": values.get("input_tokens") or 0,
+            "output_tokens": values.get("output_tokens") or 0,
+            "llm_duration_seconds": values.get("duration_seconds") or 0.0,
+        }
+    if model is ToolCall:
+        return {
+            "tool_calls": 1,
+            "successful_tool_calls": 1 if values.get("success") else 0,
+            "tool_duration_seconds": values.get("duration_seconds") or 0.0,
+        }
+    if model is AgentSwitch:
+        return {"agent_switches": 1}
+    if model is Hallucination:
+        return {"hallucinations": 1}
+    return {}
+
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+async def _increment(
+    db: AsyncSession,
+    model: Type[Any],
+    keys: Dict[str, Any],
+    deltas: Dict[str, Any]
+) -> None:
+    """Add deltas to the counters of a rollup row, creating the row if needed."""
+    now = datetime.now(timezone.utc)
+    columns = model.__table__.c
+    key_columns = [columns[name] for name in keys if columns[name].primary_key]
+    dialect_insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    
+    if dialect_insert is not None:
+        stmt = dialect_insert(model).values(**keys, **deltas, updated_at=now)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={
+                **{name: columns[name] + stmt.excluded[name] for name in deltas},
+                "updated_at": now,
+            }
+        ))
+        return
+    
+    increment = (
+        update(model)
+        .where(*(column == keys[column.name] for column in key_columns))
+        .values(**{name: columns[name] + value for name, value in deltas.items()}, updated_at=now)
+    )
+    if (await db.execute(increment)).rowcount:
+        return
+    try:
+        async with db.begin_nested():
+            await db.execute(insert(model).values(**keys, **deltas, updated_at=now))
+    except IntegrityError:
+        # Row created meanwhile by another collector
+        await db.execute(increment)
+
+
+async def apply_row_deltas(
+    db: AsyncSession,
+    rows: List[Tuple[Type[Any], Dict[str, Any]]],
+    task_experiments: Dict[str, str]
+) -> None:
+    """
+    Add metric rows to task and experiment rollups (caller commits).
+    
+    Args:
+        db: Database session
+        rows: (model, values) pairs being inserted
+        task_experiments: Map of task execution ID to experiment ID
+    """
+    task_deltas: Dict[str, Dict[str, Any]] = {}
+    for model, values in rows:
+        deltas = row_deltas(model, values)
+        if not deltas:
+            continue
+        totals = task_deltas.setdefault(values["task_execution_id"], {})
+        for name, value in deltas.items():
+            totals[name] = totals.get(name, 0) + value
+    
+    experiment_deltas: Dict[str, Dict[str, Any]] = {}
+    for task_execution_id, deltas in task_deltas.items():
+        experiment_id = task_experiments[task_execution_id]
+        await _increment(
+            db,
+            TaskRollup,
+            {"task_execution_id": task_execution_id, "experiment_id": experiment_id},
+            deltas
+        )
+        totals = experiment_deltas.setdefault(experiment_id, {})
+        for name, value in deltas.items():
+            totals[name] = totals.get(name, 0) + value
+    
+    for experiment_id, deltas in experiment_deltas.items():
+        await _increment(
+            db,
+            ExperimentRollup,
+            {"experiment_id": experiment_id},
+            deltas
+        )
+
+
+async def apply_task_status(db: AsyncSession, experiment_id: str, **deltas: Any) -> None:
+    """
+    Update experiment task counters (caller commits).
+    
+    Args:
+        db: Database session
+        experiment_id: Experiment ID
+        **deltas: Increments for total_tasks, completed_tasks, successful_tasks,
+            total_duration_seconds
+    """
+    await _increment(
+        db,
+        ExperimentRollup,
+        {"experiment_id": experiment_id},
+        deltas
+    )
+
+
+async def init_task_rollup(db: AsyncSession, task_execution_id: str, experiment_id: str) -> None:
+    """Create empty rollup row for a started task (caller commits)."""
+    await _increment(
+        db,
+        TaskRollup,
+        {"task_execution_id": task_execution_id, "experiment_id": experiment_id},
+        {"llm_calls": 0}
+    )
+
+
+async def rebuild_rollups(db: AsyncSession, experiment_id: Optional[UUID] = None) -> int:
+    """
+    Recompute rollups from raw metric rows.
+    
+    Args:
+        db: Database session
+        experiment_id: Experiment to rebuild (default: all experiments)
+    
+    Returns:
+        Number of experiment rollups written
+    """
+    task_filter = []
+    if experiment_id:
+        task_filter.append(TaskExecution.experiment_id == str(experiment_id))
+    
+    experiment_ids = list((await db.execute(
+        select(TaskExecution.experiment_id).where(*task_filter).distinct()
+    )).scalars().all())
+    
+    await db.execute(delete(TaskRollup).where(TaskRollup.experiment_id.in_(experiment_ids)))
+    await db.execute(
+        delete(ExperimentRollup).where(ExperimentRollup.experiment_id.in_(experiment_ids))
+    )
+    
+    def aggregate(model: Type[Any], *columns: Any) -> Any:
+        return (
+            select(model.task_execution_id, *columns)
+            .join(TaskExecution, TaskExecution.id == model.task_execution_id)
+            .where(*task_filter)
+            .group_by(model.task_execution_id)
+        )
+    
+    # Per-task counters, one grouped query per metric table
+    task_rows: Dict[str, Dict[str, Any]] = {}
+    
+    for task_execution_id, task_experiment_id in (await db.execute(
+        select(TaskExecution.id, TaskExecution.experiment_id).where(*task_filter)
+    )).all():
+        task_rows[task_execution_id] = {
+            "task_execution_id": task_execution_id,
+            "experiment_id": task_experiment_id,
+            **{name: 0 for name in ROLLUP_COUNTERS},
+        }
+    
+    queries = [
+        (aggregate(
+            LLMCall,
+            func.count(LLMCall.id),
+            func.coalesce(func.sum(LLMCall.input_tokens), 0),
+            func.coalesce(func.sum(LLMCall.output_tokens), 0),
+            func.coalesce(func.sum(LLMCall.duration_seconds), 0.0),
+        ), ("llm_calls", "input_tokens", "output_tokens", "llm_duration_seconds")),
+        (aggregate(
+            ToolCall,
+            func.count(ToolCall.id),
+            func.coalesce(func.sum(case((ToolCall.success.is_(True), 1), else_=0)), 0),
+            func.coalesce(func.sum(ToolCall.duration_seconds), 0.0),
+        ), ("tool_calls", "successful_tool_calls", "tool_duration_seconds")),
+        (aggregate(AgentSwitch, func.count(AgentSwitch.id)), ("agent_switches",)),
+        (aggregate(Hallucination, func.count(Hallucination.id)), ("hallucinations",)),
+    ]
+    
+    for query, names in queries:
+        for task_execution_id, *values in (await db.execute(query)).all():
+            task_rows[task_execution_id].update(zip(names, values, strict=True))
+    
+    # Experiment totals: task counters plus sums of task rollups
+    experiment_rows: Dict[str, Dict[str, Any]] = {}
+    duration = func.coalesce(TaskExecution.metrics['duration_seconds'].as_float(), 0.0)
+    
+    for row in (await db.execute(
+        select(
+            TaskExecution.experiment_id,
+            func.count(TaskExecution.id),
+            func.count(TaskExecution.completed_at),
+            func.coalesce(func.sum(case((TaskExecution.success.is_(True), 1), else_=0)), 0),
+            func.coalesce(func.sum(duration), 0.0),
+        )
+        .where(*task_filter)
+        .group_by(TaskExecution.experiment_id)
+    )).all():
+        experiment_rows[row[0]] = {
+            "experiment_id": row[0],
+            "total_tasks": row[1],
+            "completed_tasks": row[2],
+            "successful_tasks": row[3],
+            "total_duration_seconds": row[4],
+            **{name: 0 for name in ROLLUP_COUNTERS},
+        }
+    
+    for task_row in task_rows.values():
+        totals = experiment_rows[task_row["experiment_id"]]
+        for name in ROLLUP_COUNTERS:
+            totals[name] += task_row[name]
+    
+    now = datetime.now(timezone.utc)
+    if task_rows:
+        await db.execute(
+            insert(TaskRollup),
+            [{**row, "updated_at": now} for row in task_rows.values()]
+        )
+    if experiment_rows:
+        await db.execute(
+            insert(ExperimentRollup),
+            [{**row, "updated_at": now} for row in experiment_rows.values()]
+        )
+    await db.commit()
+    
+    logger.info(f"Rebuilt rollups: {len(experiment_rows)} experiments, {len(task_rows)} tasks")
+    return len(experiment_rows)
@@ -0,0 +1,89 @@
+"""
+Task Scheduler - параллельное выполнение benchmark задач с ограничением конкурентности.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+logger = logging.getLogger("benchmark.scheduler")
+
+T = TypeVar("T")
+
+
+class TaskScheduler:
+    """
+    Планировщик задач с ограниченным параллелизмом.
+    
+    Ограничивает общее число одновременно выполняемых задач и, опционально,
+    число задач каждой категории (например, меньше `complex` задач одновременно).
+    Результаты возвращаются в порядке исходного списка задач.
+    
+    Usage:
+        scheduler = TaskScheduler(max_concurrent_tasks=4, category_limits={"complex": 1})
+        results = await scheduler.run(tasks, worker)
+    """
+    
+    def __init__(
+        self,
+        max_concurrent_tasks: int = 1,
+        category_limits: Optional[Dict[str, int]] = None
+    ):
+        """
+        Initialize task scheduler.
+        
+        Args:
+            max_concurrent_tasks: Maximum number of tasks running at once
+            category_limits: Optional per-category concurrency limits
+        """
+        if max_concurrent_tasks < 1:
+            raise ValueError(f"max_concurrent_tasks must be >= 1, got: {max_concurrent_tasks}")
+        
+        self.max_concurrent_tasks = max_concurrent_tasks
+        self.category_limits = dict(category_limits or {})
+        
+        for category, limit in self.category_limits.items():
+            if limit < 1:
+                raise ValueError(f"Concurrency limit for '{category}' must be >= 1, got: {limit}")
+        
+        logger.info(
+            f"TaskScheduler initialized: max_concurrent_tasks={max_concurrent_tasks}, "
+            f"category_limits={self.category_limits or 'none'}"
+        )
+    
+    async def run(
+        self,
+        tasks: List[Dict[str, Any]],
+        worker: Callable[[int, Dict[str, Any]], Awaitable[T]]
+    ) -> List[T]:
+        """
+        Run worker for every task with bounded parallelism.
+        
+        Args:
+            tasks: Task definitions from YAML
+            worker: Coroutine function called as worker(index, task), index is 1-based
+        
+        Returns:
+            Worker results in task order
+        """
+        global_slots = asyncio.Semaphore(self.max_concurrent_tasks)
+        category_slots = {
+            category: asyncio.Semaphore(limit)
+            for category, limit in self.category_limits.items()
+        }
+        
+        async def run_one(index: int, task: Dict[str, Any]) -> T:
+            category_slot = category_slots.get(task.get('category', ''))
+            
+            # Category slot is taken first so that a task waiting for its category
+            # does not hold a global slot other categories could use
+            if category_slot is None:
+                async with global_slots:
+                    return await worker(index, task)
+            
+            async with category_slot:
+                async with global_slots:
+                    return await worker(index, task)
+        
+        return list(await asyncio.gather(
+            *(run_one(i, task) for i, task in enumerate(tasks, 1))
+        ))
@@ -0,0 +1,213 @@
+"""
+Self Benchmark - замеры горячих путей самого harness и сравнение с baseline.
+
+Каждый замер собирает длительности итераций и сводит их в p50/p95.
+Результаты сохраняются в JSON baseline; последующие прогоны сравниваются
+с ним и считаются регрессией, если p50 или p95 выросли больше порога.
+"""
+import json
+import logging
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .stats import percentile
+
+logger = logging.getLogger("benchmark.selfbench")
+
+DEFAULT_THRESHOLDS = {"p50": 0.20, "p95": 0.35}
+DEFAULT_MIN_DELTA_MS = 0.5
+
+
+class BenchmarkResult:
+    """Timing samples of one benchmark case."""
+    
+    def __init__(self, name: str, samples: List[float], extra: Optional[Dict[str, Any]] = None):
+        """
+        Initialize benchmark result.
+        
+        Args:
+            name: Case name, e.g. "executor.read_file"
+            samples: Iteration durations in seconds
+            extra: Additional case metrics (throughput, sizes)
+        """
+        self.name = name
+        self.samples = samples
+        self.extra = extra or {}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary in milliseconds as stored in baselines."""
+        samples_ms = [s * 1000 for s in self.samples]
+        return {
+            "iterations": len(samples_ms),
+            "p50_ms": round(percentile(samples_ms, 50), 4),
+            "p95_ms": round(percentile(samples_ms, 95), 4),
+            "mean_ms": round(statistics.fmean(samples_ms), 4) if samples_ms else 0.0,
+            "min_ms": round(min(samples_ms), 4) if samples_ms else 0.0,
+            "max_ms": round(max(samples_ms), 4) if samples_ms else 0.0,
+            **self.extra,
+        }
+    
+    def __repr__(self) -> str:
+        return f"<BenchmarkResult(name='{self.name}', iterations={len(self.samples)})>"
+
+
+async def measure(
+    name: str,
+    func: Callable[[], Awaitable[Any]],
+    iterations: int,
+    warmup: int = 1,
+    setup: Optional[Callable[[], Awaitable[Any]]] = None
+) -> BenchmarkResult:
+    """
+    Time repeated runs of a coroutine function.
+    
+    Args:
+        name: Case name
+        func: Coroutine function measured on each iteration
+        iterations: Number of measured iterations
+        warmup: Number of unmeasured iterations run first
+        setup: Optional coroutine function run before every iteration (not timed)
+    
+    Returns:
+        Benchmark result with per-iteration durations
+    """
+    samples = []
+    for i in range(warmup + iterations):
+        if setup:
+            await setup()
+        start_time = time.perf_counter()
+        await func()
+        duration = time.perf_counter() - start_time
+        if i >= warmup:
+            samples.append(duration)
+    
+    result = BenchmarkResult(name, samples)
+    summary = result.to_dict()
+    logger.info(f"⏱️  {name}: p50={summary['p50_ms']:.3f}ms p95={summary['p95_ms']:.3f}ms")
+    return result
+
+
+def load_baseline(path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Load baseline JSON file.
+    
+    Args:
+        path: Baseline file
+    
+    Returns:
+        Baseline data or None if the file does not exist
+    """
+    if not path.exists():
+        return None
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path: Path, results: List[BenchmarkResult]) -> None:
+    """
+    Write results as a new baseline.
+    
+    Args:
+        path: Baseline file
+        results: Benchmark results
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {result.name: result.to_dict() for result in results},
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    
+    logger.info(f"✓ Baseline saved: {path} ({len(results)} cases)")
+
+
+def compare_to_baseline(
+    results: List[BenchmarkResult],
+    baseline: Dict[str, Any],
+    thresholds: Optional[Dict[str, float]] = None,
+    min_delta_ms: float = DEFAULT_MIN_DELTA_MS
+) -> List[Dict[str, Any]]:
+    """
+    Compare results with baseline percentiles.
+    
+    A case regresses when a percentile grows by more than its relative
+    threshold and by more than `min_delta_ms` (to ignore jitter of
+    sub-millisecond cases).
+    
+    Args:
+        results: Current benchmark results
+        baseline: Baseline data from load_baseline()
+        thresholds: Allowed relative growth per percentile, e.g. {"p50": 0.2}
+        min_delta_ms: Absolute growth below which changes are ignored
+    
+    Returns:
+        One comparison per case: name, status ("ok", "regression", "new")
+        and per-percentile baseline/current/change values
+    """
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+    baseline_results = baseline.get("results", {})
+    comparisons = []
+    
+    for result in results:
+        current = result.to_dict()
+        previous = baseline_results.get(result.name)
+        comparison: Dict[str, Any] = {"name": result.name, "status": "ok"}
+        
+        if previous is None:
+            comparison["status"] = "new"
+            comparisons.append(comparison)
+            continue
+        
+        for key, threshold in thresholds.items():
+            before = previous.get(f"{key}_ms", 0.0)
+            after = current[f"{key}_ms"]
+            change = (after - before) / before if before else 0.0
+            comparison[key] = {"baseline_ms": before, "current_ms": after, "change": change}
+            
+            if change > threshold and after - before > min_delta_ms:
+                comparison["status"] = "regression"
+        
+        comparisons.append(comparison)
+    
+    return comparisons
+
+
+def format_comparison(
+    results: List[BenchmarkResult],
+    comparisons: Optional[List[Dict[str, Any]]] = None
+) -> str:
+    """
+    Format results (and optional baseline comparison) as a text table.
+    
+    Args:
+        results: Benchmark results
+        comparisons: Output of compare_to_baseline()
+    
+    Returns:
+        Table text
+    """
+    by_name = {c["name"]: c for c in comparisons or []}
+    lines = [f"{'case':<48} {'p50 ms':>10} {'p95 ms':>10} {'Δp50':>8} {'Δp95':>8}  status"]
+    
+    for result in results:
+        summary = result.to_dict()
+        comparison = by_name.get(result.name, {})
+        deltas = [
+            f"{comparison[key]['change']:+.0%}" if key in comparison else "-"
+            for key in ("p50", "p95")
+        ]
+        lines.append(
+            f"{result.name:<48} {summary['p50_ms']:>10.3f} {summary['p95_ms']:>10.3f} "
+            f"{deltas[0]:>8} {deltas[1]:>8}  {comparison.get('status', '-')}"
+        )
+    
+    return "\n".join(lines)
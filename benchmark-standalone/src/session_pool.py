@@ -0,0 +1,171 @@
+"""
+Session Pool - заблаговременное создание Gateway сессий и WebSocket соединений.
+
+Пока выполняется текущая задача, пул создает сессии для следующих
+(HTTP POST /api/v1/sessions) и сразу подключает к ним WebSocket, так что
+задача стартует без ожидания сети. Сессия и ее WebSocket используются
+одной задачей: протокол привязывает соединение к session_id.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Optional
+
+from websockets.protocol import State
+
+if TYPE_CHECKING:
+    from .client import GatewayClient
+
+logger = logging.getLogger("benchmark.session_pool")
+
+
+class GatewaySession:
+    """Gateway session with its (optionally pre-opened) WebSocket connection."""
+    
+    def __init__(self, session_id: str, websocket: Optional[Any] = None):
+        """
+        Initialize session.
+        
+        Args:
+            session_id: Session ID returned by Gateway
+            websocket: Open WebSocket connection to /ws/{session_id}
+        """
+        self.session_id = session_id
+        self.websocket = websocket
+        self.created_at = time.time()
+    
+    @property
+    def connected(self) -> bool:
+        """Whether the WebSocket connection is open."""
+        return self.websocket is not None and self.websocket.state is State.OPEN
+    
+    async def close(self) -> None:
+        """Close WebSocket connection."""
+        if self.websocket is not None:
+            await self.websocket.close()
+            self.websocket = None
+    
+    def __repr__(self) -> str:
+        return f"<GatewaySession(id='{self.session_id}', connected={self.connected})>"
+
+
+class SessionPool:
+    """
+    Prepares up to `ahead` sessions in the background, never more than `total`.
+    
+    Usage:
+        pool = SessionPool(client, total=len(tasks), ahead=2)
+        pool.start()
+        session = await pool.acquire()   # ready session, or opened on demand
+        await pool.close()               # close unused prepared sessions
+    """
+    
+    def __init__(
+        self,
+        client: "GatewayClient",
+        total: int,
+        ahead: int = 2,
+        preconnect: bool = True,
+        spare: Optional[GatewaySession] = None
+    ):
+        """
+        Initialize session pool.
+        
+        Args:
+            client: Gateway client used to create sessions
+            total: Number of sessions that will be acquired (tasks to run)
+            ahead: Maximum number of sessions prepared in advance
+            preconnect: Also open the WebSocket of prepared sessions
+            spare: Already opened session to hand out first (e.g. from test_connection)
+        """
+        self.client = client
+        self.ahead = ahead
+        self.preconnect = preconnect
+        self._remaining = total
+        self._pending: Deque[asyncio.Task] = deque()
+        
+        if spare is not None and total > 0:
+            self._pending.append(asyncio.create_task(self._ready(spare)))
+            self._remaining -= 1
+        
+        self.prepared_hits = 0
+        self.misses = 0
+    
+    def start(self) -> None:
+        """Start preparing sessions."""
+        self._fill()
+        logger.info(
+            f"Session pool started: ahead={self.ahead}, preconnect={self.preconnect}, "
+            f"sessions={self._remaining + len(self._pending)}"
+        )
+    
+    async def acquire(self) -> GatewaySession:
+        """
+        Get prepared session or open one immediately.
+        
+        Returns:
+            Session with an open WebSocket connection
+        """
+        start_time = time.perf_counter()
+        session = None
+        
+        while self._pending and session is None:
+            prepared = self._pending.popleft()
+            try:
+                session = await prepared
+                self.prepared_hits += 1
+            except Exception as e:
+                logger.warning(f"Prepared session failed, trying next: {e}")
+        
+        if session is None:
+            self.misses += 1
+            self._remaining = max(self._remaining - 1, 0)
+            self._fill()
+            session = await self.client.open_session()
+        else:
+            self._fill()
+        
+        # Prepared connection may have been closed by the server while idle
+        if not session.connected:
+            session.websocket = await self.client.connect_websocket(session.session_id)
+        
+        logger.debug(
+            f"Session {session.session_id} ready in "
+            f"{(time.perf_counter() - start_time) * 1000:.1f}ms"
+        )
+        return session
+    
+    async def close(self) -> None:
+        """Stop preparing sessions and close prepared ones."""
+        pending, self._pending = list(self._pending), deque()
+        self._remaining = 0
+        
+        for prepared in pending:
+            prepared.cancel()
+        
+        unused = 0
+        for result in await asyncio.gather(*pending, return_exceptions=True):
+            if isinstance(result, GatewaySession):
+                await result.close()
+                unused += 1
+        
+        logger.info(
+            f"Session pool closed: prepared_hits={self.prepared_hits}, misses={self.misses}, "
+            f"unused={unused}"
+        )
+    
+    def _fill(self) -> None:
+        """Schedule session preparation up to `ahead` sessions."""
+        while self._remaining > 0 and len(self._pending) < self.ahead:
+            self._pending.append(asyncio.create_task(self._prepare()))
+            self._remaining -= 1
+    
+    async def _prepare(self) -> GatewaySession:
+        """Create session and optionally connect its WebSocket."""
+        return await self.client.open_session(connect=self.preconnect)
+    
+    @staticmethod
+    async def _ready(session: GatewaySession) -> GatewaySession:
+        """Wrap already opened session as a prepared one."""
+        return session
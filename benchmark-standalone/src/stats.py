@@ -0,0 +1,28 @@
+"""
+Stats - общие статистические функции.
+
+Используются политикой таймаутов (timeouts.py) и self-benchmark
+(selfbench.py), поэтому вынесены отдельно и не тянут зависимостей.
+"""
+from typing import List
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """
+    Percentile with linear interpolation between closest ranks.
+    
+    Args:
+        samples: Sample values
+        q: Percentile in [0, 100]
+    
+    Returns:
+        Percentile value (0.0 for no samples)
+    """
+    if not samples:
+        return 0.0
+    
+    ordered = sorted(samples)
+    rank = (len(ordered) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
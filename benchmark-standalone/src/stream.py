@@ -0,0 +1,122 @@
+"""
+Stream Accumulator - сборка потокового ответа агента из токенов assistant_message.
+
+Токены складываются в список чанков (без повторного копирования строки),
+попутно измеряются время до первого токена и интервалы между токенами.
+"""
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+
+class StreamAccumulator:
+    """
+    Accumulates streamed tokens with linear memory and CPU cost.
+    
+    Usage:
+        response = StreamAccumulator(progress_interval=1000)
+        response.start()                 # request sent
+        response.add(token)              # for every assistant_message
+        if response.progress_due():
+            logger.debug(f"Received {response.length} characters...")
+        text = response.text()           # assembled only when asked
+    """
+    
+    def __init__(self, progress_interval: int = 1000):
+        """
+        Initialize accumulator.
+        
+        Args:
+            progress_interval: Characters between progress reports
+        """
+        self.progress_interval = progress_interval
+        self.length = 0
+        self.token_count = 0
+        self._chunks: List[str] = []
+        self._gaps: List[float] = []
+        self._started_at: Optional[float] = None
+        self._first_token_at: Optional[float] = None
+        self._last_token_at: Optional[float] = None
+        self._next_progress = progress_interval
+    
+    def start(self) -> None:
+        """Mark the moment the request was sent (reference for time to first token)."""
+        self._started_at = time.perf_counter()
+    
+    def add(self, token: str) -> None:
+        """
+        Append streamed token.
+        
+        Args:
+            token: Token text (empty tokens only update timings)
+        """
+        now = time.perf_counter()
+        if self._started_at is None:
+            self._started_at = now
+        
+        if self._first_token_at is None:
+            self._first_token_at = now
+        elif self._last_token_at is not None:
+            self._gaps.append(now - self._last_token_at)
+        self._last_token_at = now
+        
+        self.token_count += 1
+        if token:
+            self._chunks.append(token)
+            self.length += len(token)
+    
+    def pause(self) -> None:
+        """
+        End current run of tokens (e.g. on tool_call).
+        
+        Time spent outside the stream, such as local tool execution, is not
+        counted as an inter-token gap.
+        """
+        self._last_token_at = None
+    
+    def progress_due(self) -> bool:
+        """Whether another `progress_interval` characters arrived since the last report."""
+        if self.length < self._next_progress:
+            return False
+        
+        self._next_progress = (self.length // self.progress_interval + 1) * self.progress_interval
+        return True
+    
+    def text(self) -> str:
+        """Assembled response text."""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+    
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """Seconds from start() to the first token."""
+        if self._first_token_at is None or self._started_at is None:
+            return None
+        return self._first_token_at - self._started_at
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Streaming statistics.
+        
+        Returns:
+            Characters, tokens, time to first token, inter-token gap
+            mean/p95/max and token rate (seconds, tokens per second)
+        """
+        gaps = self._gaps
+        streaming_seconds = sum(gaps)
+        
+        return {
+            "chars": self.length,
+            "tokens": self.token_count,
+            "time_to_first_token": self.time_to_first_token,
+            "mean_gap": statistics.fmean(gaps) if gaps else None,
+            "p95_gap": statistics.quantiles(gaps, n=20)[-1] if len(gaps) > 1 else None,
+            "max_gap": max(gaps) if gaps else None,
+            "tokens_per_second": (
+                len(gaps) / streaming_seconds if streaming_seconds > 0 else None
+            ),
+        }
+    
+    def __len__(self) -> int:
+        return self.length
@@ -0,0 +1,231 @@
+"""
+Timeout Policy - таймауты задач по истории их выполнения.
+
+Для каждой задачи считаются два дедлайна:
+- idle: сколько ждать следующего сообщения Gateway;
+- total: сколько может длиться вся задача.
+
+Дедлайны выводятся из прошлых успешных прогонов той же задачи, а при
+нехватке истории - задач той же категории: перцентиль × factor от
+длительности прогона (TaskExecution.metrics.duration_seconds) для total и
+от самого долгого ожидания сообщения Gateway (metrics.max_idle_seconds)
+для idle. Без истории используются таймауты из конфигурации. Из базы
+читаются только эти два значения и только последние history_limit
+прогонов на задачу и на категорию (оконная функция в SQL).
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import TaskExecution
+from .stats import percentile
+
+logger = logging.getLogger("benchmark.timeouts")
+
+
+class TaskTimeout:
+    """Idle and total deadlines of one task execution."""
+    
+    def __init__(self, idle: float, total: Optional[float] = None, source: str = "default"):
+        """
+        Initialize task timeout.
+        
+        Args:
+            idle: Seconds to wait for the next Gateway message
+            total: Seconds the whole task may take (None - unlimited)
+            source: Where the deadlines come from ("task", "category", "default")
+        """
+        self.idle = idle
+        self.total = total
+        self.source = source
+    
+    def __repr__(self) -> str:
+        return f"<TaskTimeout(idle={self.idle}, total={self.total}, source='{self.source}')>"
+
+
+class TimeoutPolicy:
+    """
+    Derives per-task deadlines from historical durations.
+    
+    Usage:
+        policy = TimeoutPolicy(default_idle=60, category_idle={"complex": 300})
+        await policy.load(db, mode="multi-agent")
+        timeout = policy.for_task(task)
+        await client.execute_task(..., timeout=timeout)
+    """
+    
+    def __init__(
+        self,
+        default_idle: float = 60,
+        category_idle: Optional[Dict[str, float]] = None,
+        factor: float = 2.0,
+        quantile: float = 99,
+        min_samples: int = 5,
+        min_seconds: float = 30,
+        max_seconds: float = 1800,
+        history_limit: int = 200
+    ):
+        """
+        Initialize timeout policy.
+        
+        Args:
+            default_idle: Idle timeout without history
+            category_idle: Idle timeouts without history per task category or type
+                (the larger one wins when both match)
+            factor: Multiplier applied to the historical percentile
+            quantile: Percentile of historical durations, in [0, 100]
+            min_samples: Runs needed before history is trusted
+            min_seconds: Lower bound of learned deadlines
+            max_seconds: Upper bound of learned deadlines
+            history_limit: Most recent runs kept per task and per category
+        """
+        self.default_idle = default_idle
+        self.category_idle = dict(category_idle or {})
+        self.factor = factor
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.history_limit = history_limit
+        
+        # Durations and longest message waits of recent runs
+        self._by_task: Dict[str, List[float]] = {}
+        self._by_category: Dict[str, List[float]] = {}
+        self._idle_by_task: Dict[str, List[float]] = {}
+        self._idle_by_category: Dict[str, List[float]] = {}
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], default_idle: float) -> "TimeoutPolicy":
+        """
+        Create policy from the benchmark.timeouts config section.
+        
+        Args:
+            config: Section values (missing keys use defaults)
+            default_idle: Idle timeout without history (gateway.timeout)
+        
+        Returns:
+            Timeout policy
+        """
+        return cls(
+            default_idle=default_idle,
+            category_idle=config.get('category_idle'),
+            factor=config.get('factor', 2.0),
+            quantile=config.get('percentile', 99),
+            min_samples=config.get('min_samples', 5),
+            min_seconds=config.get('min_seconds', 30),
+            max_seconds=config.get('max_seconds', 1800),
+            history_limit=config.get('history_limit', 200)
+        )
+    
+    async def load(self, db: AsyncSession, mode: Optional[str] = None) -> int:
+        """
+        Load durations and message waits of recent successful task executions.
+        
+        Args:
+            db: Database session
+            mode: Only use runs of this execution mode
+        
+        Returns:
+            Number of runs loaded
+        """
+        duration = TaskExecution.metrics["duration_seconds"].as_float()
+        max_idle = TaskExecution.metrics["max_idle_seconds"].as_float()
+        newest_first = TaskExecution.started_at.desc()
+        
+        runs = (
+            select(
+                TaskExecution.task_id,
+                TaskExecution.task_category,
+                duration.label("duration"),
+                max_idle.label("max_idle"),
+                func.row_number().over(
+                    partition_by=TaskExecution.task_id, order_by=newest_first
+                ).label("task_rank"),
+                func.row_number().over(
+                    partition_by=TaskExecution.task_category, order_by=newest_first
+                ).label("category_rank"),
+            )
+            .where(TaskExecution.success.is_(True), duration > 0)
+        )
+        if mode:
+            runs = runs.where(TaskExecution.mode == mode)
+        runs = runs.subquery()
+        
+        # Only the most recent history_limit runs per task and per category leave the database
+        query = (
+            select(runs)
+            .where(or_(
+                runs.c.task_rank <= self.history_limit,
+                runs.c.category_rank <= self.history_limit
+            ))
+        )
+        
+        self._by_task = {}
+        self._by_category = {}
+        self._idle_by_task = {}
+        self._idle_by_category = {}
+        loaded = 0
+        
+        for row in (await db.execute(query)).all():
+            keyed = []
+            if row.task_rank <= self.history_limit:
+                keyed.append((self._by_task, self._idle_by_task, row.task_id))
+            if row.category_rank <= self.history_limit:
+                keyed.append((self._by_category, self._idle_by_category, row.task_category))
+            
+            for durations, waits, key in keyed:
+                durations.setdefault(key, []).append(float(row.duration))
+                # Runs recorded before message waits were measured have none
+                if row.max_idle is not None and row.max_idle > 0:
+                    waits.setdefault(key, []).append(float(row.max_idle))
+            loaded += 1
+        
+        logger.info(
+            f"⏱️  Timeout history loaded: {loaded} runs, {len(self._by_task)} tasks, "
+            f"{len(self._by_category)} categories"
+        )
+        return loaded
+    
+    def for_task(self, task: Dict[str, Any]) -> TaskTimeout:
+        """
+        Deadlines for a task.
+        
+        Args:
+            task: Task definition from YAML
+        
+        Returns:
+            Learned deadlines, or configured idle timeout without history
+            (also used for idle when runs have no recorded message waits)
+        """
+        task_id = task.get('id', 'unknown')
+        category = task.get('category', 'simple')
+        configured = [
+            self.category_idle[key] for key in (category, task.get('type'))
+            if key in self.category_idle
+        ]
+        fallback_idle = max(configured) if configured else self.default_idle
+        
+        for source, samples, waits in (
+            ("task", self._by_task.get(task_id, []), self._idle_by_task.get(task_id, [])),
+            (
+                "category",
+                self._by_category.get(category, []),
+                self._idle_by_category.get(category, [])
+            ),
+        ):
+            if len(samples) < self.min_samples:
+                continue
+            
+            total = self._learned(samples)
+            idle = self._learned(waits) if len(waits) >= self.min_samples else fallback_idle
+            # A healthy task never waits longer for one message than for the whole run
+            return TaskTimeout(idle=min(idle, total), total=total, source=source)
+        
+        return TaskTimeout(idle=fallback_idle)
+    
+    def _learned(self, samples: List[float]) -> float:
+        """Percentile of samples times factor, clamped to [min_seconds, max_seconds]."""
+        value = percentile(samples, self.quantile) * self.factor
+        return min(max(value, self.min_seconds), self.max_seconds)
@@ -0,0 +1,448 @@
+"""
+Tree Snapshot - снимок дерева файлов workspace в памяти.
+
+Дерево обходится один раз через os.scandir (без stat каждого файла), после
+чего list_files и статистика проекта отвечают из памяти за время,
+пропорциональное результату, а не размеру дерева. Снимок обновляется
+собственными изменениями MockToolExecutor; изменения извне либо приходят
+от inotify (Linux, опционально), либо снимок перестраивается после
+mark_stale(). Измененные пути (включая запись содержимого, о которой
+сообщает inotify) журналируются, чтобы CodeIndex перечитывал только их
+(changes_since). Каталоги .git, .dart_tool и build в снимок не входят.
+"""
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger("benchmark.tree_snapshot")
+
+# Directories with tool caches and build output, left out of snapshots and search
+IGNORED_DIRS = frozenset({".git", ".dart_tool", "build"})
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+
+WATCH_MASK = (
+    IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+    | IN_CLOSE_WRITE | IN_ONLYDIR
+)
+EVENT_HEADER = struct.Struct("iIII")
+READ_SIZE = 64 * 1024
+
+# Changed paths kept for changes_since(); beyond this consumers rescan everything
+MAX_CHANGE_LOG = 10000
+
+# Position in the change log: (snapshot epoch, index)
+ChangeCursor = Tuple[int, int]
+
+
+def ignored(rel_path: str) -> bool:
+    """Whether path lies in an ignored directory."""
+    return any(part in IGNORED_DIRS for part in rel_path.split("/"))
+
+
+def normalize(rel_path: str) -> str:
+    """Relative path in snapshot form ('' for the root)."""
+    normalized = os.path.normpath(rel_path).replace(os.sep, "/")
+    return "" if normalized == "." else normalized.strip("/")
+
+
+class InotifyWatcher:
+    """
+    Minimal inotify binding (libc through ctypes, no dependencies).
+    
+    Events are not read in the background: the snapshot drains the queue
+    before answering, so it reflects everything that happened until then.
+    """
+    
+    def __init__(self):
+        """
+        Initialize inotify instance.
+        
+        Raises:
+            OSError: If inotify is not available (not Linux, no libc)
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+    
+    def add_watch(self, path: str) -> int:
+        """
+        Watch directory entries being created, deleted, moved or written.
+        
+        Args:
+            path: Absolute directory path
+        
+        Returns:
+            Watch descriptor
+        
+        Raises:
+            OSError: If the watch cannot be added (e.g. max_user_watches reached)
+        """
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch {path}: {os.strerror(errno)}")
+        return wd
+    
+    def remove_watch(self, wd: int) -> None:
+        """Stop watching (errors for already removed watches are ignored)."""
+        self._libc.inotify_rm_watch(self.fd, wd)
+    
+    def read_events(self) -> List[Tuple[int, int, str]]:
+        """
+        Queued events without blocking.
+        
+        Returns:
+            (wd, mask, name) tuples
+        """
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, READ_SIZE)
+            except BlockingIOError:
+                return events
+            
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((wd, mask, name))
+    
+    def close(self) -> None:
+        """Close inotify descriptor (removes all watches)."""
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class TreeSnapshot:
+    """
+    Directory tree of a workspace kept in memory.
+    
+    Usage:
+        tree = TreeSnapshot(workspace_path, watch=True)
+        files = tree.list_files("lib", recursive=True)
+        count = tree.count_files("test", "*.dart")
+        tree.update("lib/main.dart")  # after the executor changes it
+        tree.mark_stale()             # after an external tool ran (without watcher)
+        cursor, changed = tree.changes_since(cursor)
+        tree.close()
+    """
+    
+    def __init__(self, root: Path, watch: bool = False):
+        """
+        Initialize tree snapshot (built on first query).
+        
+        Args:
+            root: Workspace directory
+            watch: Follow external changes with inotify instead of rescanning after mark_stale()
+        """
+        self.root = root
+        self.watch = watch
+        self.generation = 0
+        
+        # Directory -> file names and subdirectory names in it
+        self._files: Dict[str, Set[str]] = {}
+        self._dirs: Dict[str, Set[str]] = {}
+        self._built = False
+        self._stale = False
+        
+        self._watcher: Optional[InotifyWatcher] = None
+        self._watches: Dict[int, str] = {}
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._counts_generation = -1
+        
+        # Paths changed since the last rebuild; a rebuild starts a new epoch
+        self._changes: List[str] = []
+        self._epoch = 0
+    
+    @property
+    def watching(self) -> bool:
+        """Whether external changes arrive through inotify."""
+        return self._watcher is not None
+    
+    def mark_stale(self) -> None:
+        """Rebuild before the next query unless inotify reports the changes."""
+        if not self.watching:
+            self._stale = True
+    
+    def update(self, rel_path: str) -> None:
+        """
+        Record a path changed by the executor.
+        
+        Args:
+            rel_path: File or directory relative to root (missing paths are removed)
+        """
+        if not self._built:
+            return
+        
+        rel_path = normalize(rel_path)
+        if not rel_path or rel_path.startswith("..") or ignored(rel_path):
+            return
+        
+        self._sync(rel_path)
+    
+    def changes_since(
+        self,
+        cursor: Optional[ChangeCursor]
+    ) -> Tuple[ChangeCursor, Optional[List[str]]]:
+        """
+        Paths changed since an earlier call (pending inotify events applied first).
+        
+        Args:
+            cursor: Cursor returned by the previous call (None on the first call)
+        
+        Returns:
+            New cursor and changed files or directories relative to root (a
+            directory stands for its whole subtree), or None if the changes are
+            unknown: first call, snapshot rebuilt or change log overflowed
+        """
+        self._refresh()
+        
+        current = (self._epoch, len(self._changes))
+        if cursor is None or cursor[0] != self._epoch:
+            return current, None
+        return current, self._changes[cursor[1]:]
+    
+    def list_files(self, rel_dir: str, recursive: bool = False) -> Optional[List[str]]:
+        """
+        Files of a directory.
+        
+        Args:
+            rel_dir: Directory relative to root
+            recursive: Include files of subdirectories (ignored directories are skipped)
+        
+        Returns:
+            Relative file paths, or None if the directory is not in the snapshot
+        """
+        self._refresh()
+        
+        rel_dir = normalize(rel_dir)
+        if rel_dir not in self._files:
+            return None
+        
+        files = []
+        for directory in (self._walk(rel_dir) if recursive else [rel_dir]):
+            prefix = f"{directory}/" if directory else ""
+            files.extend(prefix + name for name in self._files[directory])
+        return files
+    
+    def count_files(self, rel_dir: str = ".", pattern: str = "*") -> int:
+        """
+        Number of files below a directory whose names match a glob.
+        
+        Counts are remembered until the tree changes.
+        
+        Args:
+            rel_dir: Directory relative to root (missing directories count 0)
+            pattern: Glob for file names
+        
+        Returns:
+            File count
+        """
+        self._refresh()
+        
+        if self._counts_generation != self.generation:
+            self._counts.clear()
+            self._counts_generation = self.generation
+        
+        rel_dir = normalize(rel_dir)
+        key = (rel_dir, pattern)
+        if key not in self._counts:
+            if rel_dir not in self._files:
+                count = 0
+            elif pattern == "*":
+                count = sum(len(self._files[d]) for d in self._walk(rel_dir))
+            else:
+                count = sum(
+                    len(fnmatch.filter(self._files[d], pattern)) for d in self._walk(rel_dir)
+                )
+            self._counts[key] = count
+        return self._counts[key]
+    
+    def close(self) -> None:
+        """Stop watching for changes."""
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+            self._watches.clear()
+    
+    def _refresh(self) -> None:
+        """Build the snapshot, apply pending inotify events or rebuild if stale."""
+        if self._watcher is not None:
+            self._apply_events()
+        
+        if self._built and not self._stale:
+            return
+        
+        self.close()
+        self._files.clear()
+        self._dirs.clear()
+        if self.watch:
+            try:
+                self._watcher = InotifyWatcher()
+            except OSError as e:
+                logger.warning(f"⚠️ inotify unavailable, rescanning after changes instead: {e}")
+                self.watch = False
+        
+        self._scan("")
+        self._built = True
+        self._stale = False
+        self.generation += 1
+        self._new_epoch()
+        logger.debug(
+            f"Tree snapshot of {self.root}: {len(self._files)} directories, "
+            f"{sum(len(names) for names in self._files.values())} files"
+        )
+    
+    def _scan(self, rel_dir: str) -> None:
+        """Add a directory subtree to the snapshot."""
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            full_path = os.path.join(self.root, current)
+            
+            if self._watcher is not None:
+                try:
+                    self._watches[self._watcher.add_watch(full_path)] = current
+                except OSError as e:
+                    logger.warning(f"⚠️ Cannot watch {full_path}, rescanning instead: {e}")
+                    self.close()
+                    self.watch = False
+            
+            files: Set[str] = set()
+            dirs: Set[str] = set()
+            try:
+                with os.scandir(full_path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if entry.name not in IGNORED_DIRS:
+                                    dirs.add(entry.name)
+                            elif entry.is_file():
+                                files.add(entry.name)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+            
+            self._files[current] = files
+            self._dirs[current] = dirs
+            stack.extend(f"{current}/{name}" if current else name for name in dirs)
+    
+    def _walk(self, rel_dir: str) -> List[str]:
+        """Directory and all its subdirectories in the snapshot."""
+        result = []
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            result.append(current)
+            stack.extend(
+                f"{current}/{name}" if current else name for name in self._dirs.get(current, ())
+            )
+        return result
+    
+    def _sync(self, rel_path: str) -> None:
+        """Bring one path in line with the disk, creating parent entries as needed."""
+        parent, _, name = rel_path.rpartition("/")
+        if parent not in self._files:
+            if os.path.isdir(os.path.join(self.root, parent)) and parent:
+                self._sync(parent)
+            if parent not in self._files:
+                return
+        
+        full_path = os.path.join(self.root, rel_path)
+        self._remove(parent, name)
+        if os.path.isdir(full_path) and not os.path.islink(full_path):
+            self._dirs[parent].add(name)
+            self._scan(rel_path)
+        elif os.path.isfile(full_path):
+            self._files[parent].add(name)
+        self.generation += 1
+        self._record(rel_path)
+    
+    def _record(self, rel_path: str) -> None:
+        """Add a changed path to the change log."""
+        if len(self._changes) >= MAX_CHANGE_LOG:
+            self._new_epoch()
+            return
+        self._changes.append(rel_path)
+    
+    def _new_epoch(self) -> None:
+        """Forget logged changes, cursors of earlier epochs report them as unknown."""
+        self._changes.clear()
+        self._epoch += 1
+    
+    def _remove(self, parent: str, name: str) -> None:
+        """Drop an entry (and the subtree of a directory) from the snapshot."""
+        self._files[parent].discard(name)
+        if name not in self._dirs[parent]:
+            return
+        
+        self._dirs[parent].discard(name)
+        rel_dir = f"{parent}/{name}" if parent else name
+        removed = set(self._walk(rel_dir))
+        for directory in removed:
+            self._files.pop(directory, None)
+            self._dirs.pop(directory, None)
+        
+        if self._watcher is not None:
+            for wd, directory in list(self._watches.items()):
+                if directory in removed:
+                    self._watcher.remove_watch(wd)
+                    del self._watches[wd]
+    
+    def _apply_events(self) -> None:
+        """Apply queued inotify events to the snapshot."""
+        for wd, mask, name in self._watcher.read_events():
+            if mask & IN_Q_OVERFLOW:
+                logger.debug(f"inotify queue overflow for {self.root}, rebuilding snapshot")
+                self._stale = True
+                self.close()
+                return
+            
+            directory = self._watches.get(wd)
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if directory is None or not name or directory not in self._files:
+                continue
+            
+            rel_path = f"{directory}/{name}" if directory else name
+            if mask & IN_ISDIR and name in IGNORED_DIRS:
+                continue
+            if mask & IN_CLOSE_WRITE:
+                # Content written in place: the tree is the same, only readers of files care
+                self._record(rel_path)
+                continue
+            self._sync(rel_path)
+    
+    def __repr__(self) -> str:
+        return f"<TreeSnapshot(root='{self.root}', watching={self.watching})>"
+
@@ -0,0 +1,200 @@
+"""
+Validation Cache - кэш результатов проверок по содержимому файлов.
+
+Ключ записи - тип проверки, ее параметры, хэши содержимого задействованных
+файлов и версия toolchain. Повторная проверка неизменных файлов (повторные
+прогоны, single-agent и multi-agent режимы на одном проекте) возвращается
+из кэша без запуска анализатора или тестов.
+
+Кэш ограничен max_entries (вытесняются давно не использованные записи) и
+сохраняется в JSON файл между запусками.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .process import CommandRunner
+
+logger = logging.getLogger("benchmark.validation_cache")
+
+CACHE_VERSION = 2
+
+
+class ValidationCache:
+    """
+    Bounded LRU cache of check results persisted to disk.
+    
+    Usage:
+        cache = ValidationCache(Path("data/validation_cache.json"))
+        key = cache.make_key("syntax_valid", params, file_hashes, toolchain)
+        result = cache.get(key)
+        if result is None:
+            result = await run_check()
+            cache.put(key, result)
+        cache.save()
+    """
+    
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 10000):
+        """
+        Initialize cache and load entries saved by previous runs.
+        
+        Args:
+            path: JSON file for persistence (None - in memory only)
+            max_entries: Maximum number of cached results
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._toolchains: Dict[str, str] = {}
+        self._toolchain_lock = asyncio.Lock()
+        self._dirty = False
+        
+        if path is not None:
+            self._load()
+    
+    @staticmethod
+    def make_key(
+        check_type: str,
+        params: Dict[str, Any],
+        file_hashes: Dict[str, str],
+        toolchain: str
+    ) -> str:
+        """
+        Build cache key.
+        
+        Args:
+            check_type: auto_check type
+            params: Check parameters
+            file_hashes: Content hash of every file the check depends on
+            toolchain: Version of the tools running the check
+        
+        Returns:
+            Key as hex digest
+        """
+        payload = json.dumps(
+            [check_type, params, sorted(file_hashes.items()), toolchain],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached result, counting a hit or a miss.
+        
+        Args:
+            key: Key from make_key()
+        
+        Returns:
+            Cached check result or None
+        """
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(result)
+    
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Store check result, evicting the least recently used entries.
+        
+        Args:
+            key: Key from make_key()
+            result: JSON-serializable check result
+        """
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._dirty = True
+    
+    async def toolchain_version(self, tool: str, runner: CommandRunner) -> str:
+        """
+        Version of a command line tool, determined once per cache.
+        
+        Args:
+            tool: Executable name, e.g. "dart" or "flutter"
+            runner: Command runner used to call `<tool> --version`
+        
+        Returns:
+            First line of the version output, or a marker if the tool is missing
+        """
+        async with self._toolchain_lock:
+            if tool not in self._toolchains:
+                try:
+                    result = await runner.run([tool, "--version"], cwd=Path.cwd(), timeout=120)
+                    output = (result.stdout.strip() or result.stderr.strip()).splitlines()
+                    version = output[0] if output else f"{tool} (exit {result.return_code})"
+                except OSError:
+                    version = f"{tool} (not found)"
+                self._toolchains[tool] = version
+                logger.debug(f"Toolchain version: {version}")
+            return self._toolchains[tool]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache counters of this run."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+    
+    def save(self) -> None:
+        """Write entries to disk (atomically, only if changed)."""
+        if self.path is None or not self._dirty:
+            return
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"version": CACHE_VERSION, "entries": list(self._entries.items())}
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        
+        self._dirty = False
+        logger.info(f"💾 Validation cache saved: {len(self._entries)} entries ({self.path})")
+    
+    def _load(self) -> None:
+        """Read entries saved by a previous run."""
+        if not self.path.exists():
+            return
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable validation cache {self.path}: {e}")
+            return
+        
+        if data.get("version") != CACHE_VERSION:
+            logger.info(f"Validation cache format changed, starting empty: {self.path}")
+            return
+        
+        entries: List[Any] = data.get("entries", [])
+        self._entries = OrderedDict(entries[-self.max_entries:])
+        logger.info(f"Validation cache loaded: {len(self._entries)} entries")
+    
+    def __repr__(self) -> str:
+        return (
+            f"<ValidationCache(entries={len(self._entries)}, hits={self.hits}, "
+            f"misses={self.misses})>"
+        )
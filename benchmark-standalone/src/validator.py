@@ -2,16 +2,38 @@
 Task Validator - автоматическая проверка выполнения benchmark задач.
 
 Адаптировано из codelab-ai-service/benchmark/scripts/task_validator.py
+Проверки auto_check независимы и выполняются параллельно, внешние команды
+запускаются через общий CommandRunner.
 """
 import asyncio
 import hashlib
 import logging
-import subprocess
+import os
+import re
+import time
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
+
+from .analysis import AnalysisServerError, AnalysisServers, DartAnalysisServer
+from .machine_output import AnalyzerOutputParser, TestOutputParser
+from .process import CommandRunner
+from .tree_snapshot import TreeSnapshot
+from .validation_cache import ValidationCache
+from .workspace import Workspace
 
 logger = logging.getLogger("benchmark.validator")
 
+# File is considered written once its size and mtime stop changing for this long
+STABLE_INTERVAL = 0.05
+
+# Checks expensive enough to cache (the others only read one file)
+CACHED_CHECKS = {"syntax_valid", "test_passes"}
+
+# Project files every analyzer or test result depends on
+PROJECT_CONFIG_FILES = ("pubspec.yaml", "pubspec.lock", "analysis_options.yaml")
+
+DART_DIRECTIVE = re.compile(r"""^\s*(?:import|export|part)\s+['"]([^'"]+)['"]""", re.MULTILINE)
+
 
 class TaskValidator:
     """
@@ -20,14 +42,36 @@ class TaskValidator:
     Использует auto_check спецификацию из YAML для проверки результатов.
     """
     
-    def __init__(self, project_path: Path):
+    def __init__(
+        self,
+        project_path: Path,
+        command_runner: Optional[CommandRunner] = None,
+        settle_timeout: float = 2.0,
+        analysis_servers: Optional[AnalysisServers] = None,
+        cache: Optional[ValidationCache] = None,
+        tree: Optional[TreeSnapshot] = None,
+        workspace: Optional[Workspace] = None
+    ):
         """
         Initialize validator.
         
         Args:
             project_path: Path to Flutter test project
+            command_runner: Runner for dart/flutter, shared to limit concurrent commands
+            settle_timeout: Maximum seconds to wait for a checked file to stop changing
+            analysis_servers: Warm analysis servers for syntax checks
+                (default: dart analyze per check)
+            cache: Result cache for syntax_valid and test_passes checks
+            tree: Tree snapshot of project_path shared with the tool executor
+            workspace: Optional isolated workspace backing project_path
         """
         self.project_path = project_path
+        self.command_runner = command_runner or CommandRunner()
+        self.settle_timeout = settle_timeout
+        self.analysis_servers = analysis_servers
+        self.cache = cache
+        self.tree = tree
+        self.workspace = workspace
         
         if not self.project_path.exists():
             logger.warning(f"Project path not found: {self.project_path}")
@@ -40,7 +84,7 @@ class TaskValidator:
         
         Args:
             task: Task definition from YAML
-            
+        
         Returns:
             Validation result with passed checks and details
         """
@@ -60,41 +104,23 @@ class TaskValidator:
         
         logger.info(f"Validating task {task_id} with {len(auto_checks)} checks")
         
-        results = []
-        passed = 0
-        failed = 0
+        # Checks are independent: total time is close to the slowest one
+        start_time = time.perf_counter()
+        results = await asyncio.gather(*(self._run_check_safe(check) for check in auto_checks))
+        duration = time.perf_counter() - start_time
         
-        for check in auto_checks:
-            check_type = check.get('type')
-            params = check.get('params', {})
-            
-            try:
-                result = await self._run_check(check_type, params)
-                results.append({
-                    "type": check_type,
-                    "params": params,
-                    "passed": result['passed'],
-                    "message": result.get('message', '')
-                })
-                
-                if result['passed']:
-                    passed += 1
-                else:
-                    failed += 1
-                    
-            except Exception as e:
-                logger.error(f"Check {check_type} failed with error: {e}")
-                results.append({
-                    "type": check_type,
-                    "params": params,
-                    "passed": False,
-                    "message": f"Error: {str(e)}"
-                })
-                failed += 1
+        passed = sum(1 for result in results if result['passed'])
+        failed = len(results) - passed
+        cache_hits = sum(1 for result in results if result.get('cached') is True)
+        cache_misses = sum(1 for result in results if result.get('cached') is False)
         
         success_rate = passed / len(auto_checks) if auto_checks else 0.0
         
-        logger.info(f"Validation complete: {passed}/{len(auto_checks)} checks passed ({success_rate:.0%})")
+        logger.info(
+            f"Validation complete: {passed}/{len(auto_checks)} checks passed "
+            f"({success_rate:.0%}) in {duration:.2f}s"
+            + (f", cache {cache_hits} hits/{cache_misses} misses" if self.cache else "")
+        )
         
         return {
             "task_id": task_id,
@@ -102,9 +128,186 @@ class TaskValidator:
             "passed_checks": passed,
             "failed_checks": failed,
             "success_rate": success_rate,
+            "duration_seconds": duration,
+            "cache_hits": cache_hits,
+            "cache_misses": cache_misses,
             "details": results
         }
     
+    async def _run_check_safe(self, check: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run one auto_check entry, reporting errors as a failed check.
+        
+        Args:
+            check: auto_check entry with type and params
+        
+        Returns:
+            Check details: type, params, passed, message, optional structured details
+            (and cached - whether the result came from the cache)
+        """
+        check_type = check.get('type')
+        params = check.get('params', {})
+        
+        try:
+            cache_key = None
+            if self.cache is not None and check_type in CACHED_CHECKS:
+                cache_key = await self._cache_key(check_type, params)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    logger.debug(f"Check {check_type} {params} served from cache")
+                    return {"type": check_type, "params": params, **cached, "cached": True}
+            
+            result = await self._run_check(check_type, params)
+            outcome = {
+                "passed": result['passed'],
+                "message": result.get('message', '')
+            }
+            if result.get('details') is not None:
+                # Structured diagnostics / per-test records end up in quality evaluation details
+                outcome["details"] = result['details']
+            
+            # Timeouts, skips and errors say nothing about the files: run them again next time
+            if cache_key is not None and result.get('cacheable', True):
+                self.cache.put(cache_key, outcome)
+            
+            return {
+                "type": check_type,
+                "params": params,
+                **outcome,
+                **({"cached": False} if cache_key is not None else {})
+            }
+        except Exception as e:
+            logger.error(f"Check {check_type} failed with error: {e}")
+            return {
+                "type": check_type,
+                "params": params,
+                "passed": False,
+                "message": f"Error: {str(e)}"
+            }
+    
+    async def _cache_key(self, check_type: str, params: Dict[str, Any]) -> str:
+        """
+        Cache key of a check: its params, involved file contents and toolchain.
+        
+        Args:
+            check_type: Type of check (one of CACHED_CHECKS)
+            params: Check parameters
+        
+        Returns:
+            Cache key
+        """
+        if check_type == "syntax_valid":
+            await self._wait_until_stable(self.project_path / params.get('path', ''))
+            toolchain = await self.cache.toolchain_version("dart", self.command_runner)
+            # The server comes with the SDK: a hit must not wait for a server to start
+            if self.analysis_servers and self.analysis_servers.available:
+                toolchain += f" | {self.analysis_servers.backend}"
+            else:
+                toolchain += " | dart analyze"
+        else:
+            toolchain = await self.cache.toolchain_version("flutter", self.command_runner)
+        
+        file_hashes = await asyncio.to_thread(self._hash_involved_files, check_type, params)
+        return self.cache.make_key(check_type, params, file_hashes, toolchain)
+    
+    def _hash_involved_files(self, check_type: str, params: Dict[str, Any]) -> Dict[str, str]:
+        """Content hashes of the files a check result depends on."""
+        if check_type == "syntax_valid":
+            files = self._dart_dependencies(self.project_path / params.get('path', ''))
+        else:
+            files = [
+                Path(root) / name
+                for directory in ("lib", "test")
+                for root, _, names in os.walk(self.project_path / directory)
+                for name in names if name.endswith(".dart")
+            ]
+        files.extend(self.project_path / name for name in PROJECT_CONFIG_FILES)
+        
+        return {
+            os.path.relpath(path, self.project_path): (
+                self._get_file_hash(path) if path.is_file() else "missing"
+            )
+            for path in files
+        }
+    
+    def _dart_dependencies(self, full_path: Path) -> List[Path]:
+        """
+        Dart file and the project files it imports, exports or includes (transitively).
+        
+        Args:
+            full_path: Dart file in the project
+        
+        Returns:
+            Files whose content can change the analysis result of full_path
+        """
+        package_prefix = None
+        pubspec = self.project_path / "pubspec.yaml"
+        if pubspec.is_file():
+            match = re.search(r"^name:\s*(\S+)", pubspec.read_text(encoding='utf-8'), re.MULTILINE)
+            if match:
+                package_prefix = f"package:{match.group(1)}/"
+        
+        lib_path = self.project_path / "lib"
+        seen = {full_path}
+        queue = [full_path]
+        
+        while queue:
+            current = queue.pop()
+            try:
+                content = current.read_text(encoding='utf-8')
+            except (OSError, UnicodeDecodeError):
+                continue
+            
+            for uri in DART_DIRECTIVE.findall(content):
+                if package_prefix and uri.startswith(package_prefix):
+                    target = lib_path / uri[len(package_prefix):]
+                elif ":" not in uri:
+                    target = current.parent / uri
+                else:
+                    continue  # dart: and third-party packages are covered by pubspec.lock
+                
+                target = Path(os.path.normpath(target))
+                if target not in seen:
+                    seen.add(target)
+                    queue.append(target)
+        
+        return list(seen)
+    
+    async def _prepare_toolchain(self) -> None:
+        """Copy up toolchain caches of the workspace before dart/flutter writes them."""
+        if self.workspace:
+            await asyncio.to_thread(self.workspace.privatize)
+    
+    async def _wait_until_stable(self, full_path: Path) -> None:
+        """
+        Wait until file size and mtime stop changing.
+        
+        Replaces a fixed delay before checks: files written a while ago are
+        checked immediately, files still being written are waited for up to
+        settle_timeout.
+        
+        Args:
+            full_path: File to wait for
+        """
+        deadline = time.monotonic() + self.settle_timeout
+        previous = None
+        
+        while True:
+            try:
+                stat = full_path.stat()
+            except FileNotFoundError:
+                return
+            
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current == previous or time.time() - stat.st_mtime > STABLE_INTERVAL:
+                return
+            if time.monotonic() >= deadline:
+                logger.warning(f"File still changing after {self.settle_timeout}s: {full_path}")
+                return
+            
+            previous = current
+            await asyncio.sleep(STABLE_INTERVAL)
+    
     async def _run_check(self, check_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """
         Run specific check type.
@@ -112,7 +315,7 @@ class TaskValidator:
         Args:
             check_type: Type of check
             params: Check parameters
-            
+        
         Returns:
             Check result with passed status and message
         """
@@ -155,65 +358,100 @@ class TaskValidator:
             }
         
         try:
-            # Simple approach: just wait a fixed time for agent to complete
-            # This is more reliable than trying to detect file changes
-            await asyncio.sleep(1.0)
+            # Analyze the file only once it is completely written
+            await self._wait_until_stable(full_path)
+            await self._prepare_toolchain()
+            
+            # Warm analysis server answers in milliseconds, dart analyze is the fallback
+            server = None
+            if self.analysis_servers:
+                server = await self.analysis_servers.get(self.project_path)
+            if server:
+                try:
+                    return await self._check_syntax_with_server(server, full_path, file_path)
+                except AnalysisServerError as e:
+                    logger.warning(f"Analysis server failed, using dart analyze: {e}")
             
             # NOTE: Do NOT clear .dart_tool cache as it removes Flutter dependencies
             
-            # Run dart analyze on specific file
-            result = subprocess.run(
-                ['dart', 'analyze', str(full_path)],
-                cwd=str(self.project_path),
-                capture_output=True,
-                text=True,
-                timeout=30
+            # Run dart analyze on specific file, diagnostics are parsed as they arrive
+            parser = AnalyzerOutputParser()
+            result = await self.command_runner.run(
+                ['dart', 'analyze', '--format=machine', str(full_path)],
+                cwd=self.project_path,
+                timeout=30,
+                on_output=parser.on_output,
+                capture=False
             )
+            parser.close()
             
-            # Debug output
-            logger.debug(f"dart analyze return code: {result.returncode}")
-            logger.debug(f"dart analyze stdout: {result.stdout[:200]}")
-            
-            # Check if THIS specific file has errors
-            # dart analyze may return non-zero due to errors in OTHER files
-            # So we need to check if the output contains errors for THIS file
-            file_has_errors = False
-            if result.stdout:
-                # Check if there are errors specifically for this file
-                for line in result.stdout.split('\n'):
-                    if file_path in line and 'error' in line.lower():
-                        file_has_errors = True
-                        break
-            
-            # If no errors found for this file, check if "No issues found!" is in output
-            if not file_has_errors and 'no issues found' in result.stdout.lower():
-                file_has_errors = False
+            if result.timed_out:
+                return {
+                    "passed": False,
+                    "message": f"Syntax check timed out: {file_path}",
+                    "cacheable": False
+                }
             
-            logger.info(f"Syntax check for {file_path}: file_has_errors={file_has_errors}, return_code={result.returncode}")
+            # dart analyze may return non-zero due to errors in OTHER files,
+            # only errors reported for THIS file count
+            errors = parser.errors_for(str(full_path))
             
-            return {
-                "passed": not file_has_errors,
-                "message": f"Syntax {'valid' if not file_has_errors else 'invalid'}: {file_path}",
-                "details": result.stdout if file_has_errors else None
-            }
+            logger.info(
+                f"Syntax check for {file_path}: {len(errors)} errors, "
+                f"return_code={result.return_code}"
+            )
             
-        except subprocess.TimeoutExpired:
             return {
-                "passed": False,
-                "message": f"Syntax check timed out: {file_path}"
+                "passed": not errors,
+                "message": f"Syntax {'valid' if not errors else 'invalid'}: {file_path}",
+                "details": {"diagnostics": errors}
             }
+        
         except FileNotFoundError:
             logger.warning("dart command not found, skipping syntax check")
             return {
                 "passed": True,
-                "message": f"Syntax check skipped (dart not found): {file_path}"
+                "message": f"Syntax check skipped (dart not found): {file_path}",
+                "cacheable": False
             }
         except Exception as e:
             return {
                 "passed": False,
-                "message": f"Syntax check error: {str(e)}"
+                "message": f"Syntax check error: {str(e)}",
+                "cacheable": False
             }
     
+    async def _check_syntax_with_server(
+        self,
+        server: DartAnalysisServer,
+        full_path: Path,
+        file_path: str
+    ) -> Dict[str, Any]:
+        """Check Dart file syntax using a running analysis server."""
+        # Same diagnostic records as parsed from dart analyze --format=machine
+        errors = [
+            {
+                "severity": error['severity'],
+                "type": error.get('type'),
+                "code": error.get('code'),
+                "file": error['location']['file'],
+                "line": error['location']['startLine'],
+                "column": error['location']['startColumn'],
+                "length": error['location']['length'],
+                "message": error.get('message'),
+            }
+            for error in await server.get_errors(full_path)
+            if error.get('severity') == 'ERROR'
+        ]
+        
+        logger.info(f"Syntax check for {file_path}: {len(errors)} errors (analysis server)")
+        
+        return {
+            "passed": not errors,
+            "message": f"Syntax {'valid' if not errors else 'invalid'}: {file_path}",
+            "details": {"diagnostics": errors}
+        }
+    
     async def _check_contains_text(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Check if file contains specific text."""
         file_path = params.get('path', '')
@@ -228,12 +466,14 @@ class TaskValidator:
             }
         
         try:
+            await self._wait_until_stable(full_path)
             content = full_path.read_text(encoding='utf-8')
             contains = search_text in content
             
+            found = "found" if contains else "not found"
             return {
                 "passed": contains,
-                "message": f"Text {'found' if contains else 'not found'} in {file_path}: '{search_text}'"
+                "message": f"Text {found} in {file_path}: '{search_text}'"
             }
         except Exception as e:
             return {
@@ -246,39 +486,60 @@ class TaskValidator:
         pattern = params.get('pattern', '*')
         
         try:
-            # Run flutter test
-            result = subprocess.run(
-                ['flutter', 'test', '--no-pub', pattern],
-                cwd=str(self.project_path),
-                capture_output=True,
-                text=True,
-                timeout=60
+            await self._prepare_toolchain()
+            
+            # Run flutter test, test events are parsed as they arrive
+            parser = TestOutputParser()
+            result = await self.command_runner.run(
+                ['flutter', 'test', '--no-pub', '--machine', pattern],
+                cwd=self.project_path,
+                timeout=60,
+                on_output=parser.on_output,
+                capture=False
             )
+            parser.close()
+            
+            if result.timed_out:
+                return {
+                    "passed": False,
+                    "message": f"Tests timed out: {pattern}",
+                    "cacheable": False
+                }
             
             # Check if all tests passed
-            tests_passed = result.returncode == 0 and 'All tests passed' in result.stdout
+            summary = parser.get_summary()
+            tests_passed = (
+                result.return_code == 0
+                and summary['success'] is True
+                and summary['failed'] == 0
+            )
             
-            return {
-                "passed": tests_passed,
-                "message": f"Tests {'passed' if tests_passed else 'failed'}: {pattern}",
-                "details": result.stdout if not tests_passed else None
-            }
+            logger.info(
+                f"Tests {pattern}: {summary['passed']} passed, {summary['failed']} failed, "
+                f"{summary['skipped']} skipped"
+            )
             
-        except subprocess.TimeoutExpired:
             return {
-                "passed": False,
-                "message": f"Tests timed out: {pattern}"
+                "passed": tests_passed,
+                "message": (
+                    f"Tests {'passed' if tests_passed else 'failed'}: {pattern} "
+                    f"({summary['passed']}/{summary['total']})"
+                ),
+                "details": {"summary": summary, "tests": parser.tests}
             }
+        
         except FileNotFoundError:
             logger.warning("flutter command not found, skipping test check")
             return {
                 "passed": True,
-                "message": f"Test check skipped (flutter not found): {pattern}"
+                "message": f"Test check skipped (flutter not found): {pattern}",
+                "cacheable": False
             }
         except Exception as e:
             return {
                 "passed": False,
-                "message": f"Test execution error: {str(e)}"
+                "message": f"Test execution error: {str(e)}",
+                "cacheable": False
             }
     
     def get_project_stats(self) -> Dict[str, Any]:
@@ -288,16 +549,15 @@ class TaskValidator:
         Returns:
             Project statistics
         """
-        lib_path = self.project_path / "lib"
-        test_path = self.project_path / "test"
-        docs_path = self.project_path / "docs"
+        # Without a shared snapshot the tree is scanned once for all counts
+        tree = self.tree or TreeSnapshot(self.project_path)
         
         stats = {
             "project_path": str(self.project_path),
-            "lib_files": len(list(lib_path.rglob("*.dart"))) if lib_path.exists() else 0,
-            "test_files": len(list(test_path.rglob("*.dart"))) if test_path.exists() else 0,
-            "doc_files": len(list(docs_path.rglob("*.md"))) if docs_path.exists() else 0,
-            "total_files": len(list(self.project_path.rglob("*"))) if self.project_path.exists() else 0
+            "lib_files": tree.count_files("lib", "*.dart"),
+            "test_files": tree.count_files("test", "*.dart"),
+            "doc_files": tree.count_files("docs", "*.md"),
+            "total_files": tree.count_files(".")
         }
         
         return stats
@@ -308,7 +568,7 @@ class TaskValidator:
         
         Args:
             file_path: Path to file
-            
+        
         Returns:
             MD5 hash as hex string
         """
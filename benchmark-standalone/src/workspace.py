@@ -0,0 +1,379 @@
+"""
+Workspace Manager - изолированные рабочие копии test_project для каждой задачи.
+
+Каждая задача получает собственное дерево файлов, собранное из hardlink'ов
+на файлы базового проекта, поэтому workspace создается за миллисекунды даже
+с большим .dart_tool. Изменения не затрагивают базовый проект: запись через
+MockToolExecutor заменяет файл атомарно (ссылка разрывается), каталоги и
+файлы, которые toolchain пишет на месте (.dart_tool, build, pubspec.lock),
+копируются перед первой командой dart/flutter в workspace, а для команд,
+переписывающих исходники (dart format/fix), дерево копируется целиком
+(copy-up).
+"""
+import asyncio
+import errno
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import asynccontextmanager
+from itertools import count
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger("benchmark.workspace")
+
+# Top-level entries dart/flutter write in place: copied before the first toolchain command.
+# Kept across resets, the toolchain keeps these caches consistent itself.
+PRIVATE_PATHS = frozenset({
+    ".dart_tool", "build", "pubspec.lock", ".flutter-plugins", ".flutter-plugins-dependencies"
+})
+
+WORKSPACE_PREFIX = "ws_"
+
+
+def is_private(rel_path: str) -> bool:
+    """Whether a workspace relative path is owned by the toolchain (see PRIVATE_PATHS)."""
+    return rel_path.split(os.sep, 1)[0] in PRIVATE_PATHS
+
+
+class Workspace:
+    """
+    Isolated task workspace built from hardlinks to the base project.
+    """
+    
+    def __init__(self, path: Path, base_path: Path):
+        """
+        Initialize workspace.
+        
+        Args:
+            path: Workspace root directory
+            base_path: Base project the workspace is linked to
+        """
+        self.path = path
+        self.base_path = base_path
+        self.detached = False
+        self.private = False
+        # Executor and concurrent validator checks may copy up at the same time
+        self._detach_lock = threading.Lock()
+    
+    def privatize(self) -> int:
+        """
+        Replace hardlinked files under PRIVATE_PATHS with private copies.
+        
+        Needed before any dart/flutter command, which writes toolchain caches
+        and build output in place. Done on first use rather than on provision
+        so that tasks not running the toolchain never pay for copying
+        .dart_tool. Thread-safe.
+        
+        Returns:
+            Number of files copied
+        """
+        with self._detach_lock:
+            if self.private or self.detached:
+                return 0
+            
+            copied = sum(self._copy_up(self.path / name) for name in PRIVATE_PATHS)
+            self.private = True
+        logger.debug(f"Privatized workspace {self.path.name}: {copied} files copied")
+        return copied
+    
+    def detach(self) -> int:
+        """
+        Replace every hardlinked file with a private copy (copy-up).
+        
+        Needed only before commands that rewrite sources in place (dart format,
+        dart fix), which would otherwise write through the link into the base
+        project and other pooled workspaces. Toolchain caches and build output
+        need only privatize(). Thread-safe.
+        
+        Returns:
+            Number of files copied
+        """
+        with self._detach_lock:
+            if self.detached:
+                return 0
+            
+            copied = self._copy_up(self.path)
+            self.detached = True
+            self.private = True
+        logger.debug(f"Detached workspace {self.path.name}: {copied} files copied")
+        return copied
+    
+    @staticmethod
+    def _copy_up(top: Path) -> int:
+        """Copy every hardlinked file under top (a file or directory) in place."""
+        if top.is_symlink() or not top.exists():
+            return 0
+        
+        if top.is_dir():
+            paths = (
+                os.path.join(dirpath, name)
+                for dirpath, _, filenames in os.walk(top) for name in filenames
+            )
+        else:
+            paths = iter([str(top)])
+        
+        copied = 0
+        for file_path in paths:
+            st = os.lstat(file_path)
+            if st.st_nlink > 1 and not os.path.islink(file_path):
+                tmp_path = file_path + ".cow"
+                shutil.copy2(file_path, tmp_path)
+                os.replace(tmp_path, file_path)
+                copied += 1
+        return copied
+    
+    def __repr__(self) -> str:
+        return f"<Workspace(path='{self.path}')>"
+
+
+class WorkspaceManager:
+    """
+    Provisions per-task workspaces and recycles them through a warm pool.
+    
+    Usage:
+        manager = WorkspaceManager(Path("./_test_project"), pool_size=4)
+        async with manager.lease() as workspace:
+            executor = MockToolExecutor(workspace.path, workspace=workspace)
+    """
+    
+    def __init__(
+        self,
+        base_path: Path,
+        root: Optional[Path] = None,
+        pool_size: int = 2
+    ):
+        """
+        Initialize workspace manager.
+        
+        Args:
+            base_path: Path to base test project
+            root: Directory for workspaces (default: <base_path>.workspaces next to base);
+                must be empty or missing, only workspaces created here are removed
+            pool_size: Maximum number of idle workspaces kept for reuse
+        
+        Raises:
+            ValueError: If root overlaps the base project or holds other files
+        """
+        self.base_path = base_path.resolve()
+        self.root = (
+            root or self.base_path.with_name(f"{self.base_path.name}.workspaces")
+        ).resolve()
+        self.pool_size = pool_size
+        self._idle: List[Workspace] = []
+        self._counter = count(1)
+        self._manifest: Optional[Dict[str, Tuple[int, int]]] = None
+        self._dirs: set = set()
+        # Only what the manager created is removed on close
+        self._created: Set[Path] = set()
+        self._owns_root = False
+        
+        if self.root == self.base_path or self.root in self.base_path.parents:
+            raise ValueError(f"Workspace root must not contain the base project: {self.root}")
+        if self.base_path in self.root.parents:
+            raise ValueError(f"Workspace root must be outside the base project: {self.root}")
+        # Leftovers of an interrupted run are tolerated, anything else is someone's data
+        foreign = [
+            entry.name for entry in (os.scandir(self.root) if self.root.is_dir() else [])
+            if not (entry.name.startswith(WORKSPACE_PREFIX) and entry.is_dir(follow_symlinks=False))
+        ]
+        if foreign:
+            raise ValueError(
+                f"Workspace root is not empty: {self.root} "
+                f"(contains {', '.join(sorted(foreign)[:3])})"
+            )
+        
+        logger.info(
+            f"WorkspaceManager initialized: base={self.base_path}, root={self.root}, "
+            f"pool_size={pool_size}"
+        )
+    
+    async def acquire(self) -> Workspace:
+        """
+        Get a workspace from the warm pool or provision a new one.
+        
+        Returns:
+            Workspace ready for a task
+        """
+        if self._idle:
+            workspace = self._idle.pop()
+            logger.debug(f"Reusing workspace {workspace.path.name}")
+            return workspace
+        
+        return await asyncio.to_thread(self._provision)
+    
+    async def release(self, workspace: Workspace) -> None:
+        """
+        Return workspace to the pool, resetting it to the base project state.
+        
+        Args:
+            workspace: Workspace previously returned by acquire()
+        """
+        if len(self._idle) >= self.pool_size:
+            await asyncio.to_thread(self._discard, workspace.path)
+            return
+        
+        try:
+            await asyncio.to_thread(self._reset, workspace)
+        except OSError as e:
+            logger.warning(f"Failed to reset workspace {workspace.path.name}, discarding: {e}")
+            await asyncio.to_thread(self._discard, workspace.path)
+            return
+        
+        self._idle.append(workspace)
+    
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[Workspace]:
+        """Acquire workspace for the duration of a block."""
+        workspace = await self.acquire()
+        try:
+            yield workspace
+        finally:
+            await self.release(workspace)
+    
+    async def warm_up(self, count: Optional[int] = None) -> None:
+        """
+        Pre-provision idle workspaces.
+        
+        Args:
+            count: Number of workspaces to prepare (default: pool_size)
+        """
+        target = min(count or self.pool_size, self.pool_size)
+        while len(self._idle) < target:
+            self._idle.append(await asyncio.to_thread(self._provision))
+        
+        logger.info(f"Workspace pool warmed up: {len(self._idle)} idle")
+    
+    async def close(self) -> None:
+        """Remove workspaces created by this manager (and the root if it created it)."""
+        self._idle.clear()
+        for path in list(self._created):
+            await asyncio.to_thread(self._discard, path)
+        
+        if self._owns_root:
+            try:
+                self.root.rmdir()
+            except OSError:
+                pass
+        logger.info(f"Workspaces removed: {self.root}")
+    
+    def _discard(self, path: Path) -> None:
+        """Remove a workspace directory created by this manager."""
+        shutil.rmtree(path, ignore_errors=True)
+        self._created.discard(path)
+    
+    def _get_manifest(self) -> Dict[str, Tuple[int, int]]:
+        """Map of base project relative file paths to (device, inode)."""
+        if self._manifest is None:
+            manifest = {}
+            dirs = set()
+            for dirpath, dirnames, filenames in os.walk(self.base_path):
+                # Symlinked directories are not descended into, they are linked as entries
+                linked_dirs = [d for d in dirnames if os.path.islink(os.path.join(dirpath, d))]
+                for name in filenames + linked_dirs:
+                    file_path = os.path.join(dirpath, name)
+                    st = os.lstat(file_path)
+                    manifest[os.path.relpath(file_path, self.base_path)] = (st.st_dev, st.st_ino)
+                for name in dirnames:
+                    if name not in linked_dirs:
+                        dirs.add(os.path.relpath(os.path.join(dirpath, name), self.base_path))
+            self._manifest = manifest
+            self._dirs = dirs
+        return self._manifest
+    
+    def _provision(self) -> Workspace:
+        """Create new workspace as a hardlink tree of the base project."""
+        start_time = time.perf_counter()
+        if not self.root.exists():
+            self.root.mkdir(parents=True)
+            self._owns_root = True
+        
+        while True:
+            path = self.root / f"{WORKSPACE_PREFIX}{os.getpid()}_{next(self._counter)}"
+            try:
+                path.mkdir()
+                break
+            except FileExistsError:
+                # Left by an interrupted run, not ours to reuse or remove
+                continue
+        self._created.add(path)
+        
+        for rel_path in self._get_manifest():
+            self._link(rel_path, path)
+        for rel_dir in self._dirs:
+            os.makedirs(path / rel_dir, exist_ok=True)
+        
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        logger.info(f"Provisioned workspace {path.name} ({duration_ms:.1f}ms)")
+        return Workspace(path, self.base_path)
+    
+    def _link(self, rel_path: str, workspace_path: Path) -> None:
+        """Link (or copy if linking is impossible) a base file."""
+        src = os.path.join(self.base_path, rel_path)
+        dst = os.path.join(workspace_path, rel_path)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        
+        if os.path.islink(src):
+            os.symlink(os.readlink(src), dst)
+            return
+        
+        try:
+            os.link(src, dst)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+            shutil.copy2(src, dst)
+    
+    def _reset(self, workspace: Workspace) -> None:
+        """
+        Bring workspace back to base state touching only changed entries.
+        
+        Linked files are compared by inode, copied-up files under private
+        paths by size and mtime with the base file. Untracked files under
+        private paths (toolchain caches, build output) are kept for the next
+        task. Private paths linked again by the reset are copied up by the
+        next privatize().
+        """
+        manifest = self._get_manifest()
+        seen = set()
+        
+        for dirpath, dirnames, filenames in os.walk(workspace.path, topdown=False):
+            for name in filenames:
+                file_path = os.path.join(dirpath, name)
+                rel_path = os.path.relpath(file_path, workspace.path)
+                st = os.lstat(file_path)
+                
+                if rel_path in manifest and self._unchanged(rel_path, st, manifest[rel_path]):
+                    seen.add(rel_path)
+                    continue
+                if rel_path not in manifest and is_private(rel_path):
+                    continue
+                
+                os.unlink(file_path)
+            
+            for name in dirnames:
+                dir_path = os.path.join(dirpath, name)
+                rel_path = os.path.relpath(dir_path, workspace.path)
+                if os.path.islink(dir_path):
+                    os.unlink(dir_path)
+                elif rel_path not in self._dirs and not os.listdir(dir_path):
+                    os.rmdir(dir_path)
+        
+        for rel_dir in self._dirs:
+            os.makedirs(workspace.path / rel_dir, exist_ok=True)
+        for rel_path in manifest.keys() - seen:
+            self._link(rel_path, workspace.path)
+        
+        workspace.detached = False
+        workspace.private = False
+    
+    def _unchanged(self, rel_path: str, st: os.stat_result, inode: Tuple[int, int]) -> bool:
+        """Whether a workspace file still matches its base file."""
+        if (st.st_dev, st.st_ino) == inode:
+            return True
+        if not is_private(rel_path) or os.path.islink(os.path.join(self.base_path, rel_path)):
+            return False
+        base = os.lstat(os.path.join(self.base_path, rel_path))
+        return (st.st_size, st.st_mtime_ns) == (base.st_size, base.st_mtime_ns)
@@ -0,0 +1,25 @@
+"""
+Общие фикстуры тестов: временная база SQLite с созданными таблицами.
+"""
+from pathlib import Path
+
+import pytest_asyncio
+
+from src import database
+from src.collector import MetricsCollector
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path: Path):
+    database.init_database(f"sqlite+aiosqlite:///{tmp_path / 'metrics.db'}")
+    await database.init_db()
+    async for session in database.get_db():
+        yield session
+    await database.close_db()
+
+
+@pytest_asyncio.fixture
+async def task_execution_id(db):
+    collector = MetricsCollector(db)
+    experiment_id = await collector.start_experiment(mode="single-agent")
+    return await collector.start_task(experiment_id, "task_001", "simple", "coding", "single-agent")
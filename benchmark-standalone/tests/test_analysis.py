@@ -0,0 +1,107 @@
+"""
+Тесты клиента analysis server против fake_analyzer (тот же stdio протокол).
+"""
+from pathlib import Path
+
+import pytest
+
+from src.analysis import (
+    FAKE_ANALYZER_COMMAND,
+    AnalysisServerError,
+    AnalysisServers,
+    DartAnalysisServer,
+)
+from src.fake_analyzer import VERSION
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "lib" / "ok.dart").write_text("void main() {\n  print('hi');\n}\n")
+    (tmp_path / "lib" / "broken.dart").write_text("void main() {\n  print('hi';\n")
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_round_trip_reports_errors_per_file(project: Path):
+    server = DartAnalysisServer(project, command=FAKE_ANALYZER_COMMAND)
+    await server.start()
+    try:
+        assert server.running
+        assert server.version == VERSION
+
+        assert await server.get_errors(project / "lib" / "ok.dart") == []
+
+        errors = await server.get_errors(project / "lib" / "broken.dart")
+        assert errors
+        assert all(error["severity"] == "ERROR" for error in errors)
+        assert errors[0]["location"]["file"] == str((project / "lib" / "broken.dart").resolve())
+        assert errors[0]["location"]["startLine"] >= 1
+    finally:
+        await server.close()
+
+    assert not server.running
+
+
+@pytest.mark.asyncio
+async def test_content_is_sent_as_overlay(project: Path):
+    server = DartAnalysisServer(project, command=FAKE_ANALYZER_COMMAND)
+    await server.start()
+    try:
+        path = project / "lib" / "ok.dart"
+        assert await server.get_errors(path) == []
+
+        # Answer reflects the file as it is now, without waiting for a watcher
+        path.write_text("class A {\n")
+        assert await server.get_errors(path)
+
+        path.write_text("class A {}\n")
+        assert await server.get_errors(path) == []
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_overlay_is_removed_after_check(project: Path):
+    server = DartAnalysisServer(project, command=FAKE_ANALYZER_COMMAND)
+    await server.start()
+    try:
+        path = project / "lib" / "broken.dart"
+        assert await server.get_errors(path)
+
+        # Without an overlay the server reads the file: a deleted file is an error, not stale
+        path.unlink()
+        with pytest.raises(AnalysisServerError, match="INVALID_FILE"):
+            await server._request("analysis.getErrors", {"file": str(path.resolve())})
+    finally:
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_requests_fail_after_close(project: Path):
+    server = DartAnalysisServer(project, command=FAKE_ANALYZER_COMMAND)
+    await server.start()
+    await server.close()
+
+    with pytest.raises(AnalysisServerError):
+        await server.get_errors(project / "lib" / "ok.dart")
+
+
+@pytest.mark.asyncio
+async def test_registry_reuses_server_per_root(project: Path):
+    servers = AnalysisServers(command=FAKE_ANALYZER_COMMAND, max_servers=1)
+    try:
+        first = await servers.get(project)
+        assert first is not None
+        assert await servers.get(project) is first
+    finally:
+        await servers.close()
+
+
+@pytest.mark.asyncio
+async def test_registry_unavailable_without_server(project: Path):
+    servers = AnalysisServers(command=["/nonexistent/analysis-server"], startup_timeout=5)
+
+    assert await servers.get(project) is None
+    assert not servers.available
+    assert await servers.get(project) is None
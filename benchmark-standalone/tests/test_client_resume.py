@@ -0,0 +1,141 @@
+"""
+Тесты возобновления задачи после разрыва WebSocket: повторные tool_call с тем же
+call_id не выполняются заново, неподтвержденные tool_result отправляются повторно.
+"""
+import json
+import uuid
+
+import pytest
+import websockets
+from websockets.frames import Close
+
+from src.client import GatewayClient
+from src.codec import get_codec
+from src.session_pool import GatewaySession
+
+DROPPED = websockets.ConnectionClosed(Close(1012, "Service restart"), None)
+
+
+def tool_call(call_id: str) -> dict:
+    return {"type": "tool_call", "call_id": call_id, "tool_name": "read_file",
+            "arguments": {"path": "lib/main.dart"}}
+
+
+def final(token: str = "done") -> dict:
+    return {"type": "assistant_message", "token": token, "is_final": True}
+
+
+class ScriptedWebSocket:
+    """Connection returning scripted frames; an exception in the script drops it."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.sent = []
+
+    async def send(self, data, text=True):
+        self.sent.append(json.loads(data))
+
+    async def recv(self, decode=True):
+        item = self.script.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return json.dumps(item)
+
+    async def close(self):
+        pass
+
+    def results(self) -> list:
+        return [m["call_id"] for m in self.sent if m["type"] == "tool_result"]
+
+
+class CountingExecutor:
+    def __init__(self):
+        self.calls = 0
+
+    async def execute_tool(self, tool_name, arguments):
+        self.calls += 1
+        return {"success": True, "content": f"result {self.calls}"}
+
+
+class NullCollector:
+    async def record_tool_call(self, **kwargs):
+        pass
+
+    async def record_agent_switch(self, **kwargs):
+        pass
+
+
+async def run_task(monkeypatch, *connections) -> tuple:
+    client = GatewayClient("http://gateway", "ws://gateway/ws", None, codec=get_codec("json"))
+    session = GatewaySession("s1", connections[0])
+    reconnects = iter(connections[1:])
+
+    async def acquire_session():
+        return session
+
+    async def resume_session(resumed):
+        resumed.websocket = next(reconnects)
+        return resumed.websocket
+
+    async def get_session_metrics(session_id):
+        return None
+
+    monkeypatch.setattr(client, "acquire_session", acquire_session)
+    monkeypatch.setattr(client, "resume_session", resume_session)
+    monkeypatch.setattr(client, "get_session_metrics", get_session_metrics)
+
+    executor = CountingExecutor()
+    success = await client.execute_task(
+        {"id": "task_001", "description": "Read main.dart"},
+        executor, None, NullCollector(), uuid.uuid4()
+    )
+    await client.close()
+    return success, executor
+
+
+@pytest.mark.asyncio
+async def test_replayed_tool_call_is_not_executed_again(monkeypatch):
+    first = ScriptedWebSocket(tool_call("c1"), DROPPED)
+    second = ScriptedWebSocket(tool_call("c1"), final())
+
+    success, executor = await run_task(monkeypatch, first, second)
+
+    assert success
+    assert executor.calls == 1
+    assert first.results() == ["c1"]
+    # Proactive resend and the reply to the replayed call: Gateway dedups by call_id
+    assert second.results() == ["c1", "c1"]
+    assert {m["result"]["content"] for m in second.sent if m["type"] == "tool_result"} == {
+        "result 1"
+    }
+
+
+@pytest.mark.asyncio
+async def test_unacknowledged_result_is_resent_after_resume(monkeypatch):
+    # Gateway lost the result with the connection and waits for it without replaying the call
+    first = ScriptedWebSocket(tool_call("c1"), DROPPED)
+    second = ScriptedWebSocket(final())
+
+    success, executor = await run_task(monkeypatch, first, second)
+
+    assert success
+    assert executor.calls == 1
+    assert second.results() == ["c1"]
+
+
+@pytest.mark.asyncio
+async def test_acknowledged_results_are_not_resent(monkeypatch):
+    first = ScriptedWebSocket(
+        tool_call("c1"),
+        {"type": "assistant_message", "token": "ok ", "is_final": False},
+        tool_call("c2"),
+        DROPPED,
+    )
+    second = ScriptedWebSocket(final())
+
+    success, executor = await run_task(monkeypatch, first, second)
+
+    assert success
+    assert executor.calls == 2
+    assert first.results() == ["c1", "c2"]
+    assert second.results() == ["c2"]
@@ -0,0 +1,144 @@
+"""
+Тесты индекса кода: поиск подстрок и regex (в том числе не-ASCII) и
+видимость внешних изменений.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.code_index import CodeIndex, required_literals
+from src.executor import MockToolExecutor
+from src.tree_snapshot import TreeSnapshot
+
+inotify_only = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is only available on Linux"
+)
+
+
+@pytest.fixture
+def root(tmp_path: Path) -> Path:
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "lib" / "a.dart").write_text(
+        "// привет мир\nclass Cafe {\n  String name = 'café';\n  bool naïve = true;\n}\n",
+        encoding="utf-8"
+    )
+    (tmp_path / "lib" / "b.dart").write_text("class Other {}\n")
+    return tmp_path
+
+
+async def lines(index: CodeIndex, pattern: str, **kwargs) -> list:
+    found = await index.search(pattern, **kwargs)
+    return [(m["path"], m["line"]) for m in found["matches"]]
+
+
+@pytest.mark.asyncio
+async def test_substring(root: Path):
+    index = CodeIndex(root)
+
+    assert await lines(index, "class") == [("lib/a.dart", 2), ("lib/b.dart", 1)]
+    assert await lines(index, "café") == [("lib/a.dart", 3)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pattern", [r"[а-я]+ мир", r"caf.\b", r"na.ve", r"(?i)ПРИВЕТ"])
+async def test_regex_matches_characters_not_bytes(root: Path, pattern: str):
+    assert await lines(CodeIndex(root), pattern, is_regex=True)
+
+
+@pytest.mark.asyncio
+async def test_regex_column_counts_characters(root: Path):
+    found = await CodeIndex(root).search(r"мир$", is_regex=True)
+
+    (match,) = found["matches"]
+    assert match["column"] == 11
+    assert match["text"] == "// привет мир"
+
+
+@pytest.mark.asyncio
+async def test_external_changes_visible_after_mark_stale(root: Path):
+    index = CodeIndex(root)
+    assert await lines(index, "Widget") == []
+
+    (root / "lib" / "b.dart").write_text("class Widget {}\n")
+    (root / "lib" / "c.dart").write_text("Widget build() {}\n")
+    # Without a watched tree searches do not walk the tree for unreported changes
+    assert await lines(index, "Widget") == []
+
+    index.mark_stale()
+    assert await lines(index, "Widget") == [("lib/b.dart", 1), ("lib/c.dart", 1)]
+
+
+@inotify_only
+@pytest.mark.asyncio
+async def test_watched_tree_reports_external_changes_without_rescan(root: Path):
+    tree = TreeSnapshot(root, watch=True)
+    index = CodeIndex(root, tree=tree)
+    assert await lines(index, "Widget") == []
+    refreshes = []
+    index._refresh = lambda: refreshes.append(True)
+
+    (root / "lib" / "b.dart").write_text("class Widget {}\n")
+    (root / "lib" / "c.dart").write_text("Widget build() {}\n")
+    (root / "lib" / "a.dart").unlink()
+    index.mark_stale()
+
+    assert await lines(index, "Widget") == [("lib/b.dart", 1), ("lib/c.dart", 1)]
+    assert await lines(index, "class") == [("lib/b.dart", 1)]
+    assert refreshes == []
+    tree.close()
+
+
+@pytest.mark.asyncio
+async def test_executor_marks_index_stale_for_new_task(root: Path):
+    executor = MockToolExecutor(root)
+    await executor.execute_tool("search_in_code", {"query": "Widget"})
+
+    # Workspace reset between tasks: the next executor reuses the index
+    (root / "lib" / "c.dart").write_text("Widget build() {}\n")
+    executor = MockToolExecutor(root, code_index=executor.code_index)
+    result = await executor.execute_tool("search_in_code", {"query": "Widget"})
+
+    assert [m["path"] for m in result["matches"]] == ["lib/c.dart"]
+
+
+@pytest.mark.asyncio
+async def test_update_drops_removed_file(root: Path):
+    index = CodeIndex(root)
+    assert await lines(index, "Other") == [("lib/b.dart", 1)]
+
+    (root / "lib" / "b.dart").unlink()
+    await index.update("lib/b.dart")
+
+    assert await lines(index, "Other") == []
+
+
+def test_required_literals():
+    assert required_literals(r"class Widget\s*\{") == ["class Widget", "{"]
+    assert required_literals(r"a|b") == []
+
+
+@pytest.mark.parametrize("pattern", [
+    r"\x41BC", r"\u0041BC", r"\U00000041BC", r"\N{LATIN CAPITAL LETTER A}BC", r"\101BC", r"(A)\1BC"
+])
+def test_required_literals_skip_escape_operands(pattern: str):
+    assert required_literals(pattern) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pattern", [r"\x41BC", r"\u0041BC", r"\N{LATIN CAPITAL LETTER A}BC"])
+async def test_regex_with_code_point_escape_finds_match(root: Path, pattern: str):
+    (root / "lib" / "c.dart").write_text("class ABC {}\n")
+
+    assert await lines(CodeIndex(root), pattern, is_regex=True) == [("lib/c.dart", 1)]
+
+
+@pytest.mark.asyncio
+async def test_search_tool_parses_is_regex_strings(root: Path):
+    executor = MockToolExecutor(root)
+
+    literal = await executor.execute_tool("search_in_code", {"query": "na.ve", "is_regex": "false"})
+    regex = await executor.execute_tool("search_in_code", {"query": "na.ve", "is_regex": "true"})
+
+    assert literal["success"] and not literal["regex"] and literal["matches"] == []
+    assert regex["success"] and regex["regex"] and regex["match_count"] == 1
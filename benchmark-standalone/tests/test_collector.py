@@ -0,0 +1,114 @@
+"""
+Тесты буферизованного MetricsCollector: сброс по размеру и при завершении
+задачи, откат неудачного сброса и восстановление строк из журнала.
+"""
+import shutil
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select
+
+from src import database
+from src.collector import MetricsCollector
+from src.models import TaskRollup, ToolCall
+
+
+async def stored_tool_calls(db) -> int:
+    return (await db.execute(select(func.count()).select_from(ToolCall))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_rows_flush_by_size(db, task_execution_id):
+    collector = MetricsCollector(db, buffered=True, flush_size=3, flush_interval=3600)
+
+    for _ in range(2):
+        await collector.record_tool_call(task_execution_id, "read_file", True, 0.1)
+    assert collector.pending_count == 2
+    assert await stored_tool_calls(db) == 0
+
+    await collector.record_tool_call(task_execution_id, "read_file", False, 0.1, error="x")
+    assert collector.pending_count == 0
+    assert await stored_tool_calls(db) == 3
+
+
+@pytest.mark.asyncio
+async def test_complete_task_flushes_and_updates_rollup(db, task_execution_id):
+    collector = MetricsCollector(db, buffered=True, flush_size=100, flush_interval=3600)
+    row_id = await collector.record_tool_call(task_execution_id, "write_file", True, 0.2)
+
+    await collector.complete_task(task_execution_id, success=True)
+
+    assert (await db.get(ToolCall, str(row_id))) is not None
+    rollup = await db.get(TaskRollup, str(task_execution_id))
+    assert rollup.tool_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_rows_pending(db, task_execution_id, monkeypatch):
+    collector = MetricsCollector(db, buffered=True, flush_size=100, flush_interval=3600)
+    await collector.record_tool_call(task_execution_id, "read_file", True, 0.1)
+
+    write_rows = collector._write_rows
+
+    async def failing(rows):
+        await write_rows(rows)
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(collector, "_write_rows", failing)
+    with pytest.raises(RuntimeError):
+        await collector.flush()
+    assert collector.pending_count == 1
+    assert await stored_tool_calls(db) == 0
+
+    monkeypatch.undo()
+    assert await collector.flush() == 1
+    assert await stored_tool_calls(db) == 1
+
+
+@pytest.mark.asyncio
+async def test_acknowledged_rows_survive_crash(db, task_execution_id, tmp_path: Path):
+    journal_dir = tmp_path / "journal"
+    collector = MetricsCollector(
+        db, buffered=True, flush_size=100, flush_interval=3600, journal_dir=journal_dir
+    )
+    row_ids = [
+        await collector.record_tool_call(task_execution_id, "read_file", True, 0.1)
+        for _ in range(3)
+    ]
+    # Process dies here: rows are acknowledged but never flushed
+    del collector
+
+    async for session in database.get_db():
+        assert await MetricsCollector.recover(session, journal_dir) == 3
+        for row_id in row_ids:
+            row = await session.get(ToolCall, str(row_id))
+            assert row is not None and row.started_at is not None
+        assert (await session.get(TaskRollup, str(task_execution_id))).tool_calls == 3
+    assert not list(journal_dir.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_replay_skips_rows_already_stored(db, task_execution_id, tmp_path: Path):
+    journal_dir = tmp_path / "journal"
+    collector = MetricsCollector(
+        db, buffered=True, flush_size=100, flush_interval=3600, journal_dir=journal_dir
+    )
+    await collector.record_tool_call(task_execution_id, "read_file", True, 0.1)
+    # Crash between commit and journal removal
+    shutil.copy(collector.journal.path, tmp_path / "copy")
+    await collector.flush()
+    assert not collector.journal.path.exists()
+    shutil.copy(tmp_path / "copy", collector.journal.path)
+
+    assert await MetricsCollector.recover(db, journal_dir) == 0
+    assert await stored_tool_calls(db) == 1
+
+
+@pytest.mark.asyncio
+async def test_unbuffered_rows_are_written_at_once(db, task_execution_id):
+    collector = MetricsCollector(db)
+
+    await collector.record_tool_call(task_execution_id, "read_file", True, 0.1)
+
+    assert collector.pending_count == 0
+    assert await stored_tool_calls(db) == 1
@@ -0,0 +1,127 @@
+"""
+Тесты чтения файлов частями: диапазоны строк, continuation токены и
+границы UTF-8 символов.
+"""
+from pathlib import Path
+
+import pytest
+
+from src.executor import MockToolExecutor
+from src.file_reader import ReadError, read_range
+
+LINES = "".join(f"line {n}\n" for n in range(1, 101))
+
+
+@pytest.fixture
+def source(tmp_path: Path) -> Path:
+    path = tmp_path / "a.dart"
+    path.write_text(LINES)
+    return path
+
+
+def read_all(path: Path, max_bytes: int, **kwargs) -> list:
+    chunks = [read_range(path, max_bytes, **kwargs)]
+    while chunks[-1]["continuation"]:
+        chunks.append(read_range(path, max_bytes, continuation=chunks[-1]["continuation"]))
+    return chunks
+
+
+def test_whole_file(source: Path):
+    chunk = read_range(source, 1 << 20)
+
+    assert chunk["content"] == LINES
+    assert (chunk["start_line"], chunk["end_line"]) == (1, 100)
+    assert not chunk["truncated"] and chunk["continuation"] is None
+
+
+def test_line_range(source: Path):
+    chunk = read_range(source, 1 << 20, start_line=10, end_line=12)
+
+    assert chunk["content"] == "line 10\nline 11\nline 12\n"
+    assert (chunk["start_line"], chunk["end_line"]) == (10, 12)
+
+
+def test_chunks_end_on_line_boundaries_and_reassemble(source: Path):
+    chunks = read_all(source, 50)
+
+    assert len(chunks) > 1
+    assert "".join(c["content"] for c in chunks) == LINES
+    assert all(c["content"].endswith("\n") for c in chunks)
+    for previous, chunk in zip(chunks[:-1], chunks[1:], strict=True):
+        assert chunk["start_line"] == previous["end_line"] + 1
+
+
+def test_continuation_keeps_end_line(source: Path):
+    chunks = read_all(source, 16, start_line=5, end_line=20)
+
+    assert "".join(c["content"] for c in chunks) == "".join(f"line {n}\n" for n in range(5, 21))
+    assert chunks[-1]["end_line"] == 20
+
+
+def test_chunks_split_on_character_boundaries(tmp_path: Path):
+    path = tmp_path / "ru.dart"
+    text = "// " + "привет" * 50
+    path.write_text(text, encoding="utf-8")
+
+    chunks = read_all(path, 7)
+
+    assert "".join(c["content"] for c in chunks) == text
+    assert all("�" not in c["content"] for c in chunks)
+
+
+def test_offset_snaps_to_character_start(tmp_path: Path):
+    path = tmp_path / "ru.dart"
+    path.write_text("ёж", encoding="utf-8")
+
+    chunk = read_range(path, 100, offset=1)
+
+    assert chunk["offset"] == 2
+    assert chunk["content"] == "ж"
+    assert chunk["start_line"] is None
+
+
+def test_token_rejected_after_file_change(source: Path):
+    first = read_range(source, 50)
+    source.write_text(LINES + "line 101\n")
+
+    with pytest.raises(ReadError, match="changed"):
+        read_range(source, 50, continuation=first["continuation"])
+
+
+def test_invalid_ranges(source: Path):
+    with pytest.raises(ReadError):
+        read_range(source, 100, continuation="not a token")
+    with pytest.raises(ReadError):
+        read_range(source, 100, start_line=0)
+    with pytest.raises(ReadError):
+        read_range(source, 100, start_line=5, end_line=4)
+    with pytest.raises(ReadError, match="past the end"):
+        read_range(source, 100, start_line=500)
+
+
+def test_empty_file(tmp_path: Path):
+    path = tmp_path / "empty.dart"
+    path.write_text("")
+
+    assert read_range(path, 100)["content"] == ""
+
+
+@pytest.mark.asyncio
+async def test_read_file_tool(source: Path):
+    executor = MockToolExecutor(source.parent)
+
+    result = await executor.execute_tool(
+        "read_file", {"path": "a.dart", "start_line": "3", "end_line": 4}
+    )
+    assert result["success"]
+    assert result["content"] == "line 3\nline 4\n"
+
+    result = await executor.execute_tool("read_file", {"path": "a.dart", "max_bytes": 40})
+    assert result["truncated"]
+    rest = await executor.execute_tool(
+        "read_file", {"path": "a.dart", "continuation": result["continuation"]}
+    )
+    assert rest["success"] and rest["start_line"] == result["end_line"] + 1
+
+    result = await executor.execute_tool("read_file", {"path": "a.dart", "start_line": "x"})
+    assert not result["success"]
@@ -0,0 +1,133 @@
+"""
+Тесты разбора `dart analyze --format=machine` и `flutter test --machine`.
+"""
+import json
+
+from src.machine_output import AnalyzerOutputParser, parse_analyzer_line
+from src.machine_output import TestOutputParser as FlutterTestParser  # not a pytest class
+
+ANALYZER_OUTPUT = (
+    "Analyzing lib...\n"
+    "ERROR|SYNTACTIC_ERROR|EXPECTED_TOKEN|/p/lib/a.dart|3|14|1|Expected to find ';'.\n"
+    "WARNING|STATIC_WARNING|DEAD_CODE|/p/lib/a.dart|5|1|4|Dead code.\n"
+    "ERROR|COMPILE_TIME_ERROR|UNDEFINED_CLASS|/p/lib/b.dart|1|1|3|Undefined class 'Foo'.\n"
+    "2 errors and 1 warning found.\n"
+)
+
+
+def test_parse_analyzer_line():
+    diagnostic = parse_analyzer_line(
+        "ERROR|SYNTACTIC_ERROR|EXPECTED_TOKEN|/p/lib/a.dart|3|14|1|Expected to find ';'."
+    )
+
+    assert diagnostic == {
+        "severity": "ERROR",
+        "type": "SYNTACTIC_ERROR",
+        "code": "expected_token",
+        "file": "/p/lib/a.dart",
+        "line": 3,
+        "column": 14,
+        "length": 1,
+        "message": "Expected to find ';'.",
+    }
+
+
+def test_parse_analyzer_line_unescapes_fields():
+    diagnostic = parse_analyzer_line(
+        "INFO|LINT|CODE|C:\\\\p\\\\a.dart|1|2|3|Use a \\| b instead."
+    )
+
+    assert diagnostic["file"] == "C:\\p\\a.dart"
+    assert diagnostic["message"] == "Use a | b instead."
+
+
+def test_parse_analyzer_line_ignores_other_output():
+    assert parse_analyzer_line("Analyzing lib...") is None
+    assert parse_analyzer_line("ERROR|SYNTACTIC_ERROR|X|/a.dart|line|1|1|bad") is None
+
+
+def test_analyzer_parser_handles_lines_split_across_chunks():
+    parser = AnalyzerOutputParser()
+    data = ANALYZER_OUTPUT.encode()
+    for start in range(0, len(data), 7):
+        parser.on_output("stdout", data[start:start + 7])
+    parser.close()
+
+    assert len(parser.diagnostics) == 3
+    errors = parser.errors_for("/p/lib/a.dart")
+    assert [(e["line"], e["column"]) for e in errors] == [(3, 14)]
+
+
+def test_analyzer_parser_reads_last_line_without_newline():
+    parser = AnalyzerOutputParser()
+    parser.feed(b"ERROR|SYNTACTIC_ERROR|X|/p/a.dart|1|1|1|Broken")
+    assert parser.diagnostics == []
+
+    parser.close()
+    assert len(parser.errors_for("/p/a.dart")) == 1
+
+
+def test_analyzer_parser_ignores_stderr():
+    parser = AnalyzerOutputParser()
+    parser.on_output("stderr", ANALYZER_OUTPUT.encode())
+    parser.close()
+
+    assert parser.diagnostics == []
+
+
+def events(*items: dict) -> bytes:
+    return "".join(json.dumps(item) + "\n" for item in items).encode()
+
+
+def test_test_parser_summary():
+    parser = FlutterTestParser()
+    parser.feed(b"Resolving dependencies...\n")
+    parser.feed(events(
+        {"type": "suite", "suite": {"id": 0, "path": "test/a_test.dart"}},
+        {"type": "testStart", "test": {"id": 1, "name": "loading", "suiteID": 0}, "time": 0},
+        {"type": "testDone", "testID": 1, "result": "success", "hidden": True, "time": 5},
+        {"type": "testStart", "test": {"id": 2, "name": "adds", "suiteID": 0}, "time": 10},
+        {"type": "testDone", "testID": 2, "result": "success", "time": 25},
+        {"type": "testStart", "test": {"id": 3, "name": "fails", "suiteID": 0}, "time": 30},
+        {"type": "error", "testID": 3, "error": "Expected: 2 Actual: 3"},
+        {"type": "testDone", "testID": 3, "result": "failure", "time": 40},
+        {"type": "testStart", "test": {"id": 4, "name": "skipped", "suiteID": 0}, "time": 41},
+        {"type": "testDone", "testID": 4, "result": "success", "skipped": True, "time": 41},
+        {"type": "done", "success": False},
+    ))
+    parser.close()
+
+    assert parser.get_summary() == {
+        "total": 3,
+        "passed": 1,
+        "failed": 1,
+        "skipped": 1,
+        "unfinished": 0,
+        "success": False,
+    }
+    failed = next(t for t in parser.tests if t["name"] == "fails")
+    assert failed["error"] == "Expected: 2 Actual: 3"
+    assert failed["suite"] == "test/a_test.dart"
+    assert failed["duration_ms"] == 10
+
+
+def test_test_parser_reports_failed_hidden_test():
+    parser = FlutterTestParser()
+    parser.feed(events(
+        {"type": "testStart", "test": {"id": 1, "name": "loading bad_test.dart"}, "time": 0},
+        {"type": "error", "testID": 1, "error": "Compilation failed"},
+        {"type": "testDone", "testID": 1, "result": "error", "hidden": True, "time": 3},
+    ))
+    parser.close()
+
+    assert parser.get_summary()["failed"] == 1
+    assert parser.get_summary()["success"] is None
+
+
+def test_test_parser_counts_unfinished_tests():
+    parser = FlutterTestParser()
+    parser.feed(events({"type": "testStart", "test": {"id": 1, "name": "hangs"}, "time": 0}))
+    parser.feed(b'{"type": "testDone", "testID"')
+    parser.close()
+
+    assert parser.get_summary()["unfinished"] == 1
@@ -0,0 +1,91 @@
+"""
+Тесты MetricsWriter: порядок записи, backpressure и сброс очереди при закрытии.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from src.collector import MetricsCollector
+from src.metrics_writer import MetricsWriter
+from src.models import ToolCall
+
+
+async def stored_tool_calls(db) -> list:
+    result = await db.execute(select(ToolCall.tool_name).order_by(ToolCall.started_at))
+    return list(result.scalars().all())
+
+
+@pytest.mark.asyncio
+async def test_close_drains_queue(db, task_execution_id):
+    collector = MetricsCollector(db, buffered=True, flush_size=1000, flush_interval=3600)
+    writer = MetricsWriter(collector, queue_size=100)
+    writer.start()
+
+    for i in range(50):
+        await writer.record_tool_call(task_execution_id, f"tool_{i}", True, 0.01)
+    await writer.close()
+
+    assert await stored_tool_calls(db) == [f"tool_{i}" for i in range(50)]
+    assert collector.pending_count == 0
+    stats = writer.get_stats()
+    assert (stats["submitted"], stats["written"], stats["queue_depth"]) == (50, 50, 0)
+
+
+@pytest.mark.asyncio
+async def test_flush_waits_for_submitted_events(db, task_execution_id):
+    writer = MetricsWriter(MetricsCollector(db, buffered=True, flush_interval=3600))
+    writer.start()
+
+    await writer.record_tool_call(task_execution_id, "read_file", True, 0.01)
+    await writer.flush()
+
+    assert await stored_tool_calls(db) == ["read_file"]
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_flush(db, task_execution_id):
+    collector = MetricsCollector(db, buffered=True, flush_size=1000, flush_interval=0.05)
+    writer = MetricsWriter(collector)
+    writer.start()
+
+    await writer.record_tool_call(task_execution_id, "read_file", True, 0.01)
+    await asyncio.sleep(0.3)
+
+    assert collector.pending_count == 0
+    assert await stored_tool_calls(db) == ["read_file"]
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_backpressure_when_queue_is_full(db, task_execution_id):
+    writer = MetricsWriter(MetricsCollector(db, buffered=True, flush_interval=3600), queue_size=2)
+
+    submitting = asyncio.gather(*(
+        writer.record_tool_call(task_execution_id, "read_file", True, 0.01) for _ in range(5)
+    ))
+    await asyncio.sleep(0.05)
+    assert not submitting.done()
+
+    writer.start()
+    await submitting
+    await writer.close()
+
+    stats = writer.get_stats()
+    assert stats["backpressure_waits"] == 3
+    assert stats["max_queue_depth"] == 2
+    assert stats["written"] == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_event_does_not_stop_worker(db, task_execution_id):
+    writer = MetricsWriter(MetricsCollector(db, buffered=True, flush_interval=3600))
+    writer.start()
+
+    await writer.record_quality_evaluation(task_execution_id, "auto", score=2.0, passed=True)
+    await writer.record_tool_call(task_execution_id, "read_file", True, 0.01)
+    await writer.close()
+
+    assert writer.get_stats()["failed"] == 1
+    assert (await db.execute(select(func.count()).select_from(ToolCall))).scalar_one() == 1
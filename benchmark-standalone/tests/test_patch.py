@@ -0,0 +1,181 @@
+"""
+Тесты разбора и применения diff (unified и SEARCH/REPLACE) для apply_diff.
+"""
+from pathlib import Path
+
+import pytest
+
+from src.executor import MockToolExecutor
+from src.patch import (
+    PatchError,
+    apply_hunks,
+    check_deletion,
+    is_search_replace,
+    parse_search_replace,
+    parse_unified_diff,
+)
+
+SOURCE = "class A {\n  int a = 1;\n  int b = 2;\n  int c = 3;\n}\n"
+
+
+def unified(body: str, path: str = "lib/a.dart") -> str:
+    return f"--- a/{path}\n+++ b/{path}\n{body}"
+
+
+def apply_unified(content: str, body: str):
+    (file_patch,) = parse_unified_diff(unified(body))
+    return apply_hunks(content, file_patch.hunks)
+
+
+def test_unified_exact():
+    result = apply_unified(
+        SOURCE, "@@ -2,3 +2,3 @@\n   int a = 1;\n-  int b = 2;\n+  int b = 20;\n   int c = 3;\n"
+    )
+
+    assert result.success
+    assert result.content == SOURCE.replace("b = 2", "b = 20")
+    assert (result.lines_added, result.lines_removed) == (1, 1)
+
+
+def test_unified_with_shifted_line_numbers():
+    result = apply_unified(
+        "// header\n\n" + SOURCE, "@@ -2,2 +2,2 @@\n   int a = 1;\n-  int b = 2;\n+  int b = 5;\n"
+    )
+
+    assert result.success
+    assert result.applied[0]["offset"] == 2
+    assert "int b = 5;" in result.content
+
+
+def test_unified_whitespace_insensitive():
+    result = apply_unified(SOURCE, "@@ -2,2 +2,2 @@\n int a = 1;\n-int b = 2;\n+  int b = 7;\n")
+
+    assert result.success
+    assert result.applied[0]["whitespace_insensitive"]
+    # Context keeps the file's own indentation
+    assert "  int a = 1;\n  int b = 7;\n" in result.content
+
+
+def test_unified_with_fuzz():
+    result = apply_unified(
+        SOURCE,
+        "@@ -1,5 +1,5 @@\n class A {\n-  int a = 1;\n+  int a = 10;\n"
+        "   int b = 2;\n   int X = 3;\n }\n"
+    )
+
+    assert result.success
+    assert result.applied[0]["fuzz"] > 0
+    assert "int a = 10;" in result.content
+
+
+def test_rejected_hunk_leaves_content_unchanged():
+    (file_patch,) = parse_unified_diff(unified(
+        "@@ -2,1 +2,1 @@\n-  int a = 1;\n+  int a = 2;\n"
+        "@@ -4,1 +4,1 @@\n-  int missing = 0;\n+  int missing = 1;\n"
+    ))
+    result = apply_hunks(SOURCE, file_patch.hunks)
+
+    assert not result.success
+    assert result.content is None
+    assert [r["hunk"] for r in result.rejected] == [2]
+    assert result.rejected[0]["reason"] == "not found"
+
+
+def test_no_newline_at_end_of_file():
+    result = apply_unified("a\nb", "@@ -1,2 +1,2 @@\n a\n-b\n\\ No newline at end of file\n+c\n")
+
+    assert result.content == "a\nc\n"
+
+
+def test_crlf_line_endings_are_kept():
+    result = apply_unified("a\r\nb\r\n", "@@ -1,2 +1,2 @@\n a\n-b\n+c\n")
+
+    assert result.content == "a\r\nc\r\n"
+
+
+def test_form_feed_and_unicode_line_separator_do_not_split_lines():
+    content = "a\x0cb\nc\u2028d\ne\n"
+    result = apply_unified(content, "@@ -2,2 +2,2 @@\n c\u2028d\n-e\n+f\n")
+
+    assert result.success
+    assert result.applied[0]["offset"] == 0
+    assert result.content == "a\x0cb\nc\u2028d\nf\n"
+
+
+def test_creates_and_deletes():
+    (created,) = parse_unified_diff("--- /dev/null\n+++ b/new.dart\n@@ -0,0 +1,1 @@\n+x\n")
+    (deleted,) = parse_unified_diff("--- a/old.dart\n+++ /dev/null\n@@ -1,1 +0,0 @@\n-x\n")
+
+    assert created.creates and not created.deletes
+    assert deleted.deletes and not deleted.creates
+    assert apply_hunks("", created.hunks).content == "x\n"
+
+
+def test_check_deletion_requires_matching_content():
+    (deleted,) = parse_unified_diff("--- a/old.dart\n+++ /dev/null\n@@ -1,2 +0,0 @@\n-x\n-y\n")
+
+    assert check_deletion("x\ny\n", deleted.hunks).success
+    stale = check_deletion("x\nz\n", deleted.hunks)
+    assert not stale.success
+    assert "differs" in stale.rejected[0]["reason"]
+    assert not check_deletion("x\n", []).success
+    assert check_deletion("", []).success
+
+
+def test_invalid_unified_diff():
+    with pytest.raises(PatchError):
+        parse_unified_diff("just some text\n")
+
+
+def test_search_replace():
+    text = "<<<<<<< SEARCH\n  int b = 2;\n=======\n  int b = 3;\n>>>>>>> REPLACE\n"
+
+    assert is_search_replace(text)
+    result = apply_hunks(SOURCE, parse_search_replace(text), search_replace=True)
+    assert result.content == SOURCE.replace("b = 2", "b = 3")
+
+
+def test_search_replace_ambiguous_without_start_line():
+    text = "<<<<<<< SEARCH\nx\n=======\ny\n>>>>>>> REPLACE\n"
+
+    result = apply_hunks("x\nx\n", parse_search_replace(text), search_replace=True)
+    assert not result.success
+    assert result.rejected[0]["reason"].startswith("ambiguous")
+
+    text = "<<<<<<< SEARCH\n:start_line:2\n-------\nx\n=======\ny\n>>>>>>> REPLACE\n"
+    result = apply_hunks("x\nx\n", parse_search_replace(text), search_replace=True)
+    assert result.content == "x\ny\n"
+
+
+@pytest.mark.asyncio
+async def test_apply_diff_tool_rejects_stale_delete(tmp_path: Path):
+    (tmp_path / "lib").mkdir()
+    target = tmp_path / "lib" / "a.dart"
+    target.write_text(SOURCE)
+    executor = MockToolExecutor(tmp_path)
+
+    diff = "--- a/lib/a.dart\n+++ /dev/null\n@@ -1,1 +0,0 @@\n-class A {\n"
+    result = await executor.execute_tool("apply_diff", {"path": "lib/a.dart", "diff": diff})
+
+    assert not result["success"]
+    assert result["rejected"]
+    assert target.read_text() == SOURCE
+
+
+@pytest.mark.asyncio
+async def test_apply_diff_tool_is_all_or_nothing(tmp_path: Path):
+    (tmp_path / "lib").mkdir()
+    target = tmp_path / "lib" / "a.dart"
+    target.write_text(SOURCE)
+    executor = MockToolExecutor(tmp_path)
+
+    good = unified("@@ -2,1 +2,1 @@\n-  int a = 1;\n+  int a = 5;\n")
+    bad = unified("@@ -2,1 +2,1 @@\n-  int a = 1;\n+  int a = 5;\n@@ -9,1 +9,1 @@\n-nope\n+yes\n")
+
+    result = await executor.execute_tool("apply_diff", {"path": "lib/a.dart", "diff": bad})
+    assert not result["success"]
+    assert target.read_text() == SOURCE
+
+    result = await executor.execute_tool("apply_diff", {"path": "lib/a.dart", "diff": good})
+    assert result["success"]
+    assert "int a = 5;" in target.read_text()
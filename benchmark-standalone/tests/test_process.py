@@ -0,0 +1,113 @@
+"""
+Тесты CommandRunner: таймауты, отмена и завершение всей группы процессов.
+"""
+import asyncio
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from src.process import CommandRunner
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX only")
+
+# Background child keeps stdout open after the shell exits
+ORPHAN = "sleep 30 & echo $!"
+
+
+def alive(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Zombies are dead, they are only waiting to be reaped
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+async def wait_dead(pid: int, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while alive(pid):
+        if time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.05)
+    return True
+
+
+@pytest.mark.asyncio
+async def test_success(tmp_path: Path):
+    result = await CommandRunner(timeout=10).run(["sh", "-c", "echo out; echo err >&2"], tmp_path)
+
+    assert result.success
+    assert result.return_code == 0
+    assert (result.stdout, result.stderr) == ("out\n", "err\n")
+
+
+@pytest.mark.asyncio
+async def test_exit_code(tmp_path: Path):
+    result = await CommandRunner(timeout=10).run(["sh", "-c", "exit 3"], tmp_path)
+
+    assert result.return_code == 3
+    assert not result.success and not result.timed_out
+
+
+@pytest.mark.asyncio
+async def test_timeout_kills_process_group(tmp_path: Path):
+    started = time.perf_counter()
+    result = await CommandRunner(timeout=0.5).run(["sh", "-c", ORPHAN], tmp_path)
+
+    assert result.timed_out
+    assert result.return_code is None
+    assert time.perf_counter() - started < 5
+    assert await wait_dead(int(result.stdout.split()[0]))
+
+
+@pytest.mark.asyncio
+async def test_cancel_kills_process_group(tmp_path: Path):
+    pids = []
+
+    def on_output(name: str, chunk: bytes) -> None:
+        pids.extend(int(pid) for pid in chunk.split())
+
+    task = asyncio.create_task(
+        CommandRunner(timeout=60).run(["sh", "-c", ORPHAN], tmp_path, on_output=on_output)
+    )
+    while not pids:
+        await asyncio.sleep(0.05)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert await wait_dead(pids[0])
+
+
+@pytest.mark.asyncio
+async def test_failing_callback_still_kills_group_ignoring_sigterm(tmp_path: Path):
+    pids = []
+
+    def on_output(name: str, chunk: bytes) -> None:
+        pids.extend(int(pid) for pid in chunk.split())
+        raise ValueError("bad output")
+
+    # Children inherit the ignored SIGTERM, only SIGKILL stops them
+    args = ["sh", "-c", f"trap '' TERM; {ORPHAN}; wait"]
+    with pytest.raises(ValueError):
+        await CommandRunner(timeout=60).run(args, tmp_path, on_output=on_output)
+
+    assert await wait_dead(pids[0])
+
+
+@pytest.mark.asyncio
+async def test_output_truncated(tmp_path: Path):
+    runner = CommandRunner(timeout=10, max_output_bytes=10)
+    result = await runner.run(["sh", "-c", "printf '%0100d' 0"], tmp_path)
+
+    assert result.success and result.truncated
+    assert result.stdout.startswith("0" * 10 + "\n")
+    assert "100 bytes total" in result.stdout
+
+
+@pytest.mark.asyncio
+async def test_missing_program(tmp_path: Path):
+    with pytest.raises(OSError):
+        await CommandRunner().run(["/nonexistent/program"], tmp_path)
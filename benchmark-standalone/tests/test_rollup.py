@@ -0,0 +1,81 @@
+"""
+Тесты rollups: инкрементальные итоги совпадают с пересчетом из исходных строк,
+в том числе без INSERT ... ON CONFLICT.
+"""
+import pytest
+
+from src import rollup
+from src.collector import MetricsCollector
+from src.models import ExperimentRollup, TaskRollup
+from src.rollup import ROLLUP_COUNTERS, rebuild_rollups
+
+EXPERIMENT_COUNTERS = (
+    "total_tasks", "completed_tasks", "successful_tasks", "total_duration_seconds",
+) + ROLLUP_COUNTERS
+
+
+def counters(row, names) -> dict:
+    return {name: pytest.approx(getattr(row, name)) for name in names}
+
+
+async def run_experiment(db, buffered: bool) -> str:
+    collector = MetricsCollector(db, buffered=buffered, flush_size=3)
+    experiment_id = await collector.start_experiment(mode="multi-agent")
+
+    for n in range(3):
+        task_id = await collector.start_task(experiment_id, f"task_{n}", "simple", "coding", "m")
+        await collector.record_llm_call(task_id, "coder", 100 * n, 10, "model", 1.5)
+        await collector.record_llm_call(task_id, "architect", 50, 5 * n, "model", 0.5)
+        for i in range(n + 1):
+            await collector.record_tool_call(task_id, "read_file", i % 2 == 0, 0.25)
+        await collector.record_agent_switch(task_id, "architect", "coder", "plan ready")
+        if n == 2:
+            await collector.record_hallucination(task_id, "file", "missing file")
+            await collector.complete_task(task_id, success=False)
+        elif n == 1:
+            await collector.complete_task(task_id, success=True, metrics={"duration_seconds": 4.0})
+    await collector.flush()
+    return str(experiment_id)
+
+
+async def snapshot(db, experiment_id: str) -> tuple:
+    db.expire_all()
+    experiment = await db.get(ExperimentRollup, experiment_id)
+    tasks = (await db.execute(
+        TaskRollup.__table__.select().where(TaskRollup.experiment_id == experiment_id)
+    )).all()
+    return (
+        counters(experiment, EXPERIMENT_COUNTERS),
+        {row.task_execution_id: {n: getattr(row, n) for n in ROLLUP_COUNTERS} for row in tasks},
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("buffered", [False, True])
+async def test_incremental_rollups_match_rebuild(db, buffered: bool):
+    experiment_id = await run_experiment(db, buffered)
+    incremental = await snapshot(db, experiment_id)
+
+    assert await rebuild_rollups(db) == 1
+    rebuilt = await snapshot(db, experiment_id)
+
+    assert incremental == rebuilt
+    experiment = incremental[0]
+    assert experiment["total_tasks"] == 3
+    assert experiment["completed_tasks"] == 2
+    assert experiment["successful_tasks"] == 1
+    assert experiment["tool_calls"] == 6
+    assert experiment["successful_tool_calls"] == 4
+    assert experiment["input_tokens"] == 450
+    assert experiment["hallucinations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rollups_without_on_conflict(db, monkeypatch):
+    monkeypatch.setattr(rollup, "UPSERT_INSERTS", {})
+    experiment_id = await run_experiment(db, buffered=True)
+    incremental = await snapshot(db, experiment_id)
+
+    await rebuild_rollups(db)
+
+    assert incremental == await snapshot(db, experiment_id)
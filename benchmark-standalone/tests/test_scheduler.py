@@ -0,0 +1,83 @@
+"""
+Тесты TaskScheduler: порядок результатов, общий лимит и лимиты категорий.
+"""
+import asyncio
+import random
+from collections import Counter
+
+import pytest
+
+from src.scheduler import TaskScheduler
+
+
+def make_tasks(*categories: str) -> list:
+    return [{"id": f"task_{i}", "category": c} for i, c in enumerate(categories, 1)]
+
+
+class Tracker:
+    """Worker recording how many tasks (per category) run at once."""
+
+    def __init__(self):
+        self.running = Counter()
+        self.peak = Counter()
+
+    async def __call__(self, index: int, task: dict) -> str:
+        for key in ("all", task["category"]):
+            self.running[key] += 1
+            self.peak[key] = max(self.peak[key], self.running[key])
+        await asyncio.sleep(random.uniform(0, 0.02))
+        for key in ("all", task["category"]):
+            self.running[key] -= 1
+        return f"{index}:{task['id']}"
+
+
+@pytest.mark.asyncio
+async def test_results_in_task_order():
+    tasks = make_tasks(*["simple"] * 10)
+
+    results = await TaskScheduler(max_concurrent_tasks=4).run(tasks, Tracker())
+
+    assert results == [f"{i}:task_{i}" for i in range(1, 11)]
+
+
+@pytest.mark.asyncio
+async def test_global_limit():
+    tracker = Tracker()
+
+    await TaskScheduler(max_concurrent_tasks=3).run(make_tasks(*["simple"] * 12), tracker)
+
+    assert tracker.peak["all"] == 3
+
+
+@pytest.mark.asyncio
+async def test_category_limit():
+    tracker = Tracker()
+    scheduler = TaskScheduler(max_concurrent_tasks=4, category_limits={"complex": 1})
+
+    await scheduler.run(make_tasks(*["complex", "simple"] * 6), tracker)
+
+    assert tracker.peak["complex"] == 1
+    assert tracker.peak["all"] == 4
+    assert tracker.peak["simple"] > 1
+
+
+@pytest.mark.asyncio
+async def test_waiting_category_does_not_block_others():
+    order = []
+
+    async def worker(index: int, task: dict) -> None:
+        order.append(task["id"])
+        await asyncio.sleep(0.05 if task["category"] == "complex" else 0)
+
+    scheduler = TaskScheduler(max_concurrent_tasks=2, category_limits={"complex": 1})
+    await scheduler.run(make_tasks("complex", "complex", "simple", "simple"), worker)
+
+    # Second complex task waits for its category, simple tasks take the free global slot
+    assert order.index("task_3") < order.index("task_2")
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        TaskScheduler(max_concurrent_tasks=0)
+    with pytest.raises(ValueError):
+        TaskScheduler(category_limits={"complex": 0})
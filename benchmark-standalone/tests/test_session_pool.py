@@ -0,0 +1,124 @@
+"""
+Тесты SessionPool: выдача заранее подготовленных сессий, переподключение
+закрытых сервером соединений и закрытие неиспользованных сессий.
+"""
+import asyncio
+
+import pytest
+from websockets.protocol import State
+
+from src.session_pool import GatewaySession, SessionPool
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.state = State.OPEN
+
+    async def close(self):
+        self.state = State.CLOSED
+
+
+class FakeClient:
+    """Gateway client that numbers sessions and can fail selected ones."""
+
+    def __init__(self, fail=()):
+        self.created = 0
+        self.connects = []
+        self.fail = set(fail)
+
+    async def open_session(self, connect: bool = True) -> GatewaySession:
+        self.created += 1
+        number = self.created
+        session_id = f"s{number}"
+        await asyncio.sleep(0)
+        if number in self.fail:
+            raise ConnectionError(f"{session_id} failed")
+        websocket = await self.connect_websocket(session_id) if connect else None
+        return GatewaySession(session_id, websocket)
+
+    async def connect_websocket(self, session_id: str) -> FakeWebSocket:
+        self.connects.append(session_id)
+        return FakeWebSocket()
+
+
+@pytest.mark.asyncio
+async def test_prepared_sessions_are_handed_out_in_order():
+    client = FakeClient()
+    pool = SessionPool(client, total=3, ahead=2)
+    pool.start()
+
+    sessions = [await pool.acquire() for _ in range(3)]
+    await pool.close()
+
+    assert [s.session_id for s in sessions] == ["s1", "s2", "s3"]
+    assert all(s.connected for s in sessions)
+    assert (pool.prepared_hits, pool.misses) == (3, 0)
+    # Never more sessions than tasks
+    assert client.created == 3
+
+
+@pytest.mark.asyncio
+async def test_spare_session_is_reused_first():
+    client = FakeClient()
+    spare = GatewaySession("spare", FakeWebSocket())
+    pool = SessionPool(client, total=2, ahead=1, spare=spare)
+    pool.start()
+
+    first = await pool.acquire()
+    second = await pool.acquire()
+    await pool.close()
+
+    assert first is spare
+    assert second.session_id == "s1"
+    assert client.created == 1
+
+
+@pytest.mark.asyncio
+async def test_closed_prepared_connection_is_reopened():
+    client = FakeClient()
+    pool = SessionPool(client, total=1, ahead=1)
+    pool.start()
+    await asyncio.sleep(0.01)
+
+    # Server dropped the idle connection before the task started
+    prepared = pool._pending[0].result()
+    await prepared.websocket.close()
+    session = await pool.acquire()
+    await pool.close()
+
+    assert session.session_id == "s1"
+    assert session.connected
+    assert client.connects == ["s1", "s1"]
+
+
+@pytest.mark.asyncio
+async def test_failed_prepared_session_is_skipped():
+    client = FakeClient(fail={1})
+    pool = SessionPool(client, total=2, ahead=2)
+    pool.start()
+
+    first = await pool.acquire()
+    second = await pool.acquire()
+    await pool.close()
+
+    assert first.session_id == "s2"
+    # Failed preparation is replaced by a session opened on demand
+    assert second.session_id == "s3"
+    assert (pool.prepared_hits, pool.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_close_closes_unused_sessions():
+    client = FakeClient()
+    pool = SessionPool(client, total=5, ahead=2)
+    pool.start()
+    await asyncio.sleep(0.01)
+    prepared = [task.result() for task in pool._pending]
+
+    await pool.close()
+
+    assert len(prepared) == 2
+    assert not any(s.connected for s in prepared)
+    # Nothing new is prepared after close
+    await asyncio.sleep(0.01)
+    assert client.created == 2
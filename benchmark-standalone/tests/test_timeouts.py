@@ -0,0 +1,118 @@
+"""
+Тесты TimeoutPolicy: дедлайны по перцентилю истории задачи или категории и
+таймауты из конфигурации без истории.
+"""
+import pytest
+
+from src.collector import MetricsCollector
+from src.timeouts import TimeoutPolicy
+
+TASK = {"id": "task_001", "category": "complex", "type": "coding"}
+
+
+async def seed(db, runs, mode: str = "multi-agent", max_idle=None) -> None:
+    """Store finished runs given as (task_id, category, duration, success)."""
+    collector = MetricsCollector(db)
+    experiment_id = await collector.start_experiment(mode=mode)
+    for task_id, category, duration, success in runs:
+        task_execution_id = await collector.start_task(
+            experiment_id, task_id, category, "coding", mode
+        )
+        metrics = {"duration_seconds": duration}
+        if max_idle is not None:
+            metrics["max_idle_seconds"] = max_idle
+        await collector.complete_task(task_execution_id, success, metrics=metrics)
+
+
+def make_policy(**kwargs) -> TimeoutPolicy:
+    config = {"percentile": 50, "factor": 2.0, "min_samples": 3, "min_seconds": 1,
+              "max_seconds": 1000, "category_idle": {"complex": 300, "mixed": 300}}
+    config.update(kwargs)
+    return TimeoutPolicy.from_config(config, default_idle=60)
+
+
+@pytest.mark.asyncio
+async def test_task_history_percentile(db):
+    await seed(db, [("task_001", "complex", d, True) for d in (10, 20, 30, 40, 50)])
+    policy = make_policy()
+
+    assert await policy.load(db) == 5
+    timeout = policy.for_task(TASK)
+
+    # p50 of the task's runs times factor
+    assert timeout.source == "task"
+    assert timeout.total == pytest.approx(60)
+    assert timeout.idle == pytest.approx(60)
+
+
+@pytest.mark.asyncio
+async def test_category_history_when_task_has_few_runs(db):
+    await seed(db, [("task_001", "complex", 10, True)] + [
+        (f"task_{i:03d}", "complex", 100, True) for i in range(2, 5)
+    ])
+    policy = make_policy()
+    await policy.load(db)
+
+    timeout = policy.for_task(TASK)
+
+    assert timeout.source == "category"
+    assert timeout.total == pytest.approx(200)
+    # Configured idle (300s) never exceeds the learned total
+    assert timeout.idle == pytest.approx(200)
+
+
+@pytest.mark.asyncio
+async def test_idle_learned_from_message_waits(db):
+    await seed(db, [("task_001", "complex", 100, True)] * 3, max_idle=4)
+    policy = make_policy()
+    await policy.load(db)
+
+    timeout = policy.for_task(TASK)
+
+    # p50 of the longest waits times factor instead of the configured 300s
+    assert timeout.idle == pytest.approx(8)
+    assert timeout.total == pytest.approx(200)
+
+
+@pytest.mark.asyncio
+async def test_history_limit_keeps_most_recent_runs(db):
+    await seed(db, [("task_001", "complex", 1000, True)] * 3)
+    await seed(db, [("task_001", "complex", 10, True)] * 3)
+    policy = make_policy(history_limit=3)
+
+    assert await policy.load(db) == 3
+    assert policy.for_task(TASK).total == pytest.approx(20)
+
+
+@pytest.mark.asyncio
+async def test_failed_runs_and_other_modes_are_ignored(db):
+    await seed(db, [("task_001", "complex", 10, False)] * 5)
+    await seed(db, [("task_001", "complex", 10, True)] * 5, mode="single-agent")
+    policy = make_policy()
+
+    assert await policy.load(db, mode="multi-agent") == 0
+    timeout = policy.for_task(TASK)
+
+    assert timeout.source == "default"
+    assert timeout.total is None
+
+
+@pytest.mark.asyncio
+async def test_learned_deadline_is_clamped(db):
+    await seed(db, [("task_001", "complex", 900, True)] * 3)
+    policy = make_policy(max_seconds=600)
+    await policy.load(db)
+
+    timeout = policy.for_task(TASK)
+
+    assert timeout.total == 600
+    assert timeout.idle == 300
+
+
+def test_configured_idle_without_history():
+    policy = make_policy()
+
+    assert policy.for_task(TASK).idle == 300
+    assert policy.for_task({"id": "t", "category": "simple", "type": "mixed"}).idle == 300
+    assert policy.for_task({"id": "t", "category": "simple", "type": "coding"}).idle == 60
+    assert policy.for_task({"id": "t", "category": "simple"}).total is None
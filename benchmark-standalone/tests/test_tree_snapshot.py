@@ -0,0 +1,114 @@
+"""
+Тесты TreeSnapshot: изменения executor, перестроение после mark_stale() и
+внешние изменения через inotify.
+"""
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.tree_snapshot import TreeSnapshot
+
+inotify_only = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is only available on Linux"
+)
+
+
+@pytest.fixture
+def root(tmp_path: Path) -> Path:
+    (tmp_path / "lib" / "src").mkdir(parents=True)
+    (tmp_path / "lib" / "main.dart").write_text("void main() {}\n")
+    (tmp_path / "lib" / "src" / "a.dart").write_text("class A {}\n")
+    (tmp_path / ".dart_tool").mkdir()
+    (tmp_path / ".dart_tool" / "cache.json").write_text("{}")
+    return tmp_path
+
+
+def test_lists_files_without_ignored_dirs(root: Path):
+    tree = TreeSnapshot(root)
+
+    assert sorted(tree.list_files("", recursive=True)) == ["lib/main.dart", "lib/src/a.dart"]
+    assert tree.list_files("lib") == ["lib/main.dart"]
+    assert tree.list_files("missing") is None
+    assert tree.count_files("lib", "*.dart") == 2
+
+
+def test_update_records_executor_changes(root: Path):
+    tree = TreeSnapshot(root)
+    tree.list_files("")
+
+    (root / "lib" / "widgets").mkdir()
+    (root / "lib" / "widgets" / "card.dart").write_text("class Card {}\n")
+    tree.update("lib/widgets/card.dart")
+    (root / "lib" / "main.dart").unlink()
+    tree.update("lib/main.dart")
+
+    assert sorted(tree.list_files("lib", recursive=True)) == [
+        "lib/src/a.dart", "lib/widgets/card.dart"
+    ]
+    assert tree.count_files("lib", "*.dart") == 2
+
+
+def test_external_changes_after_mark_stale(root: Path):
+    tree = TreeSnapshot(root)
+    assert tree.count_files("lib") == 2
+
+    (root / "lib" / "b.dart").write_text("class B {}\n")
+    # Unreported external change is not seen until the tree is marked stale
+    assert tree.count_files("lib") == 2
+
+    tree.mark_stale()
+    assert tree.count_files("lib") == 3
+    assert "lib/b.dart" in tree.list_files("lib")
+
+
+def test_changes_since_reports_updates_until_rebuild(root: Path):
+    tree = TreeSnapshot(root)
+    cursor, changed = tree.changes_since(None)
+    assert changed is None
+
+    (root / "lib" / "b.dart").write_text("class B {}\n")
+    tree.update("lib/b.dart")
+    cursor, changed = tree.changes_since(cursor)
+    assert changed == ["lib/b.dart"]
+    cursor, changed = tree.changes_since(cursor)
+    assert changed == []
+
+    # A rebuilt snapshot cannot tell what changed
+    tree.mark_stale()
+    assert tree.changes_since(cursor)[1] is None
+
+
+@inotify_only
+def test_inotify_reports_external_changes(root: Path):
+    tree = TreeSnapshot(root, watch=True)
+    tree.list_files("")
+    assert tree.watching
+
+    (root / "lib" / "b.dart").write_text("class B {}\n")
+    (root / "lib" / "src" / "a.dart").rename(root / "lib" / "moved.dart")
+    (root / "test").mkdir()
+    (root / "test" / "a_test.dart").write_text("void main() {}\n")
+
+    assert sorted(tree.list_files("", recursive=True)) == [
+        "lib/b.dart", "lib/main.dart", "lib/moved.dart", "test/a_test.dart"
+    ]
+    tree.close()
+
+
+@inotify_only
+def test_inotify_removed_directory_and_ignored_dirs(root: Path):
+    tree = TreeSnapshot(root, watch=True)
+    assert tree.count_files("", "*.dart") == 2
+    generation = tree.generation
+
+    shutil.rmtree(root / "lib" / "src")
+    (root / "build").mkdir()
+    (root / "build" / "out.dart").write_text("")
+
+    assert tree.count_files("", "*.dart") == 1
+    assert tree.list_files("lib/src") is None
+    assert tree.list_files("build") is None
+    assert tree.generation > generation
+    tree.close()
@@ -0,0 +1,131 @@
+"""
+Тесты кэша результатов проверок: попадания, инвалидация по содержимому,
+LRU вытеснение и сохранение между запусками.
+"""
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+from src.analysis import FAKE_ANALYZER_COMMAND, AnalysisServers
+from src.validation_cache import ValidationCache
+from src.validator import TaskValidator
+
+SYNTAX_TASK = {
+    "id": "task_cache",
+    "auto_check": [{"type": "syntax_valid", "params": {"path": "lib/widget.dart"}}],
+}
+
+
+@pytest_asyncio.fixture
+async def validator(tmp_path: Path):
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "lib" / "widget.dart").write_text("import 'model.dart';\n\nclass Widget {}\n")
+    (tmp_path / "lib" / "model.dart").write_text("class Model {}\n")
+    (tmp_path / "pubspec.yaml").write_text("name: cache_test\n")
+
+    servers = AnalysisServers(command=FAKE_ANALYZER_COMMAND)
+    validator = TaskValidator(
+        tmp_path,
+        settle_timeout=0.1,
+        analysis_servers=servers,
+        cache=ValidationCache()
+    )
+    yield validator
+    await servers.close()
+
+
+async def check(validator: TaskValidator) -> dict:
+    result = await validator.validate_task(SYNTAX_TASK)
+    return result["details"][0]
+
+
+@pytest.mark.asyncio
+async def test_unchanged_files_hit_cache(validator: TaskValidator):
+    first = await check(validator)
+    second = await check(validator)
+
+    assert first["passed"] and first["cached"] is False
+    assert second["passed"] and second["cached"] is True
+    assert validator.cache.get_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hit_does_not_start_analysis_server(validator: TaskValidator, tmp_path: Path):
+    await check(validator)
+
+    # Same project in another validator: its servers were never started
+    servers = AnalysisServers(command=FAKE_ANALYZER_COMMAND)
+    fresh = TaskValidator(
+        tmp_path, settle_timeout=0.1, analysis_servers=servers, cache=validator.cache
+    )
+    result = await check(fresh)
+
+    assert result["cached"] is True
+    assert not servers._servers
+
+
+@pytest.mark.asyncio
+async def test_changed_file_invalidates(validator: TaskValidator):
+    await check(validator)
+
+    (validator.project_path / "lib" / "widget.dart").write_text("class Widget {\n")
+    result = await check(validator)
+
+    assert result["cached"] is False
+    assert not result["passed"]
+
+
+@pytest.mark.asyncio
+async def test_changed_import_invalidates(validator: TaskValidator):
+    await check(validator)
+
+    # Result of a file depends on the files it imports
+    (validator.project_path / "lib" / "model.dart").write_text("class Model { int x = 1; }\n")
+    assert (await check(validator))["cached"] is False
+
+
+@pytest.mark.asyncio
+async def test_changed_project_config_invalidates(validator: TaskValidator):
+    await check(validator)
+
+    (validator.project_path / "pubspec.yaml").write_text("name: cache_test\nversion: 2.0.0\n")
+    assert (await check(validator))["cached"] is False
+
+
+def test_key_depends_on_all_parts():
+    key = ValidationCache.make_key("syntax_valid", {"path": "a"}, {"a": "1"}, "dart 3")
+
+    assert key == ValidationCache.make_key("syntax_valid", {"path": "a"}, {"a": "1"}, "dart 3")
+    assert key != ValidationCache.make_key("test_passes", {"path": "a"}, {"a": "1"}, "dart 3")
+    assert key != ValidationCache.make_key("syntax_valid", {"path": "b"}, {"a": "1"}, "dart 3")
+    assert key != ValidationCache.make_key("syntax_valid", {"path": "a"}, {"a": "2"}, "dart 3")
+    assert key != ValidationCache.make_key("syntax_valid", {"path": "a"}, {"a": "1"}, "dart 4")
+
+
+def test_evicts_least_recently_used():
+    cache = ValidationCache(max_entries=2)
+    cache.put("a", {"passed": True})
+    cache.put("b", {"passed": True})
+    cache.get("a")
+    cache.put("c", {"passed": False})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"passed": True}
+    assert cache.get("c") == {"passed": False}
+
+
+def test_persists_between_runs(tmp_path: Path):
+    path = tmp_path / "cache" / "validation.json"
+    cache = ValidationCache(path)
+    cache.put("key", {"passed": True, "message": "ok"})
+    cache.save()
+
+    assert ValidationCache(path).get("key") == {"passed": True, "message": "ok"}
+
+
+def test_ignores_unreadable_file(tmp_path: Path):
+    path = tmp_path / "validation.json"
+    path.write_text("{not json")
+
+    assert ValidationCache(path).get_stats()["entries"] == 0
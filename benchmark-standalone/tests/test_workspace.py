@@ -0,0 +1,160 @@
+"""
+Тесты изолированных workspace: hardlink-дерево, сброс между задачами,
+копирование каталогов toolchain перед командами, detach и безопасное удаление.
+"""
+import os
+from pathlib import Path
+
+import pytest
+
+from src.executor import MockToolExecutor
+from src.workspace import WorkspaceManager
+
+
+@pytest.fixture
+def base(tmp_path: Path) -> Path:
+    base = tmp_path / "project"
+    (base / "lib").mkdir(parents=True)
+    (base / "lib" / "main.dart").write_text("void main() {}\n")
+    (base / "pubspec.yaml").write_text("name: project\n")
+    (base / ".dart_tool").mkdir()
+    (base / ".dart_tool" / "package_config.json").write_text("{}\n")
+    return base
+
+
+def inode(path: Path) -> int:
+    return os.lstat(path).st_ino
+
+
+@pytest.mark.asyncio
+async def test_toolchain_dirs_linked_until_privatized(base: Path):
+    manager = WorkspaceManager(base)
+    workspace = await manager.acquire()
+    config = workspace.path / ".dart_tool" / "package_config.json"
+
+    # Provisioning only links, even the toolchain caches
+    assert inode(workspace.path / "lib" / "main.dart") == inode(base / "lib" / "main.dart")
+    assert inode(config) == inode(base / ".dart_tool" / "package_config.json")
+
+    assert workspace.privatize() == 1
+    assert inode(config) != inode(base / ".dart_tool" / "package_config.json")
+    assert inode(workspace.path / "lib" / "main.dart") == inode(base / "lib" / "main.dart")
+    assert workspace.privatize() == 0
+
+    # Toolchain writes in place, the base project must not see it
+    with open(config, "w") as f:
+        f.write('{"changed": true}\n')
+    assert (base / ".dart_tool" / "package_config.json").read_text() == "{}\n"
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_command_privatizes_toolchain_dirs(base: Path):
+    manager = WorkspaceManager(base)
+    workspace = await manager.acquire()
+    executor = MockToolExecutor(workspace.path, workspace=workspace)
+
+    await executor.execute_tool("execute_command", {"command": "dart --version"})
+
+    assert workspace.private
+    config = workspace.path / ".dart_tool" / "package_config.json"
+    assert inode(config) != inode(base / ".dart_tool" / "package_config.json")
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_release_resets_to_base(base: Path):
+    manager = WorkspaceManager(base, pool_size=1)
+    workspace = await manager.acquire()
+    executor = MockToolExecutor(workspace.path, workspace=workspace)
+
+    await executor.execute_tool("write_file", {"path": "lib/main.dart", "content": "changed\n"})
+    await executor.execute_tool("write_file", {"path": "lib/extra.dart", "content": "x\n"})
+    (workspace.path / "pubspec.yaml").unlink()
+    workspace.privatize()
+    (workspace.path / ".dart_tool" / "package_config.json").write_text("{}\n// stale\n")
+    (workspace.path / ".dart_tool" / "cache.bin").write_text("cache\n")
+    assert (base / "lib" / "main.dart").read_text() == "void main() {}\n"
+
+    await manager.release(workspace)
+    assert await manager.acquire() is workspace
+
+    assert (workspace.path / "lib" / "main.dart").read_text() == "void main() {}\n"
+    assert inode(workspace.path / "lib" / "main.dart") == inode(base / "lib" / "main.dart")
+    assert not (workspace.path / "lib" / "extra.dart").exists()
+    assert (workspace.path / "pubspec.yaml").exists()
+    assert (workspace.path / ".dart_tool" / "package_config.json").read_text() == "{}\n"
+    # Untracked toolchain caches survive for the next task
+    assert (workspace.path / ".dart_tool" / "cache.bin").exists()
+    assert not workspace.private
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_detach_copies_and_reset_relinks(base: Path):
+    manager = WorkspaceManager(base, pool_size=1)
+    workspace = await manager.acquire()
+    source = workspace.path / "lib" / "main.dart"
+
+    assert workspace.detach() > 0
+    assert inode(source) != inode(base / "lib" / "main.dart")
+    source.write_text("formatted\n")
+    assert (base / "lib" / "main.dart").read_text() == "void main() {}\n"
+    assert workspace.detach() == 0
+
+    await manager.release(workspace)
+    assert inode(source) == inode(base / "lib" / "main.dart")
+    assert not workspace.detached
+
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_workspaces_are_isolated(base: Path):
+    manager = WorkspaceManager(base, pool_size=2)
+    first, second = await manager.acquire(), await manager.acquire()
+
+    await MockToolExecutor(first.path, workspace=first).execute_tool(
+        "write_file", {"path": "lib/main.dart", "content": "first\n"}
+    )
+
+    assert (second.path / "lib" / "main.dart").read_text() == "void main() {}\n"
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_close_removes_only_own_workspaces(base: Path, tmp_path: Path):
+    root = tmp_path / "workspaces"
+    manager = WorkspaceManager(base, root=root, pool_size=1)
+    await manager.warm_up()
+    leftover = root / "ws_0_1"
+    leftover.mkdir()
+
+    await manager.close()
+
+    assert [p.name for p in root.iterdir()] == ["ws_0_1"]
+    assert base.exists()
+
+
+@pytest.mark.asyncio
+async def test_close_removes_created_root(base: Path, tmp_path: Path):
+    manager = WorkspaceManager(base, root=tmp_path / "workspaces")
+    await manager.warm_up(1)
+
+    await manager.close()
+
+    assert not (tmp_path / "workspaces").exists()
+
+
+def test_refuses_unsafe_roots(base: Path, tmp_path: Path):
+    with pytest.raises(ValueError):
+        WorkspaceManager(base, root=base / "workspaces")
+    with pytest.raises(ValueError):
+        WorkspaceManager(base, root=tmp_path)
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / "notes.txt").write_text("keep\n")
+    with pytest.raises(ValueError, match="not empty"):
+        WorkspaceManager(base, root=tmp_path / "other")